@@ -1,4 +1,5 @@
 import { useQuery } from "@tanstack/react-query";
+import { Link } from "wouter";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { Button } from "@/components/ui/button";
@@ -6,7 +7,8 @@ import { Clock, Eye } from "lucide-react";
 
 export default function RecentOrders() {
   const { data: orders, isLoading } = useQuery({
-    queryKey: ["api", "orders"],
+    // Only the newest few are shown
+    queryKey: ["api", "orders", "?limit=5"],
   });
 
   if (isLoading) {
@@ -34,7 +36,8 @@ export default function RecentOrders() {
     );
   }
 
-  const recentOrders = Array.isArray(orders) ? orders.slice(0, 5) : [];
+  // The orders endpoint returns one page, newest first: { orders, nextCursor }
+  const recentOrders: any[] = (orders as any)?.orders ?? [];
 
   const getStatusColor = (status: string) => {
     switch (status.toLowerCase()) {
@@ -107,9 +110,11 @@ export default function RecentOrders() {
         </div>
         {recentOrders.length > 4 && (
           <div className="mt-4 text-center">
-            <Button variant="outline" size="sm" data-testid="button-view-all-orders">
-              View All Orders
-            </Button>
+            <Link href="/orders">
+              <Button variant="outline" size="sm" data-testid="button-view-all-orders">
+                View All Orders
+              </Button>
+            </Link>
           </div>
         )}
       </CardContent>
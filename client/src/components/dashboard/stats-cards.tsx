@@ -30,14 +30,14 @@ export default function StatsCards({ stats, isLoading, userRole }: StatsCardsPro
     const baseStats = [
       {
         title: "Total Orders",
-        value: stats?.totalOrders || 0,
+        value: stats?.total_orders || 0,
         change: "+12%",
         trend: "up" as const,
         description: "from last month"
       },
       {
         title: "Revenue",
-        value: `$${(stats?.totalRevenue || 0).toLocaleString()}`,
+        value: `$${(stats?.total_revenue || 0).toLocaleString()}`,
         change: "+8%",
         trend: "up" as const,
         description: "from last month"
@@ -50,14 +50,14 @@ export default function StatsCards({ stats, isLoading, userRole }: StatsCardsPro
           ...baseStats,
           {
             title: "Pending Orders",
-            value: stats?.pendingOrders || 0,
+            value: stats?.pending_orders || 0,
             change: "0%",
             trend: "neutral" as const,
             description: "awaiting fulfillment"
           },
           {
             title: "Suppliers",
-            value: stats?.activeSuppliers || 5,
+            value: stats?.active_partners || 0,
             change: "+2",
             trend: "up" as const,
             description: "active partnerships"
@@ -75,7 +75,7 @@ export default function StatsCards({ stats, isLoading, userRole }: StatsCardsPro
           },
           {
             title: "Active Retailers",
-            value: stats?.activeRetailers || 8,
+            value: stats?.active_partners || 0,
             change: "+3",
             trend: "up" as const,
             description: "new connections"
@@ -86,17 +86,17 @@ export default function StatsCards({ stats, isLoading, userRole }: StatsCardsPro
           ...baseStats,
           {
             title: "Products",
-            value: stats?.productsCount || 0,
+            value: stats?.total_products || 0,
             change: "+5%",
             trend: "up" as const,
             description: "total catalog"
           },
           {
             title: "Production Volume",
-            value: `${(stats?.productionVolume || 1250).toLocaleString()} units`,
+            value: `${(stats?.total_items || 0).toLocaleString()} units`,
             change: "+18%",
             trend: "up" as const,
-            description: "this month"
+            description: "ordered to date"
           }
         ];
       default:
@@ -2,6 +2,7 @@ import { useState } from "react";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { apiRequest } from "@/lib/queryClient";
 import { useAuth } from "@/hooks/useAuth";
+import { useCursorPages } from "@/hooks/useCursorPages";
 import { useToast } from "@/hooks/use-toast";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
@@ -86,8 +87,15 @@ export default function ProductBrowser({ partner, isOpen, onClose }: ProductBrow
   };
 
   // Fetch products from partner
-  const { data: products = [], isLoading: productsLoading, error: productsError } = useQuery<Product[]>({
-    queryKey: ["api", "products", "partner", partner.id],
+  // The catalog comes a page at a time; "Load more" follows nextCursor
+  const {
+    items: products,
+    isLoading: productsLoading,
+    error: productsError,
+    hasNextPage: hasMoreProducts,
+    fetchNextPage: fetchMoreProducts,
+    isFetchingNextPage: fetchingMoreProducts,
+  } = useCursorPages<Product>(["api", "products", "partner", partner.id], "products", {
     enabled: isOpen && canPlaceOrders(),
   });
 
@@ -306,6 +314,18 @@ export default function ProductBrowser({ partner, isOpen, onClose }: ProductBrow
                   ))}
                 </div>
 
+                {hasMoreProducts && (
+                  <div className="flex justify-center">
+                    <Button
+                      variant="outline"
+                      onClick={() => fetchMoreProducts()}
+                      disabled={fetchingMoreProducts}
+                    >
+                      {fetchingMoreProducts ? "Loading..." : "Load more products"}
+                    </Button>
+                  </div>
+                )}
+
                 {Object.keys(quantities).length > 0 && (
                   <div className="border-t pt-6">
                     <div className="flex items-center justify-between">
@@ -1,40 +1,51 @@
-import { useState, useEffect } from "react";
 import { useQuery } from "@tanstack/react-query";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 import { MessageCircle, Bell, Download, CheckCircle, XCircle, Truck, Package } from "lucide-react";
-import { getQueryFn } from "@/lib/queryClient";
+import { getQueryFn, apiRequest } from "@/lib/queryClient";
 import { useToast } from "@/hooks/use-toast";
 
 interface WhatsAppNotification {
   id: string;
   message: string;
   type: string;
-  sentAt: string;
+  sentAt: string | null;
   isDelivered: boolean;
+  isRead: boolean;
   createdAt: string;
 }
 
+interface NotificationPage {
+  notifications: WhatsAppNotification[];
+  nextCursor: string | null;
+  unreadCount: number;
+}
+
 export default function WhatsAppNotifications() {
   const { toast } = useToast();
-  const [unreadCount, setUnreadCount] = useState(0);
 
-  const { data: notifications = [], isLoading, refetch } = useQuery<WhatsAppNotification[]>({
-    queryKey: ["api", "whatsapp", "notifications"],
+  const { data, isLoading, refetch } = useQuery<NotificationPage>({
+    queryKey: ["api", "notifications"],
     queryFn: getQueryFn({ on401: "throw" }),
   });
+  const notifications = data?.notifications ?? [];
 
-  useEffect(() => {
-    // Count unread notifications (notifications from last 24 hours)
-    const now = new Date();
-    const unread = notifications.filter(n => {
-      const sentTime = new Date(n.sentAt);
-      const hoursDiff = (now.getTime() - sentTime.getTime()) / (1000 * 60 * 60);
-      return hoursDiff <= 24;
-    }).length;
-    setUnreadCount(unread);
-  }, [notifications]);
+  // The badge reads the maintained counter; live updates refetch it
+  const { data: unread, refetch: refetchUnread } = useQuery<{ unreadCount: number }>({
+    queryKey: ["api", "notifications", "unread-count"],
+    queryFn: getQueryFn({ on401: "throw" }),
+  });
+  const unreadCount = unread?.unreadCount ?? data?.unreadCount ?? 0;
+
+  const markAllRead = async () => {
+    try {
+      await apiRequest("POST", "api/notifications/read-all");
+      await Promise.all([refetch(), refetchUnread()]);
+    } catch (error) {
+      toast({ title: "Could not mark notifications as read", variant: "destructive" });
+    }
+  };
 
   const getNotificationIcon = (type: string) => {
     switch (type) {
@@ -113,14 +124,26 @@ export default function WhatsAppNotifications() {
               </Badge>
             )}
           </CardTitle>
-          <Button 
-            variant="outline" 
-            size="sm" 
-            onClick={() => refetch()}
-            className="text-xs"
-          >
-            Refresh
-          </Button>
+          <div className="flex items-center gap-2">
+            {unreadCount > 0 && (
+              <Button 
+                variant="ghost" 
+                size="sm" 
+                onClick={markAllRead}
+                className="text-xs"
+              >
+                Mark all read
+              </Button>
+            )}
+            <Button 
+              variant="outline" 
+              size="sm" 
+              onClick={() => refetch()}
+              className="text-xs"
+            >
+              Refresh
+            </Button>
+          </div>
         </div>
       </CardHeader>
       <CardContent>
@@ -133,7 +156,7 @@ export default function WhatsAppNotifications() {
             </div>
           ) : (
             notifications.slice(0, 5).map((notification) => (
-              <div key={notification.id} className="border border-gray-200 rounded-lg p-4 hover:bg-gray-50 transition-colors">
+              <div key={notification.id} className={`border rounded-lg p-4 hover:bg-gray-50 transition-colors ${notification.isRead ? "border-gray-200" : "border-blue-300 bg-blue-50/40"}`}>
                 <div className="flex items-start gap-3">
                   <div className="flex-shrink-0 mt-1">
                     {getNotificationIcon(notification.type)}
@@ -142,7 +165,7 @@ export default function WhatsAppNotifications() {
                     <div className="flex items-center justify-between mb-2">
                       {getNotificationBadge(notification.type)}
                       <span className="text-xs text-gray-500">
-                        {formatTime(notification.sentAt)}
+                        {formatTime(notification.sentAt ?? notification.createdAt)}
                       </span>
                     </div>
                     <div className="text-sm text-gray-900 whitespace-pre-line">
@@ -0,0 +1,43 @@
+import { useInfiniteQuery, type QueryFunctionContext } from "@tanstack/react-query";
+import { getQueryFn } from "@/lib/queryClient";
+
+type CursorPage<T> = Record<string, T[] | string | null> & { nextCursor: string | null };
+
+const fetchPage = getQueryFn<any>({ on401: "throw" });
+
+// Add ?cursor= (or &cursor=) to the last part of a query key
+function withCursor(queryKey: readonly unknown[], cursor: string | null): string[] {
+  const parts = queryKey.map(part => String(part));
+  if (!cursor) {
+    return parts;
+  }
+  const last = parts[parts.length - 1] ?? "";
+  const param = `cursor=${encodeURIComponent(cursor)}`;
+  if (last.includes("?")) {
+    parts[parts.length - 1] = `${last}&${param}`;
+  } else {
+    parts.push(`?${param}`);
+  }
+  return parts;
+}
+
+// A cursor-paginated list endpoint ({ <itemsKey>: T[], nextCursor }) as one
+// growing list: `items` holds every page loaded so far, and fetchNextPage
+// follows nextCursor until it runs out
+export function useCursorPages<T>(
+  queryKey: string[],
+  itemsKey: string,
+  options: { enabled?: boolean } = {},
+) {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: (context: QueryFunctionContext<string[], string | null>) =>
+      fetchPage({ ...context, queryKey: withCursor(context.queryKey, context.pageParam) } as any) as Promise<CursorPage<T>>,
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage: CursorPage<T>) => lastPage?.nextCursor ?? undefined,
+    enabled: options.enabled ?? true,
+  });
+
+  const items: T[] = query.data?.pages.flatMap(page => (page?.[itemsKey] as T[]) ?? []) ?? [];
+  return { ...query, items };
+}
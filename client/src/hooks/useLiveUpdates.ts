@@ -0,0 +1,89 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import { API_BASE_URL, apiRequest, getAuthToken } from "@/lib/queryClient";
+
+// Wait before reconnecting after the stream ends or fails
+const RECONNECT_MS = 3000;
+
+// Server-sent order and notification updates replace polling: each event
+// invalidates the queries it affects. EventSource cannot send headers, so
+// every connection is opened with a fresh short-lived stream ticket instead
+// of the access token; that is also why reconnecting is done here rather
+// than by EventSource, resuming from the last event id seen.
+export function useLiveUpdates(enabled: boolean) {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!enabled || !getAuthToken()) {
+      return;
+    }
+
+    let source: EventSource | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let lastEventId = "";
+    let stopped = false;
+
+    const refreshOrders = () => {
+      queryClient.invalidateQueries({ queryKey: ["api", "orders"] });
+      queryClient.invalidateQueries({ queryKey: ["api", "analytics", "stats"] });
+    };
+    const refreshNotifications = () => {
+      queryClient.invalidateQueries({ queryKey: ["api", "notifications"] });
+    };
+
+    // Remember where to resume, then run the handler
+    const track = (handler: () => void) => (event: Event) => {
+      const id = (event as MessageEvent).lastEventId;
+      if (id) {
+        lastEventId = id;
+      }
+      handler();
+    };
+
+    const reconnect = () => {
+      source?.close();
+      source = null;
+      if (!stopped) {
+        reconnectTimer = setTimeout(connect, RECONNECT_MS);
+      }
+    };
+
+    async function connect() {
+      try {
+        const res = await apiRequest("POST", "/api/events/ticket");
+        const { ticket } = await res.json();
+        if (stopped) {
+          return;
+        }
+        const params = new URLSearchParams({ ticket });
+        if (lastEventId) {
+          params.set("lastEventId", lastEventId);
+        }
+        source = new EventSource(`${API_BASE_URL}/api/events/stream?${params}`);
+      } catch {
+        reconnect();
+        return;
+      }
+
+      source.addEventListener("ready", track(() => {}));
+      source.addEventListener("order.created", track(refreshOrders));
+      source.addEventListener("order.updated", track(refreshOrders));
+      source.addEventListener("notification", track(refreshNotifications));
+      // Too much was missed to replay: refetch everything
+      source.addEventListener("reset", track(() => {
+        refreshOrders();
+        refreshNotifications();
+      }));
+      // The stream ended (the server closes it periodically) or failed
+      source.onerror = reconnect;
+    }
+
+    connect();
+
+    return () => {
+      stopped = true;
+      clearTimeout(reconnectTimer);
+      source?.close();
+    };
+  }, [enabled, queryClient]);
+}
@@ -1,10 +1,10 @@
 import { QueryClient, QueryFunction } from "@tanstack/react-query";
 
 // API Base URL - change this to your Flask backend URL
-const API_BASE_URL = process.env.VITE_API_URL || 'http://localhost:5001';
+export const API_BASE_URL = process.env.VITE_API_URL || 'http://localhost:5001';
 
 // Get JWT token from localStorage
-function getAuthToken(): string | null {
+export function getAuthToken(): string | null {
   return localStorage.getItem('authToken');
 }
 
@@ -34,6 +34,16 @@ const ENDPOINTS_NEEDING_TRAILING_SLASH = [
   'api/partnerships'
 ];
 
+// Add the trailing slash to the collection routes above, before any query
+// string; their sub-routes (e.g. api/products/partner/<id>) take none
+function withTrailingSlash(url: string): string {
+  const queryStart = url.indexOf('?');
+  const path = queryStart === -1 ? url : url.slice(0, queryStart);
+  const query = queryStart === -1 ? '' : url.slice(queryStart);
+  const needsTrailingSlash = ENDPOINTS_NEEDING_TRAILING_SLASH.some(endpoint => path.endsWith(endpoint));
+  return (needsTrailingSlash ? `${path}/` : path) + query;
+}
+
 export async function apiRequest(
   method: string,
   url: string,
@@ -55,10 +65,7 @@ export async function apiRequest(
   const finalUrl = `${API_BASE_URL}/${cleanUrl}`;
   
   // Add trailing slash only for endpoints that need it
-  const needsTrailingSlash = ENDPOINTS_NEEDING_TRAILING_SLASH.some(endpoint => 
-    finalUrl.includes(endpoint) && !finalUrl.includes('categories')
-  );
-  const urlWithTrailingSlash = needsTrailingSlash && !finalUrl.endsWith('/') ? `${finalUrl}/` : finalUrl;
+  const urlWithTrailingSlash = withTrailingSlash(finalUrl);
 
   const res = await fetch(urlWithTrailingSlash, {
     method,
@@ -91,10 +98,12 @@ export const getQueryFn: <T>(options: {
     const lastPart = pathParts[pathParts.length - 1];
     if (lastPart && lastPart.includes('?')) {
       const [basePath, queryString] = lastPart.split('?');
-      if (basePath && queryString) {
-        // Remove the last part and add the base path
+      if (queryString) {
+        // Remove the last part and add the base path, if it has one
         pathParts.pop();
-        pathParts.push(basePath);
+        if (basePath) {
+          pathParts.push(basePath);
+        }
         path = pathParts.join('/');
         path = `${path}?${queryString}`;
       }
@@ -105,10 +114,7 @@ export const getQueryFn: <T>(options: {
     const finalUrl = `${API_BASE_URL}/${cleanPath}`;
     
     // Add trailing slash only for endpoints that need it
-    const needsTrailingSlash = ENDPOINTS_NEEDING_TRAILING_SLASH.some(endpoint => 
-      finalUrl.includes(endpoint) && !finalUrl.includes('categories')
-    );
-    const urlWithTrailingSlash = needsTrailingSlash && !finalUrl.endsWith('/') ? `${finalUrl}/` : finalUrl;
+    const urlWithTrailingSlash = withTrailingSlash(finalUrl);
 
     const res = await fetch(urlWithTrailingSlash, {
       headers,
@@ -1,4 +1,5 @@
 import { useAuth } from "@/hooks/useAuth";
+import { useLiveUpdates } from "@/hooks/useLiveUpdates";
 import { useQuery } from "@tanstack/react-query";
 import Header from "@/components/layout/header";
 import MobileNav from "@/components/layout/mobile-nav";
@@ -15,6 +16,7 @@ import type { User } from "@/hooks/useAuth";
 export default function Dashboard() {
   const { user, isLoading } = useAuth();
   const { toast } = useToast();
+  useLiveUpdates(!!user);
 
   // Redirect to login if not authenticated
   useEffect(() => {
@@ -1,5 +1,5 @@
-import { useQuery } from "@tanstack/react-query";
 import { useAuth } from "@/hooks/useAuth";
+import { useCursorPages } from "@/hooks/useCursorPages";
 import Header from "@/components/layout/header";
 import MobileNav from "@/components/layout/mobile-nav";
 import OrderStatus from "@/components/orders/order-status"; 
@@ -29,10 +29,14 @@ export default function Orders() {
     }
   }, [user, isLoading, toast]);
 
-  const { data: orders, isLoading: ordersLoading } = useQuery({
-    queryKey: ["api", "orders"],
-    enabled: !!user,
-  });
+  // Newest first, a page at a time; "Load more" follows nextCursor
+  const {
+    items: orders,
+    isLoading: ordersLoading,
+    hasNextPage: hasMoreOrders,
+    fetchNextPage: fetchMoreOrders,
+    isFetchingNextPage: fetchingMoreOrders,
+  } = useCursorPages<any>(["api", "orders"], "orders", { enabled: !!user });
 
   const getStatusBadgeClass = (status: string) => {
     switch (status) {
@@ -96,9 +100,9 @@ export default function Orders() {
               </Card>
             ))}
           </div>
-        ) : orders && Array.isArray(orders) && (orders as any[]).length > 0 ? (
+        ) : orders.length > 0 ? (
           <div className="space-y-6">
-            {(orders as any[]).map((order: any) => (
+            {orders.map((order: any) => (
               <Card key={order.id} className="hover:shadow-md transition-shadow">
                 <CardHeader>
                   <div className="flex justify-between items-start">
@@ -141,6 +145,17 @@ export default function Orders() {
                 </CardContent>
               </Card>
             ))}
+            {hasMoreOrders && (
+              <div className="flex justify-center">
+                <Button
+                  variant="outline"
+                  onClick={() => fetchMoreOrders()}
+                  disabled={fetchingMoreOrders}
+                >
+                  {fetchingMoreOrders ? "Loading..." : "Load more orders"}
+                </Button>
+              </div>
+            )}
           </div>
         ) : (
           <div className="text-center py-12">
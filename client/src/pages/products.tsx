@@ -1,6 +1,7 @@
 import { useState } from "react";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { useAuth } from "@/hooks/useAuth";
+import { useCursorPages } from "@/hooks/useCursorPages";
 import { apiRequest } from "@/lib/queryClient";
 import Header from "@/components/layout/header";
 import MobileNav from "@/components/layout/mobile-nav";
@@ -85,11 +86,27 @@ export default function Products() {
     retry: 3,
   });
 
-  const { data: products, isLoading: productsLoading, error: productsError } = useQuery({
-    queryKey: ["api", "products", selectedCategory === "all" ? "" : `?categoryId=${selectedCategory}`],
-    enabled: !!user && !isLoading,
-    retry: 3,
-  });
+  // Searching goes to the server, which searches the whole catalog rather
+  // than the pages loaded so far; wait for typing to pause first
+  const [productSearch, setProductSearch] = useState("");
+  useEffect(() => {
+    const timer = setTimeout(() => setProductSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const categoryParam = selectedCategory === "all" ? "" : `categoryId=${selectedCategory}`;
+  const productsQueryKey = productSearch
+    ? ["api", "products", "search", `?q=${encodeURIComponent(productSearch)}${categoryParam ? `&${categoryParam}` : ""}`]
+    : ["api", "products", categoryParam ? `?${categoryParam}` : ""];
+
+  const {
+    items: productList,
+    isLoading: productsLoading,
+    error: productsError,
+    hasNextPage: hasMoreProducts,
+    fetchNextPage: fetchMoreProducts,
+    isFetchingNextPage: fetchingMoreProducts,
+  } = useCursorPages<Product>(productsQueryKey, "products", { enabled: !!user && !isLoading });
 
   // Fetch favorites
   const { data: favorites = [], isLoading: favoritesLoading } = useQuery<Favorite[]>({
@@ -247,12 +264,6 @@ export default function Products() {
     setImageUploadType('url');
   };
 
-  const filteredProducts = Array.isArray(products) ? products.filter((product: any) =>
-    product.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    product.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    product.sku?.toLowerCase().includes(searchTerm.toLowerCase())
-  ) : [];
-
   const getRoleIcon = (role: string) => {
     switch (role) {
       case "distributor":
@@ -610,7 +621,18 @@ export default function Products() {
 
           {/* Products Tab */}
           <TabsContent value="products" className="space-y-4">
-            <ProductGrid products={filteredProducts} isLoading={productsLoading} userRole={user?.role || 'retailer'} />
+            <ProductGrid products={productList} isLoading={productsLoading} userRole={user?.role || 'retailer'} />
+            {hasMoreProducts && (
+              <div className="flex justify-center">
+                <Button
+                  variant="outline"
+                  onClick={() => fetchMoreProducts()}
+                  disabled={fetchingMoreProducts}
+                >
+                  {fetchingMoreProducts ? "Loading..." : "Load more products"}
+                </Button>
+              </div>
+            )}
           </TabsContent>
 
           {/* Partners Tab */}
@@ -2,6 +2,7 @@
 
 -- Create extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Create tables
 CREATE TABLE IF NOT EXISTS users (
@@ -38,7 +39,12 @@ CREATE TABLE IF NOT EXISTS products (
     base_price DECIMAL(10,2),
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
 );
 
 CREATE TABLE IF NOT EXISTS inventory (
@@ -106,10 +112,18 @@ CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_id);
 CREATE INDEX IF NOT EXISTS idx_products_manufacturer ON products(manufacturer_id);
+CREATE INDEX IF NOT EXISTS idx_products_created_id ON products(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_products_category_created_id ON products(category_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING gin (sku gin_trgm_ops);
 CREATE INDEX IF NOT EXISTS idx_inventory_distributor ON inventory(distributor_id);
 CREATE INDEX IF NOT EXISTS idx_inventory_product ON inventory(product_id);
 CREATE INDEX IF NOT EXISTS idx_orders_retailer ON orders(retailer_id);
 CREATE INDEX IF NOT EXISTS idx_orders_distributor ON orders(distributor_id);
+CREATE INDEX IF NOT EXISTS idx_orders_retailer_created_id ON orders(retailer_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_distributor_created_id ON orders(distributor_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
 CREATE INDEX IF NOT EXISTS idx_partnerships_requester ON partnerships(requester_id);
 CREATE INDEX IF NOT EXISTS idx_partnerships_partner ON partnerships(partner_id);
 CREATE INDEX IF NOT EXISTS idx_favorites_user ON favorites(user_id);
@@ -38,6 +38,8 @@ def create_app(config_class=Config):
     from app.api.v1.notifications import notifications_bp
     from app.api.v1.whatsapp import whatsapp_bp
     from app.api.v1.invoices import invoices_bp
+    from app.api.v1.exports import exports_bp
+    from app.api.v1.events import events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(products_bp, url_prefix='/api/products')
@@ -51,6 +53,8 @@ def create_app(config_class=Config):
     app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
     app.register_blueprint(whatsapp_bp, url_prefix='/api/whatsapp')
     app.register_blueprint(invoices_bp, url_prefix='/api/invoices')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
     
     # Error handlers
     from app.errors import register_error_handlers
@@ -1,6 +1,7 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Order, Product
+from app.models import User, Product, Partnership
+from app.services import leaderboards, order_stats, order_timeseries
 from app import db
 
 analytics_bp = Blueprint('analytics', __name__)
@@ -20,33 +21,95 @@ def get_stats():
         stats = {
             'total_orders': 0,
             'total_revenue': 0,
+            'total_items': 0,
             'pending_orders': 0,
             'completed_orders': 0,
+            'orders_by_status': {},
             'total_products': 0,
             'active_partners': 0
         }
         
-        if user.role == 'retailer':
-            # For retailers, get their orders
-            orders = Order.query.filter_by(retailer_id=current_user_id).all()
-            stats['total_orders'] = len(orders)
-            stats['total_revenue'] = sum(order.total_amount or 0 for order in orders)
-            stats['pending_orders'] = len([o for o in orders if o.status == 'pending'])
-            stats['completed_orders'] = len([o for o in orders if o.status == 'delivered'])
+        if user.role in ('retailer', 'distributor', 'manufacturer'):
+            # A few rows from the maintained rollup instead of every order;
+            # manufacturers see the lines for their own products
+            totals = order_stats.totals(user.id, user.role)
+            stats['total_orders'] = sum(orders for orders, _, _ in totals.values())
+            stats['total_revenue'] = float(sum(revenue for _, revenue, _ in totals.values()))
+            stats['total_items'] = sum(items for _, _, items in totals.values())
+            stats['pending_orders'] = totals.get('pending', (0, 0, 0))[0]
+            stats['completed_orders'] = totals.get('delivered', (0, 0, 0))[0]
+            stats['orders_by_status'] = {status: orders for status, (orders, _, _) in totals.items()}
             
-        elif user.role == 'distributor':
-            # For distributors, get orders they're fulfilling
-            orders = Order.query.filter_by(distributor_id=current_user_id).all()
-            stats['total_orders'] = len(orders)
-            stats['pending_orders'] = len([o for o in orders if o.status == 'pending'])
-            stats['completed_orders'] = len([o for o in orders if o.status == 'delivered'])
-            
-        elif user.role == 'manufacturer':
-            # For manufacturers, get their products
-            products = Product.query.filter_by(manufacturer_id=current_user_id).all()
-            stats['total_products'] = len(products)
+            stats['active_partners'] = Partnership.query.filter(
+                db.or_(Partnership.requester_id == user.id, Partnership.partner_id == user.id),
+                Partnership.status == 'approved'
+            ).count()
+        
+        if user.role == 'manufacturer':
+            stats['total_products'] = Product.query.filter_by(manufacturer_id=user.id).count()
             
         return jsonify(stats), 200
         
     except Exception as e:
-        return jsonify({'message': 'Error fetching stats', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Error fetching stats', 'error': str(e)}), 500
+
+@analytics_bp.route('/timeseries', methods=['GET'])
+@jwt_required()
+def get_timeseries():
+    """Get orders, revenue and units per day, week or month for the current user"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        if user.role not in ('retailer', 'distributor', 'manufacturer'):
+            return jsonify({'message': 'Invalid user role'}), 400
+        
+        granularity = request.args.get('granularity', 'day')
+        start, end = order_timeseries.default_range(granularity)
+        if request.args.get('to'):
+            end = order_timeseries.parse_date(request.args['to'], 'to')
+            start = order_timeseries.default_range(granularity, end)[0]
+        if request.args.get('from'):
+            start = order_timeseries.parse_date(request.args['from'], 'from')
+        
+        return jsonify(order_timeseries.series(user.id, user.role, granularity, start, end)), 200
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Error fetching timeseries', 'error': str(e)}), 500
+
+@analytics_bp.route('/leaderboards', methods=['GET'])
+@jwt_required()
+def get_leaderboards():
+    """Get the current user's top products by units and top partners by revenue"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        if user.role not in ('retailer', 'distributor', 'manufacturer'):
+            return jsonify({'message': 'Invalid user role'}), 400
+        
+        board = request.args.get('board')
+        if board and board not in leaderboards.BOARDS:
+            return jsonify({'message': 'Board must be products or partners'}), 400
+        
+        limit = request.args.get('limit', current_app.config['LEADERBOARD_SIZE'], type=int)
+        limit = max(1, min(limit, current_app.config['LEADERBOARD_MAX_SIZE']))
+        
+        # Partners are the retailers for distributors and manufacturers, and
+        # the distributors for retailers
+        return jsonify({
+            name: leaderboards.top(user.id, user.role, name, limit)
+            for name in leaderboards.BOARDS
+            if not board or name == board
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching leaderboards', 'error': str(e)}), 500
\ No newline at end of file
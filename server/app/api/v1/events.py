@@ -0,0 +1,89 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services import events
+import time
+import uuid
+
+events_bp = Blueprint('events', __name__)
+
+def _stream(subscription, backlog, config):
+    """Write the replayed backlog, then live events until the stream times out"""
+    deadline = time.monotonic() + config['EVENTS_STREAM_SECONDS']
+    # Live events that were also replayed from the log; anything else is new,
+    # whatever its id. The ready/reset markers only carry a resume point: an
+    # event that commits with that id must still be sent live
+    sent = {item['id'] for item in backlog if item['type'] not in ('ready', 'reset')}
+    try:
+        yield f"retry: {config['EVENTS_RETRY_MS']}\n\n"
+        for item in backlog:
+            yield events.format_event(item)
+        
+        while not subscription.closed and time.monotonic() < deadline:
+            items = subscription.get(config['EVENTS_KEEPALIVE_SECONDS'])
+            if not items:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ': keepalive\n\n'
+                continue
+            for item in items:
+                if item['id'] in sent:
+                    sent.discard(item['id'])
+                    continue
+                yield events.format_event(item)
+    finally:
+        events.broker.unsubscribe(subscription)
+
+@events_bp.route('/ticket', methods=['POST'])
+@jwt_required()
+def create_ticket():
+    """Issue a short-lived ticket for opening the current user's event stream"""
+    try:
+        return jsonify({
+            'ticket': events.issue_ticket(get_jwt_identity()),
+            'expiresIn': current_app.config['EVENTS_TICKET_SECONDS']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to issue stream ticket', 'error': str(e)}), 500
+
+@events_bp.route('/stream', methods=['GET'])
+@jwt_required(optional=True)
+def stream_events():
+    """Stream order and notification updates for the current user (SSE)"""
+    try:
+        # A bearer token in the header, or a ticket in the query string
+        identity = get_jwt_identity() or events.read_ticket(request.args.get('ticket', ''))
+        if not identity:
+            return jsonify({'message': 'Missing or expired stream ticket'}), 401
+        current_user_id = uuid.UUID(identity)
+        config = current_app.config
+        
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return jsonify({'message': 'Invalid Last-Event-ID'}), 400
+        
+        # Subscribe before reading the log so nothing falls between the two
+        subscription = events.broker.subscribe(str(current_user_id))
+        try:
+            if last_event_id is None:
+                # Fresh connection: hand out a resume point, nothing to replay
+                backlog = [{'id': events.latest_id(current_user_id), 'type': 'ready', 'data': {}}]
+            else:
+                backlog, complete = events.replay(current_user_id, last_event_id, config['EVENTS_REPLAY_LIMIT'])
+                if not complete:
+                    # Missed too much to replay: the client refetches instead
+                    backlog = [{'id': events.latest_id(current_user_id), 'type': 'reset', 'data': {}}]
+        except Exception:
+            events.broker.unsubscribe(subscription)
+            raise
+        
+        # The database session is released when this view returns; the
+        # stream itself only waits on the in-process subscription
+        response = Response(_stream(subscription, backlog, config), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to open event stream', 'error': str(e)}), 500
\ No newline at end of file
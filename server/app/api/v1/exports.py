@@ -0,0 +1,53 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models import User
+from app.services import export
+
+exports_bp = Blueprint('exports', __name__)
+
+MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+@exports_bp.route('/<entity>', methods=['GET'])
+@jwt_required()
+def export_entity(entity):
+    """Stream a full export of products, orders or inventory"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        if entity not in export.ENTITIES:
+            return jsonify({'message': 'Export must be products, orders or inventory'}), 404
+        
+        if entity == 'inventory' and user.role != 'distributor':
+            return jsonify({'message': 'Only distributors can export inventory'}), 403
+        
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in export.FORMATS:
+            return jsonify({'message': 'Format must be ndjson or csv'}), 400
+        
+        compress = request.args.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+        
+        filename = f'{entity}.{fmt}'
+        mimetype = MIMETYPES[fmt]
+        if compress:
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        
+        # Rows are read through a server-side cursor and written as they
+        # arrive, so memory stays flat however large the export is
+        chunks = export.export(entity, fmt, compress=compress, user=user)
+        response = Response(stream_with_context(chunks), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        response.headers['Cache-Control'] = 'no-store'
+        # Tell nginx to pass chunks through instead of buffering the whole body
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to export data', 'error': str(e)}), 500 
\ No newline at end of file
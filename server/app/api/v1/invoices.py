@@ -1,220 +1,75 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Order, Invoice, WhatsAppNotification
+from app.models import User, Order, Invoice, InvoiceBatch, InvoiceJob
 from app import db
 from app.utils.decorators import role_required
-from datetime import datetime
+from app.services import invoice_documents, invoice_jobs, invoice_store, order_timeseries
+from datetime import timedelta
 import uuid
-import os
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-import io
 
 invoices_bp = Blueprint('invoices', __name__)
 
-def generate_invoice_pdf(order):
-    """Generate PDF invoice for an order"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    
-    # Header
-    story.append(Paragraph("AuroMart B2B Platform", title_style))
-    story.append(Paragraph("INVOICE", title_style))
-    story.append(Spacer(1, 20))
-    
-    # Invoice details
-    story.append(Paragraph(f"Invoice Number: {order.order_number.replace('ORD', 'INV')}", styles['Normal']))
-    story.append(Paragraph(f"Date: {order.created_at.strftime('%B %d, %Y')}", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    # Customer and distributor info
-    retailer = User.query.get(order.retailer_id)
-    distributor = User.query.get(order.distributor_id)
-    
-    customer_data = [
-        ['Customer Information:', ''],
-        ['Name:', f"{retailer.firstName} {retailer.lastName}"],
-        ['Email:', retailer.email],
-        ['Phone:', retailer.phoneNumber or 'N/A'],
-        ['Business:', retailer.businessName or 'N/A'],
-    ]
-    
-    distributor_data = [
-        ['Distributor Information:', ''],
-        ['Name:', f"{distributor.firstName} {distributor.lastName}"],
-        ['Email:', distributor.email],
-        ['Phone:', distributor.phoneNumber or 'N/A'],
-        ['Business:', distributor.businessName or 'N/A'],
-    ]
-    
-    # Create two-column layout
-    info_data = []
-    for i in range(max(len(customer_data), len(distributor_data))):
-        row = []
-        if i < len(customer_data):
-            row.extend(customer_data[i])
-        else:
-            row.extend(['', ''])
-        
-        if i < len(distributor_data):
-            row.extend(distributor_data[i])
-        else:
-            row.extend(['', ''])
-        
-        info_data.append(row)
-    
-    info_table = Table(info_data, colWidths=[2*inch, 2*inch, 2*inch, 2*inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-    ]))
-    
-    story.append(info_table)
-    story.append(Spacer(1, 20))
-    
-    # Items table
-    story.append(Paragraph("Order Items", styles['Heading2']))
-    story.append(Spacer(1, 10))
-    
-    items_data = [['Product', 'SKU', 'Quantity', 'Unit Price', 'Total']]
-    for item in order.items:
-        items_data.append([
-            item.product.name,
-            item.product.sku,
-            str(item.quantity),
-            f"₹{item.unit_price:.2f}",
-            f"₹{item.total_price:.2f}"
-        ])
-    
-    # Add totals
-    subtotal = sum(item.total_price for item in order.items)
-    tax = subtotal * 0.18  # 18% GST
-    total = subtotal + tax
-    
-    items_data.extend([
-        ['', '', '', 'Subtotal:', f"₹{subtotal:.2f}"],
-        ['', '', '', 'GST (18%):', f"₹{tax:.2f}"],
-        ['', '', '', 'Total:', f"₹{total:.2f}"]
-    ])
-    
-    items_table = Table(items_data, colWidths=[2*inch, 1.5*inch, 1*inch, 1.5*inch, 1.5*inch])
-    items_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (-2, -3), (-1, -1), 'RIGHT'),  # Align totals to right
-        ('FONTNAME', (-2, -3), (-1, -1), 'Helvetica-Bold'),
-    ]))
-    
-    story.append(items_table)
-    story.append(Spacer(1, 20))
-    
-    # Notes
-    if order.notes:
-        story.append(Paragraph("Notes:", styles['Heading3']))
-        story.append(Paragraph(order.notes, styles['Normal']))
-        story.append(Spacer(1, 20))
-    
-    # Footer
-    story.append(Paragraph("Thank you for your business!", styles['Normal']))
-    story.append(Paragraph("Generated by AuroMart B2B Platform", styles['Normal']))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+def stored_pdf(invoice):
+    """Digest of the invoice's PDF in the store, rendering it only on a miss"""
+    if invoice_store.exists(invoice.pdf_sha256):
+        return invoice.pdf_sha256
+    document = invoice_documents.load([invoice.order], {invoice.order.id: invoice.invoice_number})[0]
+    invoice.pdf_sha256 = invoice_store.put(invoice_documents.render_pdf(document))
+    return invoice.pdf_sha256
 
 @invoices_bp.route('/generate/<order_id>', methods=['POST'])
 @jwt_required()
 @role_required('distributor')
 def generate_invoice(order_id):
-    """Generate invoice for an order"""
+    """Queue invoice generation for an order"""
     try:
         order = Order.query.get(order_id)
         if not order:
             return jsonify({'message': 'Order not found'}), 404
         
-        # Check if invoice already exists
-        existing_invoice = Invoice.query.filter_by(order_id=order_id).first()
-        if existing_invoice:
-            return jsonify({'message': 'Invoice already exists for this order'}), 409
-        
-        # Generate invoice number
-        invoice_number = f"INV-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
-        
-        # Create invoice record
-        invoice = Invoice(
-            invoice_number=invoice_number,
-            order_id=order_id,
-            sent_at=datetime.utcnow()
-        )
-        
-        db.session.add(invoice)
-        db.session.commit()
-        
-        # Generate PDF
-        pdf_buffer = generate_invoice_pdf(order)
-        
-        # Save PDF to file (in a real app, you'd save to cloud storage)
-        pdf_filename = f"invoice_{invoice_number}.pdf"
-        pdf_path = os.path.join("/tmp", pdf_filename)
-        
-        with open(pdf_path, 'wb') as f:
-            f.write(pdf_buffer.getvalue())
+        current_user_id = get_jwt_identity()
+        if str(order.distributor_id) != current_user_id:
+            return jsonify({'message': 'Access denied'}), 403
         
-        # Update invoice with PDF URL
-        invoice.pdf_url = f"/invoices/{pdf_filename}"
-        db.session.commit()
+        # Invoiced without a job (by a batch, or before jobs existed)
+        existing_invoice = Invoice.query.filter_by(order_id=order.id).first()
+        if existing_invoice and not InvoiceJob.query.filter_by(order_id=order.id).first():
+            return jsonify({
+                'message': 'Invoice already exists for this order',
+                'invoice': existing_invoice.to_dict()
+            }), 409
         
-        # Send WhatsApp notification to retailer
-        retailer = User.query.get(order.retailer_id)
-        message = f"📄 Invoice Generated\n"
-        message += f"Order: {order.order_number}\n"
-        message += f"Invoice: {invoice_number}\n"
-        message += f"Amount: ₹{order.total_amount}\n\n"
-        message += "Your invoice is ready for download!"
+        # Rendered by the invoice worker (flask process-invoices); repeated
+        # and concurrent requests get the order's existing job
+        job, created = invoice_jobs.enqueue(order, current_user_id)
         
-        notification = WhatsAppNotification(
-            user_id=order.retailer_id,
-            message=message,
-            type='invoice_sent',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
-        )
+        return jsonify({
+            'message': 'Invoice generation queued' if created else 'Invoice already requested',
+            'job': job.to_dict()
+        }), 200 if job.status == 'done' else 202
         
-        db.session.add(notification)
-        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to queue invoice generation', 'error': str(e)}), 500
+
+@invoices_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_invoice_job(job_id):
+    """Get the status of an invoice job, with the download link once done"""
+    try:
+        job = InvoiceJob.query.get(job_id)
+        if not job:
+            return jsonify({'message': 'Invoice job not found'}), 404
         
-        print(f"📱 Invoice Notification to Retailer {retailer.email}: {message}")
+        current_user_id = get_jwt_identity()
+        order = Order.query.get(job.order_id)
+        if current_user_id not in (str(order.retailer_id), str(order.distributor_id)):
+            return jsonify({'message': 'Invoice job not found'}), 404
         
-        return jsonify({
-            'message': 'Invoice generated successfully',
-            'invoice': invoice.to_dict()
-        }), 201
+        return jsonify(job.to_dict()), 200
         
     except Exception as e:
-        db.session.rollback()
-        return jsonify({'message': 'Failed to generate invoice', 'error': str(e)}), 500
+        return jsonify({'message': 'Failed to fetch invoice job', 'error': str(e)}), 500
 
 @invoices_bp.route('/download/<invoice_id>', methods=['GET'])
 @jwt_required()
@@ -229,25 +84,129 @@ def download_invoice(invoice_id):
         current_user_id = get_jwt_identity()
         user = User.query.get(current_user_id)
         
-        if user.role == 'retailer' and invoice.order.retailer_id != current_user_id:
+        if user.role == 'retailer' and str(invoice.order.retailer_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
-        if user.role == 'distributor' and invoice.order.distributor_id != current_user_id:
+        if user.role == 'distributor' and str(invoice.order.distributor_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
-        # Generate PDF on-the-fly
-        pdf_buffer = generate_invoice_pdf(invoice.order)
+        # Invoices rendered before the store existed (or lost from it) are
+        # rendered once here and served from disk afterwards
+        digest = invoice.pdf_sha256
+        if stored_pdf(invoice) != digest:
+            db.session.commit()
         
-        return send_file(
-            io.BytesIO(pdf_buffer.getvalue()),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"invoice_{invoice.invoice_number}.pdf"
-        )
+        return invoice_store.send(invoice.pdf_sha256, f"invoice_{invoice.invoice_number}.pdf")
         
     except Exception as e:
         return jsonify({'message': 'Failed to download invoice', 'error': str(e)}), 500
 
+@invoices_bp.route('/bundle', methods=['GET'])
+@jwt_required()
+def download_invoice_bundle():
+    """Stream a ZIP of the current user's invoices issued in a date range"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        if user.role not in ('retailer', 'distributor'):
+            return jsonify({'message': 'Only retailers and distributors have invoices'}), 403
+        
+        start = order_timeseries.parse_date(request.args.get('from'), 'from')
+        end = order_timeseries.parse_date(request.args.get('to'), 'to')
+        if start > end:
+            raise ValueError('from must not be after to')
+        if (end - start).days >= current_app.config['INVOICE_BUNDLE_MAX_DAYS']:
+            raise ValueError('Range is too long')
+        
+        party = Order.retailer_id if user.role == 'retailer' else Order.distributor_id
+        rows = Invoice.query.join(Order, Order.id == Invoice.order_id).with_entities(
+            Invoice.id, Invoice.invoice_number, Invoice.pdf_sha256, Invoice.created_at
+        ).filter(
+            party == user.id,
+            Invoice.created_at >= start,
+            Invoice.created_at < end + timedelta(days=1)
+        ).order_by(Invoice.created_at, Invoice.invoice_number).all()
+        
+        def entries():
+            rendered = False
+            for invoice_id, invoice_number, digest, created_at in rows:
+                # Invoices missing from the store are rendered as the archive
+                # reaches them
+                if not invoice_store.exists(digest):
+                    digest = stored_pdf(Invoice.query.get(invoice_id))
+                    rendered = True
+                yield f"invoice_{invoice_number}.pdf", digest, created_at
+            if rendered:
+                db.session.commit()
+        
+        # Written entry by entry straight from the stored files, so neither
+        # memory nor disk ever holds the whole archive
+        response = Response(stream_with_context(invoice_store.zip_chunks(entries())), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename=invoices_{start}_{end}.zip'
+        response.headers['Cache-Control'] = 'no-store'
+        # Tell nginx to pass chunks through instead of buffering the whole body
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to download invoices', 'error': str(e)}), 500
+
+@invoices_bp.route('/batches', methods=['POST'])
+@jwt_required()
+@role_required('distributor')
+def create_invoice_batch():
+    """Queue invoices for every uninvoiced order in a date range"""
+    try:
+        data = request.get_json() or {}
+        since = order_timeseries.parse_date(data.get('since'), 'since')
+        until = order_timeseries.parse_date(data.get('until'), 'until')
+        if since > until:
+            raise ValueError('since must not be after until')
+        
+        # Rendered by the invoice worker (flask process-invoices)
+        batch = InvoiceBatch(
+            id=uuid.uuid4(),
+            distributor_id=get_jwt_identity(),
+            since=since,
+            until=until,
+            status='queued',
+            completed=0
+        )
+        db.session.add(batch)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Invoice batch queued',
+            'batch': batch.to_dict()
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to queue invoice batch', 'error': str(e)}), 500
+
+@invoices_bp.route('/batches/<batch_id>', methods=['GET'])
+@jwt_required()
+@role_required('distributor')
+def get_invoice_batch(batch_id):
+    """Get the progress of an invoice batch"""
+    try:
+        batch = InvoiceBatch.query.get(batch_id)
+        if not batch or str(batch.distributor_id) != get_jwt_identity():
+            return jsonify({'message': 'Invoice batch not found'}), 404
+        
+        return jsonify(batch.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to fetch invoice batch', 'error': str(e)}), 500
+
 @invoices_bp.route('/<order_id>', methods=['GET'])
 @jwt_required()
 def get_invoice_by_order(order_id):
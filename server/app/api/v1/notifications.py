@@ -1,24 +1,80 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User
 from app import db
-from datetime import datetime, timedelta
+from app.services import notification_inbox
+from app.utils.pagination import get_page_size
+import uuid
 
 notifications_bp = Blueprint('notifications', __name__)
 
 @notifications_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_notifications():
-    """Get notifications for the current user"""
+    """Get a page of notifications for the current user"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = uuid.UUID(get_jwt_identity())
         
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
+        notifications, next_cursor = notification_inbox.get_page(
+            current_user_id,
+            cursor=request.args.get('cursor'),
+            limit=get_page_size()
+        )
         
-        # Return empty array - notifications are now handled by WhatsApp API
-        return jsonify([]), 200
+        return jsonify({
+            'notifications': notifications,
+            'nextCursor': next_cursor,
+            'unreadCount': notification_inbox.unread_count(current_user_id)
+        }), 200
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
-        return jsonify({'message': 'Error fetching notifications', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Error fetching notifications', 'error': str(e)}), 500
+
+@notifications_bp.route('/unread-count', methods=['GET'], strict_slashes=False)
+@jwt_required()
+def get_unread_count():
+    """Get the unread notification count for the badge"""
+    try:
+        current_user_id = uuid.UUID(get_jwt_identity())
+        return jsonify({'unreadCount': notification_inbox.unread_count(current_user_id)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching unread count', 'error': str(e)}), 500
+
+@notifications_bp.route('/<notification_id>/read', methods=['POST'], strict_slashes=False)
+@jwt_required()
+def mark_notification_read(notification_id):
+    """Mark one notification as read"""
+    try:
+        current_user_id = uuid.UUID(get_jwt_identity())
+        
+        try:
+            notification_id = uuid.UUID(notification_id)
+        except ValueError:
+            return jsonify({'message': 'Notification not found'}), 404
+        
+        notification_inbox.mark_read(current_user_id, [notification_id])
+        db.session.commit()
+        
+        return jsonify({'unreadCount': notification_inbox.unread_count(current_user_id)}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to mark notification as read', 'error': str(e)}), 500
+
+@notifications_bp.route('/read-all', methods=['POST'], strict_slashes=False)
+@jwt_required()
+def mark_all_read():
+    """Mark all of the current user's notifications as read"""
+    try:
+        current_user_id = uuid.UUID(get_jwt_identity())
+        
+        notification_inbox.mark_read(current_user_id)
+        db.session.commit()
+        
+        return jsonify({'unreadCount': 0}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to mark notifications as read', 'error': str(e)}), 500
\ No newline at end of file
@@ -1,17 +1,20 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Order, OrderItem, Product, WhatsAppNotification
+from app.models import User, Order
 from app import db
 from datetime import datetime
 import uuid
 from app.utils.decorators import role_required, validate_json
+from app.services import events, leaderboards, notifications, order_listing, order_placement, order_stats, reorder_suggestions
+from app.services.notification_templates import templates, StatusUpdate, DeliveryUpdate
+from app.utils.pagination import get_page_size
 
 orders_bp = Blueprint('orders', __name__)
 
 @orders_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_orders():
-    """Get orders for current user based on role"""
+    """Get a page of orders for current user based on role"""
     try:
         current_user_id = get_jwt_identity()
         user = User.query.get(current_user_id)
@@ -19,23 +22,19 @@ def get_orders():
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        if user.role == 'retailer':
-            # Retailers see their own orders
-            orders = Order.query.filter_by(retailer_id=current_user_id).order_by(Order.created_at.desc()).all()
-        elif user.role == 'distributor':
-            # Distributors see orders assigned to them
-            orders = Order.query.filter_by(distributor_id=current_user_id).order_by(Order.created_at.desc()).all()
-        elif user.role == 'manufacturer':
-            # Manufacturers see orders for their products
-            # This would require joining through products and order items
-            orders = Order.query.join(OrderItem).join(Product).filter(
-                Product.manufacturer_id == current_user_id
-            ).order_by(Order.created_at.desc()).all()
-        else:
-            return jsonify({'message': 'Invalid user role'}), 400
+        orders, next_cursor = order_listing.get_page(
+            user,
+            cursor=request.args.get('cursor'),
+            limit=get_page_size()
+        )
         
-        return jsonify([order.to_dict() for order in orders]), 200
+        return jsonify({
+            'orders': orders,
+            'nextCursor': next_cursor
+        }), 200
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch orders', 'error': str(e)}), 500
 
@@ -51,14 +50,14 @@ def get_order(order_id):
         if not order:
             return jsonify({'message': 'Order not found'}), 404
         
-        # Check access permissions
-        if user.role == 'retailer' and order.retailer_id != current_user_id:
+        # Check access permissions (ids are UUIDs, the JWT identity a string)
+        if user.role == 'retailer' and str(order.retailer_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
-        if user.role == 'distributor' and order.distributor_id != current_user_id:
+        if user.role == 'distributor' and str(order.distributor_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
-        return jsonify(order.to_dict()), 200
+        return jsonify(order_listing.serialize_orders([order])[0]), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to fetch order', 'error': str(e)}), 500
@@ -81,94 +80,21 @@ def create_order():
         if not distributor_id or not items:
             return jsonify({'message': 'Distributor ID and items are required'}), 400
         
-        # Verify distributor exists
-        distributor = User.query.get(distributor_id)
-        if not distributor or distributor.role != 'distributor':
-            return jsonify({'message': 'Invalid distributor'}), 400
-        
-        # Generate order number
-        order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
-        
-        # Calculate total amount
-        total_amount = 0
-        order_items = []
-        
-        for item_data in items:
-            product_id = item_data.get('productId')
-            quantity = item_data.get('quantity', 0)
-            unit_price = item_data.get('unitPrice', 0)
-            
-            if not product_id or quantity <= 0 or unit_price <= 0:
-                return jsonify({'message': 'Invalid item data'}), 400
-            
-            # Verify product exists
-            product = Product.query.get(product_id)
-            if not product:
-                return jsonify({'message': f'Product {product_id} not found'}), 404
-            
-            total_price = quantity * unit_price
-            total_amount += total_price
-            
-            order_items.append({
-                'product_id': product_id,
-                'quantity': quantity,
-                'unit_price': unit_price,
-                'total_price': total_price
-            })
-        
-        # Create order
-        new_order = Order(
-            order_number=order_number,
-            retailer_id=current_user_id,
-            distributor_id=distributor_id,
-            status='pending',
-            delivery_mode=delivery_mode,
-            total_amount=total_amount,
-            notes=notes
-        )
-        
-        db.session.add(new_order)
-        db.session.flush()  # Get the order ID
-        
-        # Create order items
-        for item_data in order_items:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item_data['product_id'],
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                total_price=item_data['total_price']
-            )
-            db.session.add(order_item)
+        # Already loaded by role_required, so this is an identity map hit
+        retailer = db.session.get(User, uuid.UUID(current_user_id))
         
-        db.session.commit()
-        
-        # Send WhatsApp alert to distributor
-        retailer = User.query.get(current_user_id)
-        message = f"🛒 New order from {retailer.firstName} {retailer.lastName}\n"
-        message += f"Order: {order_number}\n"
-        message += f"Amount: ₹{total_amount}\n"
-        message += f"Items: {len(items)} products\n"
-        message += f"Delivery Mode: {delivery_mode.title()}\n\n"
-        message += "Please acknowledge:\n"
-        message += "1️⃣ Accept\n"
-        message += "2️⃣ Reject"
-        
-        notification = WhatsAppNotification(
-            user_id=distributor_id,
-            message=message,
-            type='order_alert',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
+        order_data = order_placement.place_order(
+            retailer,
+            distributor_id,
+            items,
+            notes=notes,
+            delivery_mode=delivery_mode
         )
         
-        db.session.add(notification)
-        db.session.commit()
-        
-        print(f"📱 Order Alert to Distributor {distributor.email}: {message}")
-        
-        return jsonify(new_order.to_dict()), 201
+        return jsonify(order_data), 201
         
+    except order_placement.OrderRejected as e:
+        return jsonify({'message': e.message}), e.status
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to create order', 'error': str(e)}), 500
@@ -187,12 +113,13 @@ def update_order_status(order_id):
         if not new_status:
             return jsonify({'message': 'Status is required'}), 400
         
-        order = Order.query.get(order_id)
+        # Locked, so concurrent updates move the order's rollups one at a time
+        order = Order.query.filter_by(id=order_id).with_for_update().first()
         if not order:
             return jsonify({'message': 'Order not found'}), 404
         
-        # Verify distributor owns this order
-        if order.distributor_id != current_user_id:
+        # Verify distributor owns this order (ids are UUIDs, the JWT identity a string)
+        if str(order.distributor_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
         # Update status
@@ -203,50 +130,23 @@ def update_order_status(order_id):
             order.delivery_mode = delivery_mode
         
         order.updated_at = datetime.utcnow()
+        order_stats.status_changed(order, old_status)
+        leaderboards.status_changed(order, old_status)
+        
+        # Queue a WhatsApp notification to the retailer; quick successive changes
+        # to the same order are merged into one message with the latest status
+        message = templates.render('status_update', StatusUpdate(
+            order_number=order.order_number,
+            status=new_status
+        ))
+        notifications.enqueue(order.retailer_id, message, 'status_update',
+                              coalesce_key=f'order:{order.id}:status')
+        events.publish_order(order, 'order.updated')
         db.session.commit()
         
-        # Send WhatsApp notification to retailer
-        retailer = User.query.get(order.retailer_id)
-        status_emojis = {
-            'accepted': '✅',
-            'packed': '📦',
-            'dispatched': '🚚',
-            'delivered': '🎉',
-            'rejected': '❌'
-        }
-        
-        emoji = status_emojis.get(new_status, '📋')
-        message = f"{emoji} Order Status Update\n"
-        message += f"Order: {order.order_number}\n"
-        message += f"Status: {new_status.title()}\n"
-        
-        if new_status == 'delivered':
-            message += "\nYour order has been delivered! 🎉"
-        elif new_status == 'dispatched':
-            message += "\nYour order is on the way! 🚚"
-        elif new_status == 'packed':
-            message += "\nYour order is packed and ready! 📦"
-        elif new_status == 'accepted':
-            message += "\nYour order has been accepted! ✅"
-        elif new_status == 'rejected':
-            message += "\nYour order has been rejected. Please contact us."
-        
-        notification = WhatsAppNotification(
-            user_id=order.retailer_id,
-            message=message,
-            type='status_update',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
-        )
-        
-        db.session.add(notification)
-        db.session.commit()
-        
-        print(f"📱 Status Update to Retailer {retailer.email}: {message}")
-        
         return jsonify({
             'message': 'Order status updated successfully',
-            'order': order.to_dict()
+            'order': order_listing.serialize_orders([order])[0]
         }), 200
         
     except Exception as e:
@@ -270,48 +170,27 @@ def update_delivery_mode(order_id):
         if not order:
             return jsonify({'message': 'Order not found'}), 404
         
-        # Verify distributor owns this order
-        if order.distributor_id != current_user_id:
+        # Verify distributor owns this order (ids are UUIDs, the JWT identity a string)
+        if str(order.distributor_id) != current_user_id:
             return jsonify({'message': 'Access denied'}), 403
         
         # Update delivery mode
         order.delivery_mode = delivery_mode
         order.updated_at = datetime.utcnow()
-        db.session.commit()
         
-        # Send WhatsApp notification to retailer
-        retailer = User.query.get(order.retailer_id)
-        mode_emojis = {
-            'delivery': '🚚',
-            'pickup': '🏬'
-        }
-        
-        emoji = mode_emojis.get(delivery_mode, '📋')
-        message = f"{emoji} Delivery Mode Updated\n"
-        message += f"Order: {order.order_number}\n"
-        message += f"Mode: {delivery_mode.title()}\n"
-        
-        if delivery_mode == 'delivery':
-            message += "\nWe will deliver your order to your address."
-        elif delivery_mode == 'pickup':
-            message += "\nPlease pick up your order from our location."
-        
-        notification = WhatsAppNotification(
-            user_id=order.retailer_id,
-            message=message,
-            type='delivery_update',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
-        )
-        
-        db.session.add(notification)
+        # Queue a WhatsApp notification to the retailer with the update
+        message = templates.render('delivery_update', DeliveryUpdate(
+            order_number=order.order_number,
+            delivery_mode=delivery_mode
+        ))
+        notifications.enqueue(order.retailer_id, message, 'delivery_update',
+                              coalesce_key=f'order:{order.id}:delivery')
+        events.publish_order(order, 'order.updated')
         db.session.commit()
         
-        print(f"📱 Delivery Update to Retailer {retailer.email}: {message}")
-        
         return jsonify({
             'message': 'Delivery mode updated successfully',
-            'order': order.to_dict()
+            'order': order_listing.serialize_orders([order])[0]
         }), 200
         
     except Exception as e:
@@ -342,11 +221,7 @@ def get_order_history(partner_id):
             
         elif current_user.role == 'manufacturer' and partner.role == 'distributor':
             # Manufacturer viewing orders with a distributor
-            orders = Order.query.filter_by(
-                distributor_id=partner_id
-            ).join(OrderItem).join(Product).filter(
-                Product.manufacturer_id == current_user_id
-            ).order_by(Order.created_at.desc()).all()
+            orders, _ = order_listing.manufacturer_orders(current_user.id, distributor_id=partner.id)
             
         elif current_user.role == 'retailer' and partner.role == 'distributor':
             # Retailer viewing orders with a distributor
@@ -358,14 +233,23 @@ def get_order_history(partner_id):
         else:
             return jsonify({'message': 'Access denied'}), 403
         
-        # Convert to dict with items
-        order_data = []
-        for order in orders:
-            order_dict = order.to_dict()
-            order_dict['items'] = [item.to_dict() for item in order.items]
-            order_data.append(order_dict)
+        return jsonify(order_listing.serialize_orders(orders)), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to fetch order history', 'error': str(e)}), 500 
+
+@orders_bp.route('/suggestions', methods=['GET'])
+@jwt_required()
+@role_required('retailer')
+def get_reorder_suggestions():
+    """Get the current retailer's precomputed reorder suggestions"""
+    try:
+        current_user_id = get_jwt_identity()
         
-        return jsonify(order_data), 200
+        return jsonify(reorder_suggestions.get_for_retailer(
+            current_user_id,
+            distributor_id=request.args.get('distributorId')
+        )), 200
         
     except Exception as e:
-        return jsonify({'message': 'Failed to fetch order history', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Failed to fetch reorder suggestions', 'error': str(e)}), 500
\ No newline at end of file
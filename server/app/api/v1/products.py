@@ -1,26 +1,42 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Product, Category, Inventory, User
-from app.utils.decorators import role_required
-from sqlalchemy import or_
+from app.models import Product, Category, User
+from app.utils.decorators import roles_required
+from app.utils.pagination import get_page_size, keyset_paginate
+from app.services import distributor_catalog, product_import, product_search
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.suggest import suggest_index
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route('/', methods=['GET'])
 def get_products():
-    """Get all products"""
+    """Get a page of active products from the catalog snapshot"""
     try:
         category_id = request.args.get('categoryId')
+        cursor = request.args.get('cursor')
+        limit = get_page_size()
         
-        query = Product.query.filter_by(is_active=True)
-        
-        if category_id:
-            query = query.filter_by(category_id=category_id)
+        def build():
+            query = Product.query.filter_by(is_active=True)
+            
+            if category_id:
+                query = query.filter_by(category_id=category_id)
+            
+            products, next_cursor = keyset_paginate(
+                query, Product.created_at, Product.id,
+                cursor=cursor, limit=limit
+            )
+            return {
+                'products': [prod.to_dict() for prod in products],
+                'nextCursor': next_cursor
+            }
         
-        products = query.all()
-        return jsonify([prod.to_dict() for prod in products]), 200
+        return catalog_snapshot.respond(('products', category_id, cursor, limit), build)
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch products', 'error': str(e)}), 500
 
@@ -40,7 +56,7 @@ def get_product(product_id):
 
 @products_bp.route('/', methods=['POST'])
 @jwt_required()
-@role_required(['manufacturer', 'distributor'])
+@roles_required(['manufacturer', 'distributor'])
 def create_product():
     """Create new product (manufacturers and distributors)"""
     try:
@@ -72,12 +88,46 @@ def create_product():
         db.session.add(new_product)
         db.session.commit()
         
+        suggest_index.add(new_product)
+        
         return jsonify(new_product.to_dict()), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Failed to create product', 'error': str(e)}), 500
 
+@products_bp.route('/import', methods=['POST'])
+@jwt_required()
+@roles_required(['manufacturer', 'distributor'])
+def import_products():
+    """Bulk import products from a CSV or NDJSON upload"""
+    try:
+        current_user_id = get_jwt_identity()
+        upload = request.files.get('file')
+        
+        if upload:
+            stream = upload.stream
+            fmt = request.args.get('format') or product_import.detect_format(
+                filename=upload.filename, content_type=upload.mimetype
+            )
+        else:
+            # Raw request body, e.g. Content-Type: application/x-ndjson
+            stream = request.stream
+            fmt = request.args.get('format') or product_import.detect_format(
+                content_type=request.mimetype
+            )
+        
+        if fmt not in product_import.FORMATS:
+            return jsonify({'message': 'Format must be csv or ndjson'}), 400
+        
+        report = product_import.import_products(stream, fmt, manufacturer_id=current_user_id)
+        
+        return jsonify(report.to_dict()), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to import products', 'error': str(e)}), 500
+
 @products_bp.route('/partner/<partner_id>', methods=['GET'])
 @jwt_required()
 def get_partner_products(partner_id):
@@ -106,73 +156,87 @@ def get_partner_products(partner_id):
         if not can_view:
             return jsonify({'message': 'Access denied'}), 403
         
+        cursor = request.args.get('cursor')
+        limit = get_page_size()
+        
         # Get products from partner based on their role
         if partner.role == 'distributor':
-            # For distributors, get products from their inventory
-            inventory_items = Inventory.query.filter_by(
-                distributor_id=partner_id,
-                is_available=True
-            ).all()
-            
-            products = []
-            for item in inventory_items:
-                product = Product.query.get(item.product_id)
-                if product and product.is_active:
-                    product_dict = product.to_dict()
-                    # Add inventory information
-                    product_dict['inventoryId'] = str(item.id)
-                    product_dict['quantity'] = item.quantity
-                    product_dict['sellingPrice'] = float(item.selling_price) if item.selling_price else None
-                    products.append(product_dict)
+            # For distributors, read their materialized inventory catalog
+            items, next_cursor = distributor_catalog.get_page(partner.id, cursor=cursor, limit=limit)
+            products = [item.to_dict() for item in items]
         elif partner.role == 'retailer':
             # Retailers don't have products to sell - they only buy
-            products = []
+            products, next_cursor = [], None
         else:
             # For manufacturers, get products directly
-            products = Product.query.filter_by(
-                manufacturer_id=partner_id,
+            query = Product.query.filter_by(
+                manufacturer_id=partner.id,
                 is_active=True
-            ).all()
+            )
+            products, next_cursor = keyset_paginate(
+                query, Product.created_at, Product.id,
+                cursor=cursor, limit=limit
+            )
             products = [prod.to_dict() for prod in products]
         
-        return jsonify(products), 200
+        return jsonify({
+            'products': products,
+            'nextCursor': next_cursor
+        }), 200
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch partner products', 'error': str(e)}), 500
 
 @products_bp.route('/categories', methods=['GET'])
 def get_categories():
-    """Get all categories"""
+    """Get all categories from the catalog snapshot"""
     try:
-        categories = Category.query.all()
-        return jsonify([cat.to_dict() for cat in categories]), 200
+        def build():
+            categories = Category.query.order_by(Category.name).all()
+            return [cat.to_dict() for cat in categories]
+        
+        return catalog_snapshot.respond(('categories',), build)
         
     except Exception as e:
         return jsonify({'message': 'Failed to fetch categories', 'error': str(e)}), 500
 
 @products_bp.route('/search', methods=['GET'])
 def search_products():
-    """Search products"""
+    """Search products ranked by relevance, one page at a time"""
     try:
-        search_term = request.args.get('q', '')
+        search_term = request.args.get('q', '').strip()
         category_id = request.args.get('categoryId')
+        cursor = request.args.get('cursor')
         
-        query = Product.query.filter_by(is_active=True)
+        products, next_cursor = product_search.search(
+            search_term,
+            category_id=category_id,
+            cursor=cursor,
+            limit=get_page_size()
+        )
+        return jsonify({
+            'products': [prod.to_dict() for prod in products],
+            'nextCursor': next_cursor
+        }), 200
         
-        if search_term:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f'%{search_term}%'),
-                    Product.description.ilike(f'%{search_term}%'),
-                    Product.sku.ilike(f'%{search_term}%')
-                )
-            )
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to search products', 'error': str(e)}), 500
+
+@products_bp.route('/suggest', methods=['GET'])
+def suggest_products():
+    """Typeahead suggestions for product names and SKUs"""
+    try:
+        prefix = request.args.get('q', '').strip()
+        limit = min(request.args.get('limit', 10, type=int), 20)
         
-        if category_id:
-            query = query.filter_by(category_id=category_id)
+        if not prefix:
+            return jsonify([]), 200
         
-        products = query.all()
-        return jsonify([prod.to_dict() for prod in products]), 200
+        return jsonify(suggest_index.suggest(prefix, limit)), 200
         
     except Exception as e:
-        return jsonify({'message': 'Failed to search products', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Failed to fetch suggestions', 'error': str(e)}), 500 
\ No newline at end of file
@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Order, WhatsAppNotification
+from app.models import User, Order, Broadcast
 from app import db
-from datetime import datetime
+from app.services import broadcasts, notifications, notification_inbox
+from app.utils.decorators import role_required, validate_json
+from app.utils.pagination import get_page_size
+from app.services.notification_templates import templates, OrderAlert, StatusUpdate
 import uuid
 
 whatsapp_bp = Blueprint('whatsapp', __name__)
@@ -20,23 +23,12 @@ def send_whatsapp():
         if not user_id or not message:
             return jsonify({'message': 'User ID and message are required'}), 400
         
-        # Create notification record
-        notification = WhatsAppNotification(
-            user_id=user_id,
-            message=message,
-            type=notification_type,
-            sent_at=datetime.utcnow(),
-            is_delivered=True  # Simulated as delivered
-        )
-        
-        db.session.add(notification)
+        # Queued for the notification dispatcher, which does the actual sending
+        notification = notifications.enqueue(user_id, message, notification_type)
         db.session.commit()
         
-        # In a real app, this would integrate with WhatsApp Business API
-        print(f"📱 WhatsApp to User {user_id}: {message}")
-        
         return jsonify({
-            'message': 'WhatsApp notification sent successfully',
+            'message': 'WhatsApp notification queued successfully',
             'notification': {
                 'id': str(notification.id),
                 'message': notification.message,
@@ -52,23 +44,25 @@ def send_whatsapp():
 @whatsapp_bp.route('/notifications', methods=['GET'])
 @jwt_required()
 def get_notifications():
-    """Get WhatsApp notifications for current user"""
+    """Get a page of WhatsApp notifications for current user"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = uuid.UUID(get_jwt_identity())
         
-        notifications = WhatsAppNotification.query.filter_by(
-            user_id=current_user_id
-        ).order_by(WhatsAppNotification.created_at.desc()).limit(50).all()
+        # Same inbox as /api/notifications
+        page, next_cursor = notification_inbox.get_page(
+            current_user_id,
+            cursor=request.args.get('cursor'),
+            limit=get_page_size()
+        )
         
-        return jsonify([{
-            'id': str(n.id),
-            'message': n.message,
-            'type': n.type,
-            'sentAt': n.sent_at.isoformat() if n.sent_at else None,
-            'isDelivered': n.is_delivered,
-            'createdAt': n.created_at.isoformat() if n.created_at else None
-        } for n in notifications]), 200
+        return jsonify({
+            'notifications': page,
+            'nextCursor': next_cursor,
+            'unreadCount': notification_inbox.unread_count(current_user_id)
+        }), 200
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch notifications', 'error': str(e)}), 500
 
@@ -87,31 +81,21 @@ def send_order_alert(order_id):
         if not distributor or not retailer:
             return jsonify({'message': 'Invalid order data'}), 400
         
-        # Create WhatsApp alert message
-        message = f"🛒 New order from {retailer.firstName} {retailer.lastName}\n"
-        message += f"Order: {order.order_number}\n"
-        message += f"Amount: ₹{order.total_amount}\n"
-        message += f"Items: {len(order.items)} products\n\n"
-        message += "Please acknowledge:\n"
-        message += "1️⃣ Accept\n"
-        message += "2️⃣ Reject"
-        
-        # Send to distributor
-        notification = WhatsAppNotification(
-            user_id=order.distributor_id,
-            message=message,
-            type='order_alert',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
-        )
-        
-        db.session.add(notification)
+        # Same template as the alert sent when the order is placed
+        message = templates.render('order_alert', OrderAlert(
+            retailer_name=f'{retailer.first_name} {retailer.last_name}',
+            order_number=order.order_number,
+            total_amount=order.total_amount,
+            item_count=order.items.count(),
+            delivery_mode=order.delivery_mode or 'delivery'
+        ))
+        
+        # Queue for the distributor
+        notification = notifications.enqueue(order.distributor_id, message, 'order_alert')
         db.session.commit()
         
-        print(f"📱 Order Alert to Distributor {distributor.email}: {message}")
-        
         return jsonify({
-            'message': 'Order alert sent successfully',
+            'message': 'Order alert queued successfully',
             'notification': {
                 'id': str(notification.id),
                 'message': notification.message,
@@ -131,6 +115,9 @@ def send_status_update(order_id):
         data = request.get_json()
         new_status = data.get('status')
         
+        if not new_status:
+            return jsonify({'message': 'Status is required'}), 400
+        
         order = Order.query.get(order_id)
         if not order:
             return jsonify({'message': 'Order not found'}), 404
@@ -139,43 +126,18 @@ def send_status_update(order_id):
         if not retailer:
             return jsonify({'message': 'Invalid order data'}), 400
         
-        # Create status update message
-        status_emojis = {
-            'accepted': '✅',
-            'packed': '📦',
-            'dispatched': '🚚',
-            'delivered': '🎉',
-            'rejected': '❌'
-        }
-        
-        emoji = status_emojis.get(new_status, '📋')
-        message = f"{emoji} Order Status Update\n"
-        message += f"Order: {order.order_number}\n"
-        message += f"Status: {new_status.title()}\n"
-        
-        if new_status == 'delivered':
-            message += "\nYour order has been delivered! 🎉"
-        elif new_status == 'dispatched':
-            message += "\nYour order is on the way! 🚚"
-        elif new_status == 'packed':
-            message += "\nYour order is packed and ready! 📦"
-        
-        # Send to retailer
-        notification = WhatsAppNotification(
-            user_id=order.retailer_id,
-            message=message,
-            type='status_update',
-            sent_at=datetime.utcnow(),
-            is_delivered=True
-        )
+        message = templates.render('status_update', StatusUpdate(
+            order_number=order.order_number,
+            status=new_status
+        ))
         
-        db.session.add(notification)
+        # Queue for the retailer
+        notification = notifications.enqueue(order.retailer_id, message, 'status_update',
+                                             coalesce_key=f'order:{order.id}:status')
         db.session.commit()
         
-        print(f"📱 Status Update to Retailer {retailer.email}: {message}")
-        
         return jsonify({
-            'message': 'Status update sent successfully',
+            'message': 'Status update queued successfully',
             'notification': {
                 'id': str(notification.id),
                 'message': notification.message,
@@ -185,4 +147,71 @@ def send_status_update(order_id):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'message': 'Failed to send status update', 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'message': 'Failed to send status update', 'error': str(e)}), 500
+
+@whatsapp_bp.route('/broadcast', methods=['POST'])
+@jwt_required()
+@role_required('distributor')
+@validate_json
+def send_broadcast():
+    """Queue an announcement to all partnered retailers"""
+    try:
+        distributor = User.query.get(get_jwt_identity())
+        data = request.get_json()
+        
+        # Written out by the notification dispatcher (flask dispatch-notifications)
+        broadcast = broadcasts.create(
+            distributor,
+            kind=data.get('kind', 'general'),
+            title=data.get('title'),
+            body=data.get('body')
+        )
+        
+        return jsonify({
+            'message': 'Broadcast queued successfully',
+            'broadcast': broadcast.to_dict()
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to queue broadcast', 'error': str(e)}), 500
+
+@whatsapp_bp.route('/broadcasts/<broadcast_id>', methods=['GET'])
+@jwt_required()
+@role_required('distributor')
+def get_broadcast(broadcast_id):
+    """Get the progress of a broadcast"""
+    try:
+        broadcast = Broadcast.query.get(broadcast_id)
+        if not broadcast or str(broadcast.distributor_id) != get_jwt_identity():
+            return jsonify({'message': 'Broadcast not found'}), 404
+        
+        return jsonify(broadcast.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to fetch broadcast', 'error': str(e)}), 500
+
+@whatsapp_bp.route('/broadcasts/<broadcast_id>/retry', methods=['POST'])
+@jwt_required()
+@role_required('distributor')
+def retry_broadcast(broadcast_id):
+    """Queue a failed broadcast again, resuming after the recipients already sent"""
+    try:
+        broadcast = Broadcast.query.get(broadcast_id)
+        if not broadcast or str(broadcast.distributor_id) != get_jwt_identity():
+            return jsonify({'message': 'Broadcast not found'}), 404
+        
+        broadcast = broadcasts.retry(broadcast)
+        
+        return jsonify({
+            'message': 'Broadcast queued successfully',
+            'broadcast': broadcast.to_dict()
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to retry broadcast', 'error': str(e)}), 500
\ No newline at end of file
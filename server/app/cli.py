@@ -3,8 +3,10 @@ from flask.cli import with_appcontext
 from app import db
 from app.models import User, Category, Product, Order, OrderItem, Partnership, Favorite, WhatsAppNotification
 from datetime import datetime, timedelta
+from sqlalchemy import text
 import uuid
 import random
+import time
 
 def register_commands(app):
     """Register CLI commands"""
@@ -380,6 +382,11 @@ def register_commands(app):
         
         db.session.commit()
         
+        from app.services import leaderboards, order_manufacturers, order_stats
+        order_manufacturers.rebuild()
+        order_stats.rebuild()
+        leaderboards.reconcile()
+        
         # Create sample partnerships
         click.echo('Creating partnerships...')
         partnerships = [
@@ -484,6 +491,9 @@ def register_commands(app):
             db.session.add(notification)
         db.session.commit()
         
+        from app.services import notification_inbox
+        notification_inbox.rebuild_counters()
+        
         click.echo('Database seeded with comprehensive sample data!')
         click.echo(f'Created:')
         click.echo(f'- {len(categories)} categories')
@@ -533,4 +543,687 @@ def register_commands(app):
         if click.confirm('Are you sure you want to drop all tables?'):
             db.drop_all()
             db.create_all()
-            click.echo('Database reset!') 
\ No newline at end of file
+            click.echo('Database reset!')
+    
+    @app.cli.command()
+    @with_appcontext
+    def init_search():
+        """Add full-text and trigram search indexes to an existing database"""
+        from app.services.product_search import install_search_schema
+        install_search_schema()
+        click.echo('Product search column and indexes are in place!')
+    
+    @app.cli.command()
+    @with_appcontext
+    def rebuild_distributor_catalog():
+        """Rebuild the materialized distributor catalog from inventory"""
+        from app.services import distributor_catalog
+        distributor_catalog.rebuild()
+        click.echo('Distributor catalog rebuilt!')
+    
+    @app.cli.command()
+    @with_appcontext
+    def rebuild_order_manufacturers():
+        """Rebuild the order to manufacturer mapping from order items"""
+        from app.services import order_manufacturers
+        order_manufacturers.rebuild()
+        click.echo('Order manufacturers rebuilt!')
+    
+    @app.cli.command()
+    @with_appcontext
+    def rebuild_order_stats():
+        """Backfill the daily order rollups behind /api/analytics from all orders"""
+        from app.services import order_stats
+        
+        started = time.perf_counter()
+        order_stats.rebuild()
+        click.echo(f'Order stats rebuilt in {time.perf_counter() - started:.2f}s')
+    
+    @app.cli.command()
+    @click.option('--workers', type=int, help='Worker processes; defaults to SUGGESTION_WORKERS, 0 computes inline')
+    @with_appcontext
+    def compute_reorder_suggestions(workers):
+        """Recompute every retailer's reorder suggestions (run nightly)"""
+        from app.services import reorder_suggestions
+        
+        def progress(done, total):
+            click.echo(f'- batch {done}/{total}')
+        
+        result = reorder_suggestions.compute_all(workers=workers, progress=progress)
+        click.echo(f"{result['suggestions']} suggestions for {result['retailers']} retailers "
+                   f"in {result['seconds']:.2f}s ({result['perSecond']} retailers/s)")
+    
+    @app.cli.command()
+    @click.option('--loop', is_flag=True, help='Keep reconciling every LEADERBOARD_RECONCILE_SECONDS')
+    @with_appcontext
+    def reconcile_leaderboards(loop):
+        """Recompute the analytics leaderboards and correct entries that drifted"""
+        from app.services import leaderboards
+        
+        while True:
+            started = time.perf_counter()
+            result = leaderboards.reconcile()
+            click.echo(f"Leaderboards reconciled in {time.perf_counter() - started:.2f}s: "
+                       f"{result['entries']} entries, {result['corrected']} corrected")
+            if not loop:
+                break
+            time.sleep(app.config['LEADERBOARD_RECONCILE_SECONDS'])
+    
+    @app.cli.command()
+    @click.option('--distributor', 'distributor_email', required=True, help='Email of the distributor to invoice')
+    @click.option('--since', type=click.DateTime(['%Y-%m-%d']), required=True, help='First order day (YYYY-MM-DD)')
+    @click.option('--until', type=click.DateTime(['%Y-%m-%d']), required=True, help='Last order day (YYYY-MM-DD)')
+    @click.option('--workers', type=int, help='Render processes; defaults to INVOICE_WORKERS, 0 renders inline')
+    @with_appcontext
+    def generate_invoices(distributor_email, since, until, workers):
+        """Invoice every uninvoiced order a distributor received in a date range"""
+        from app.services import invoice_batch
+        
+        distributor = User.query.filter_by(email=distributor_email, role='distributor').first()
+        if not distributor:
+            raise click.BadParameter(f'No distributor with email {distributor_email}', param_hint='--distributor')
+        if since > until:
+            raise click.BadParameter('--since must not be after --until', param_hint='--since')
+        
+        started = time.perf_counter()
+        def progress(done, total):
+            elapsed = time.perf_counter() - started
+            click.echo(f'- {done}/{total} invoices ({done / elapsed:.1f}/sec)')
+        
+        result = invoice_batch.generate(distributor.id, since.date(), until.date(), workers=workers, progress=progress)
+        click.echo(f"{result['invoices']} invoices in {result['seconds']:.2f}s ({result['perSecond']} invoices/s)")
+    
+    @app.cli.command()
+    @click.option('--workers', type=int, help='Batch render processes; defaults to INVOICE_WORKERS, 0 renders inline')
+    @click.option('--once', is_flag=True, help='Run the queued jobs and batches once and exit')
+    @with_appcontext
+    def process_invoices(workers, once):
+        """Render invoices queued through /api/invoices/generate and /api/invoices/batches"""
+        from app.services import invoice_batch, invoice_jobs
+        
+        # Several workers can run side by side: each claims its own jobs and
+        # batches. Single invoices go first, since someone is waiting on them
+        while True:
+            jobs = invoice_jobs.claim()
+            if jobs:
+                done, failed = invoice_jobs.run(jobs)
+                click.echo(f'- {done} invoice jobs done, {failed} failed')
+                continue
+            
+            batch = invoice_batch.claim()
+            if batch is None:
+                if once:
+                    break
+                time.sleep(app.config['INVOICE_POLL_SECONDS'])
+                continue
+            
+            click.echo(f'Batch {batch.id}: {batch.since} to {batch.until}')
+            try:
+                result = invoice_batch.run(batch, workers=workers)
+            except Exception as e:
+                click.echo(f'- failed: {e}')
+                continue
+            click.echo(f"- {result['invoices']} invoices in {result['seconds']:.2f}s ({result['perSecond']} invoices/s)")
+    
+    @app.cli.command()
+    @click.argument('source', type=click.File('rb'))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension')
+    @click.option('--manufacturer', help='Email of the manufacturer that owns the products')
+    @with_appcontext
+    def import_products(source, fmt, manufacturer):
+        """Bulk import products from a CSV or NDJSON file ('-' for stdin)"""
+        from app.services import product_import
+        
+        fmt = fmt or product_import.detect_format(filename=source.name)
+        if fmt not in product_import.FORMATS:
+            raise click.UsageError('Cannot tell the format from the file name; pass --format')
+        
+        manufacturer_id = None
+        if manufacturer:
+            owner = User.query.filter_by(email=manufacturer).first()
+            if not owner:
+                raise click.BadParameter(f'No user with email {manufacturer}', param_hint='--manufacturer')
+            manufacturer_id = owner.id
+        
+        report = product_import.import_products(source, fmt, manufacturer_id=manufacturer_id).to_dict()
+        
+        click.echo(f"Received {report['received']} rows in {report['elapsedSeconds']}s "
+                   f"({report['rowsPerSecond']} rows/sec)")
+        click.echo(f"- {report['inserted']} inserted")
+        click.echo(f"- {report['updated']} updated")
+        click.echo(f"- {report['failed']} failed")
+        for error in report['errors']:
+            click.echo(f"  line {error['line']} ({error['sku']}): {error['error']}")
+        if report['errorsTruncated']:
+            click.echo('  ...')
+    
+    @app.cli.command()
+    @click.option('--provider', help='Delivery provider; defaults to NOTIFICATION_PROVIDER')
+    @click.option('--batch-size', type=int, help='Rows claimed per batch; defaults to NOTIFICATION_BATCH_SIZE')
+    @click.option('--once', is_flag=True, help='Drain the outbox once and exit')
+    @with_appcontext
+    def dispatch_notifications(provider, batch_size, once):
+        """Deliver queued WhatsApp notifications from the outbox, and write out queued broadcasts"""
+        from app.services import broadcasts, notification_dispatch
+        
+        sender = notification_dispatch.get_provider(provider)
+        poll_seconds = app.config['NOTIFICATION_POLL_SECONDS']
+        click.echo(f'Dispatching notifications via {provider or app.config["NOTIFICATION_PROVIDER"]}...')
+        
+        digest_seconds = app.config['NOTIFICATION_DIGEST_SECONDS']
+        next_digest = time.monotonic()
+        
+        # Several workers can run side by side: each claims its own rows and
+        # broadcasts
+        while True:
+            broadcast = broadcasts.claim()
+            if broadcast is not None:
+                click.echo(f'Broadcast {broadcast.id}: {broadcast.title}')
+                try:
+                    result = broadcasts.run(broadcast)
+                except Exception as e:
+                    click.echo(f'- failed: {e}')
+                else:
+                    click.echo(f"- {result['recipients']} recipients ({result['perSecond']:,}/sec)")
+                continue
+            
+            if digest_seconds > 0 and time.monotonic() >= next_digest:
+                digests, digested = notification_dispatch.build_digests(batch_size)
+                if digests:
+                    click.echo(f'- {digests} digests from {digested} held updates')
+                if digested:
+                    continue
+                next_digest = time.monotonic() + digest_seconds
+            
+            delivered, failed = notification_dispatch.dispatch_batch(sender, batch_size)
+            if delivered or failed:
+                click.echo(f'- {delivered} delivered, {failed} failed')
+                continue
+            if once:
+                break
+            time.sleep(poll_seconds)
+    
+    @app.cli.command()
+    @with_appcontext
+    def rebuild_notification_counters():
+        """Recount every user's unread notifications"""
+        from app.services import notification_inbox
+        notification_inbox.rebuild_counters()
+        click.echo('Notification counters rebuilt!')
+    
+    @app.cli.command()
+    @click.option('--hours', type=int, help='Defaults to EVENTS_RETENTION_HOURS')
+    @with_appcontext
+    def prune_events(hours):
+        """Delete live-update events older than the resume window"""
+        from app.services import events
+        deleted = events.prune(hours or app.config['EVENTS_RETENTION_HOURS'])
+        click.echo(f'Pruned {deleted} events')
+    
+    @app.cli.command()
+    @with_appcontext
+    def notification_stats():
+        """Show outbox counters and the sends saved by coalescing and digests"""
+        from app.services import notification_dispatch
+        
+        stats = notification_dispatch.outbox_stats()
+        click.echo(f"Outbox: {stats['pending']} pending, {stats['held']} held, {stats['sending']} sending, "
+                   f"{stats['sent']} sent, {stats['failed']} failed")
+        click.echo(f"Coalesced updates: {stats['coalesced']}")
+        click.echo(f"Digested updates: {stats['digested']} in {stats['digests']} digests")
+        click.echo(f"Sends saved: {stats['sendsSaved']}")
+    
+    @app.cli.command()
+    @click.argument('entity', type=click.Choice(['products', 'orders', 'inventory']))
+    @click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson')
+    @click.option('--gzip', 'compress', is_flag=True, help='Gzip the output on the fly')
+    @click.option('--output', '-o', type=click.File('wb'), default='-', help='Defaults to stdout')
+    @with_appcontext
+    def export_data(entity, fmt, compress, output):
+        """Stream a full products, orders or inventory export"""
+        from app.services import export
+    
+        started = time.perf_counter()
+        written = 0
+        for chunk in export.export(entity, fmt, compress=compress):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+    
+        elapsed = time.perf_counter() - started
+        click.echo(f'Exported {entity}: {written} bytes in {elapsed:.2f}s', err=True)
+    
+    @app.cli.command()
+    @click.option('--products', 'product_count', default=1000000, help='Synthetic products to seed')
+    @click.option('--runs', default=20, help='Timed runs per search term')
+    @with_appcontext
+    def bench_search(product_count, runs):
+        """Benchmark ranked full-text search against the ILIKE scan"""
+        from app.services import product_search
+        from app.services.catalog_snapshot import bump_version
+        
+        # Seeded products are only active while the benchmark runs; later runs reuse them
+        bench_skus = "sku LIKE 'BENCH-%' AND sku NOT LIKE 'BENCH-ORDER-%'"
+        seeded = db.session.execute(
+            text(f"SELECT count(*) FROM products WHERE {bench_skus}")
+        ).scalar()
+        db.session.execute(text(
+            f"UPDATE products SET is_active = true, updated_at = now() WHERE {bench_skus} AND NOT is_active"
+        ))
+        bump_version()
+        db.session.commit()
+        
+        if seeded < product_count:
+            click.echo(f'Seeding {product_count - seeded} benchmark products...')
+            db.session.execute(text("""
+                INSERT INTO products (id, name, description, sku, base_price, is_active, created_at, updated_at)
+                SELECT gen_random_uuid(),
+                       w.words[1 + i % 20] || ' ' || w.words[1 + (i / 20) % 20] || ' ' || i,
+                       'Bulk ' || w.words[1 + (i / 400) % 20] || ' supplied by the case',
+                       'BENCH-' || lpad(i::text, 8, '0'),
+                       (i % 5000) + 0.99,
+                       true,
+                       now() - (i || ' seconds')::interval,
+                       now()
+                FROM generate_series(:start, :stop) AS i,
+                     (SELECT ARRAY['steel', 'cotton', 'ceramic', 'walnut', 'organic', 'wireless',
+                                   'copper', 'leather', 'bamboo', 'granite', 'silicone', 'linen',
+                                   'carbon', 'marble', 'nylon', 'glass', 'oak', 'rubber',
+                                   'velvet', 'brass'] AS words) AS w
+            """), {'start': seeded + 1, 'stop': product_count})
+            bump_version()
+            db.session.commit()
+            db.session.execute(text('ANALYZE products'))
+            db.session.commit()
+        
+        # Common words, a two-word query, a typo and a SKU fragment
+        terms = ['walnut', 'copper wireless', 'cerammic', 'BENCH-0004']
+        
+        def timed(search_fn):
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                search_fn()
+                samples.append((time.perf_counter() - started) * 1000)
+                db.session.rollback()
+            samples.sort()
+            return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+        
+        click.echo(f'{"term":<18}{"ilike p50":>12}{"ilike p95":>12}{"ranked p50":>12}{"ranked p95":>12}')
+        try:
+            for term in terms:
+                ilike_p50, ilike_p95 = timed(lambda: product_search.ilike_search(term))
+                ranked_p50, ranked_p95 = timed(lambda: product_search.search(term))
+                click.echo(
+                    f'{term:<18}{ilike_p50:>10.1f}ms{ilike_p95:>10.1f}ms'
+                    f'{ranked_p50:>10.1f}ms{ranked_p95:>10.1f}ms'
+                )
+        finally:
+            # Take the benchmark products out of the catalog again
+            db.session.rollback()
+            db.session.execute(text(
+                f"UPDATE products SET is_active = false, updated_at = now() WHERE {bench_skus} AND is_active"
+            ))
+            bump_version()
+            db.session.commit()
+    
+    @app.cli.command()
+    @click.option('--runs', default=100, help='Orders placed per order size')
+    @with_appcontext
+    def bench_orders(runs):
+        """Benchmark order creation: queries and latency for 1, 50 and 500 lines"""
+        from flask_jwt_extended import create_access_token
+        from sqlalchemy import event
+        from app.models import (
+            Product, OrderDailyStat, OrderStatTotal, LeaderboardEntry, NotificationCounter, UserEvent
+        )
+        from app.services import order_stats
+        from app.services.catalog_snapshot import bump_version
+        
+        def bench_user(email, role):
+            user = User.query.filter_by(email=email).first()
+            if not user:
+                user = User(email=email, role=role, first_name='Bench', last_name=role.title(), password=str(uuid.uuid4()))
+                db.session.add(user)
+                db.session.commit()
+            return user
+        
+        retailer = bench_user('bench-retailer@auromart.local', 'retailer')
+        distributor = bench_user('bench-distributor@auromart.local', 'distributor')
+        
+        # The products are only active while the benchmark runs; later runs reuse them
+        db.session.execute(text("""
+            INSERT INTO products (id, name, sku, base_price, is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), 'Bench order product ' || i, 'BENCH-ORDER-' || lpad(i::text, 4, '0'),
+                   10.00, true, now(), now()
+            FROM generate_series(1, 500) AS i
+            ON CONFLICT (sku) DO UPDATE SET is_active = true, updated_at = now()
+            WHERE NOT products.is_active
+        """))
+        bump_version()
+        db.session.commit()
+        products = Product.query.filter(Product.sku.like('BENCH-ORDER-%')).limit(500).all()
+        product_ids = [str(product.id) for product in products]
+        
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(retailer.id))}'}
+        
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        
+        click.echo(f'{"lines":>6}{"queries":>10}{"p50":>12}{"p99":>12}')
+        try:
+            for line_count in (1, 50, 500):
+                payload = {
+                    'distributorId': str(distributor.id),
+                    'items': [
+                        {'productId': product_id, 'quantity': 2, 'unitPrice': 10}
+                        for product_id in product_ids[:line_count]
+                    ]
+                }
+                samples = []
+                for _ in range(runs):
+                    statements.clear()
+                    started = time.perf_counter()
+                    response = client.post('/api/orders/', json=payload, headers=headers)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 201:
+                        raise click.ClickException(f'Order creation failed: {response.get_json()}')
+                samples.sort()
+                p50 = samples[len(samples) // 2]
+                p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+                click.echo(f'{line_count:>6}{len(statements):>10}{p50:>10.1f}ms{p99:>10.1f}ms')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+            
+            # Drop the benchmark orders and everything they wrote, and take the
+            # products out of the catalog; the users and products are reused
+            db.session.rollback()
+            user_ids = [retailer.id, distributor.id]
+            order_ids = db.session.query(Order.id).filter_by(retailer_id=retailer.id)
+            OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+            Order.query.filter_by(retailer_id=retailer.id).delete(synchronize_session=False)
+            WhatsAppNotification.query.filter(WhatsAppNotification.user_id.in_(user_ids)).delete(synchronize_session=False)
+            NotificationCounter.query.filter(NotificationCounter.user_id.in_(user_ids)).delete(synchronize_session=False)
+            UserEvent.query.filter(UserEvent.user_id.in_(user_ids)).delete(synchronize_session=False)
+            OrderDailyStat.query.filter(OrderDailyStat.user_id.in_(user_ids)).delete(synchronize_session=False)
+            OrderStatTotal.query.filter(OrderStatTotal.user_id.in_(user_ids)).delete(synchronize_session=False)
+            LeaderboardEntry.query.filter(LeaderboardEntry.owner_id.in_(user_ids)).delete(synchronize_session=False)
+            order_stats.bump_version()
+            db.session.execute(text(
+                "UPDATE products SET is_active = false, updated_at = now() WHERE sku LIKE 'BENCH-ORDER-%' AND is_active"
+            ))
+            bump_version()
+            db.session.commit()
+    
+    @app.cli.command()
+    @click.option('--count', default=100000, help='Messages rendered per run')
+    @with_appcontext
+    def bench_templates(count):
+        """Benchmark notification template rendering against string concatenation"""
+        from decimal import Decimal
+        from app.services.notification_templates import templates, StatusUpdate, OrderAlert
+        
+        statuses = ['accepted', 'packed', 'dispatched', 'delivered', 'rejected', 'on_hold']
+        status_contexts = [
+            StatusUpdate(order_number=f'ORD-20240101-{i:08X}', status=statuses[i % len(statuses)])
+            for i in range(count)
+        ]
+        alert_contexts = [
+            OrderAlert(
+                retailer_name='Rajesh Kumar',
+                order_number=f'ORD-20240101-{i:08X}',
+                total_amount=Decimal(i % 100000) / 100,
+                item_count=i % 50 + 1,
+                delivery_mode='pickup' if i % 3 else 'delivery'
+            )
+            for i in range(count)
+        ]
+        
+        def concatenated(context):
+            # The hand-built messages the templates replaced
+            status_emojis = {'accepted': '✅', 'packed': '📦', 'dispatched': '🚚', 'delivered': '🎉', 'rejected': '❌'}
+            emoji = status_emojis.get(context.status, '📋')
+            message = f"{emoji} Order Status Update\n"
+            message += f"Order: {context.order_number}\n"
+            message += f"Status: {context.status.title()}\n"
+            if context.status == 'delivered':
+                message += "\nYour order has been delivered! 🎉"
+            elif context.status == 'dispatched':
+                message += "\nYour order is on the way! 🚚"
+            elif context.status == 'packed':
+                message += "\nYour order is packed and ready! 📦"
+            elif context.status == 'accepted':
+                message += "\nYour order has been accepted! ✅"
+            elif context.status == 'rejected':
+                message += "\nYour order has been rejected. Please contact us."
+            return message
+        
+        def timed(label, render):
+            started = time.perf_counter()
+            messages = render()
+            elapsed = time.perf_counter() - started
+            click.echo(f'{label:<34}{elapsed * 1000:>10.1f}ms{int(len(messages) / elapsed):>14,}/sec')
+            return messages
+        
+        click.echo(f'Rendering {count} messages')
+        expected = timed('status_update, concatenation', lambda: [concatenated(c) for c in status_contexts])
+        rendered = timed('status_update, render()', lambda: [templates.render('status_update', c) for c in status_contexts])
+        batched = timed('status_update, render_many()', lambda: templates.render_many('status_update', status_contexts))
+        timed('order_alert, render_many()', lambda: templates.render_many('order_alert', alert_contexts))
+        
+        if not expected == rendered == batched:
+            raise click.ClickException('Templates do not match the concatenated messages')
+    
+    @app.cli.command()
+    @click.option('--lines', default='1,10,100,1000', help='Comma-separated line counts to render')
+    @click.option('--runs', default=5, help='Timed renders per line count')
+    @with_appcontext
+    def bench_invoices(lines, runs):
+        """Benchmark invoice PDF rendering: ms per invoice and page, and peak memory"""
+        import re
+        import tracemalloc
+        from decimal import Decimal
+        from app.services.invoice_documents import (
+            InvoiceDocument, InvoiceLine, InvoiceParty, InvoiceRenderer, renderer
+        )
+        
+        try:
+            line_counts = [int(count) for count in lines.split(',')]
+        except ValueError:
+            raise click.BadParameter('Expected comma-separated integers', param_hint='--lines')
+        
+        party = InvoiceParty(name='Rajesh Kumar', email='rajesh@example.com', phone='+919876543210', business='Kumar Traders')
+        def document(line_count):
+            return InvoiceDocument(
+                order_id=uuid.uuid4(),
+                invoice_number='INV-20240101-0000BEEF',
+                order_number='ORD-20240101-0000BEEF',
+                created_at=datetime(2024, 1, 1),
+                customer=party,
+                distributor=party,
+                lines=tuple(
+                    InvoiceLine(f'Product {i}', f'SKU-{i:06d}', i % 12 + 1, Decimal('149.50'), Decimal('149.50') * (i % 12 + 1))
+                    for i in range(line_count)
+                ),
+                notes='Deliver before noon'
+            )
+        
+        def timed(render, invoice):
+            started = time.perf_counter()
+            for _ in range(runs):
+                data = render(invoice)
+            return (time.perf_counter() - started) / runs * 1000, data
+        
+        click.echo(f"{'lines':>6}{'pages':>7}{'ms/invoice':>12}{'ms/page':>10}{'per-call ms':>13}{'peak KiB':>10}{'KiB':>8}")
+        for line_count in line_counts:
+            invoice = document(line_count)
+            renderer.render(invoice)  # warm up fonts and caches
+            shared_ms, data = timed(renderer.render, invoice)
+            # A renderer built for every invoice: styles and templates rebuilt per call
+            fresh_ms, fresh_data = timed(lambda invoice: InvoiceRenderer().render(invoice), invoice)
+            if fresh_data != data:
+                raise click.ClickException('A shared renderer and a fresh one rendered different PDFs')
+            
+            # Measured apart from the timings, which tracing would slow down
+            tracemalloc.start()
+            renderer.render(invoice)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            
+            pages = len(re.findall(rb'/Type /Page\b(?!s)', data))
+            click.echo(f'{line_count:>6}{pages:>7}{shared_ms:>12.1f}{shared_ms / pages:>10.2f}'
+                       f'{fresh_ms:>13.1f}{peak / 1024:>10,.0f}{len(data) / 1024:>8,.0f}')
+
+    
+    @app.cli.command()
+    @click.argument('distributor_email')
+    @click.option('--kind', type=click.Choice(['general', 'price_change', 'stock']), default='general')
+    @click.option('--title', required=True)
+    @click.option('--body', required=True)
+    @with_appcontext
+    def broadcast(distributor_email, kind, title, body):
+        """Send an announcement to all of a distributor's partnered retailers"""
+        from app.services import broadcasts
+        
+        distributor = User.query.filter_by(email=distributor_email, role='distributor').first()
+        if not distributor:
+            raise click.ClickException(f'No distributor with email {distributor_email}')
+        
+        started = time.perf_counter()
+        def report(sent, total):
+            elapsed = time.perf_counter() - started
+            click.echo(f'- {sent}/{total} queued ({int(sent / elapsed):,}/sec)')
+        
+        # Written out here rather than by a dispatcher; a failure leaves a
+        # failed broadcast that a retry resumes
+        broadcast = broadcasts.create(distributor, kind, title, body, queue=False)
+        summary = broadcasts.run(broadcast, progress=report)
+        click.echo(f"Broadcast {broadcast.id} to {summary['recipients']} retailers in {summary['seconds']}s "
+                   f"({summary['perSecond']:,}/sec)")
+    
+    @app.cli.command()
+    @click.option('--recipients', 'recipient_count', default=10000, help='Partnered retailers to seed')
+    @click.option('--baseline', default=500, help='Recipients sent one commit at a time for comparison')
+    @with_appcontext
+    def bench_broadcast(recipient_count, baseline):
+        """Benchmark a broadcast against one enqueue and commit per recipient"""
+        from app.models import Broadcast, NotificationOutbox, NotificationCounter, UserEvent
+        from app.services import broadcasts, notifications
+        
+        distributor = User.query.filter_by(email='bench-broadcaster@auromart.local').first()
+        if not distributor:
+            distributor = User(email='bench-broadcaster@auromart.local', role='distributor',
+                               first_name='Bench', last_name='Distributor', password=str(uuid.uuid4()))
+            db.session.add(distributor)
+            db.session.commit()
+        
+        seeded = db.session.execute(
+            text("SELECT count(*) FROM users WHERE email LIKE 'bench-broadcast-%@auromart.local'")
+        ).scalar()
+        if seeded < recipient_count:
+            click.echo(f'Seeding {recipient_count - seeded} retailers...')
+            db.session.execute(text("""
+                INSERT INTO users (id, email, password_hash, first_name, last_name, role, is_active, created_at, updated_at)
+                SELECT gen_random_uuid(), 'bench-broadcast-' || i || '@auromart.local', 'x',
+                       'Bench', 'Retailer ' || i, 'retailer', true, now(), now()
+                FROM generate_series(:start, :stop) AS i
+            """), {'start': seeded + 1, 'stop': recipient_count})
+            db.session.execute(text("""
+                INSERT INTO partnerships (id, requester_id, partner_id, status, partnership_type, created_at, updated_at)
+                SELECT gen_random_uuid(), u.id, :distributor_id, 'approved', 'retailer_distributor', now(), now()
+                FROM users u
+                WHERE u.email LIKE 'bench-broadcast-%@auromart.local'
+                  AND NOT EXISTS (SELECT 1 FROM partnerships p WHERE p.requester_id = u.id)
+            """), {'distributor_id': distributor.id})
+            db.session.commit()
+        
+        def cleanup():
+            db.session.rollback()
+            notification_ids = db.session.query(WhatsAppNotification.id).filter(
+                WhatsAppNotification.type.in_(['announcement', 'general']),
+                WhatsAppNotification.user_id.in_(broadcasts.recipients(distributor.id))
+            )
+            NotificationOutbox.query.filter(NotificationOutbox.notification_id.in_(notification_ids)).delete(synchronize_session=False)
+            WhatsAppNotification.query.filter(WhatsAppNotification.id.in_(notification_ids)).delete(synchronize_session=False)
+            UserEvent.query.filter(UserEvent.user_id.in_(broadcasts.recipients(distributor.id))).delete(synchronize_session=False)
+            NotificationCounter.query.filter(NotificationCounter.user_id.in_(broadcasts.recipients(distributor.id))).delete(synchronize_session=False)
+            Broadcast.query.filter_by(distributor_id=distributor.id).delete(synchronize_session=False)
+            db.session.commit()
+        
+        try:
+            user_ids = broadcasts.recipients(distributor.id)[:baseline]
+            started = time.perf_counter()
+            for user_id in user_ids:
+                notifications.enqueue(user_id, 'Bench announcement', 'general')
+                db.session.commit()
+            elapsed = time.perf_counter() - started
+            click.echo(f'{"one commit per recipient":<28}{len(user_ids):>8}{elapsed:>9.2f}s{int(len(user_ids) / elapsed):>10,}/sec')
+            
+            started = time.perf_counter()
+            def report(sent, total):
+                click.echo(f'  {sent}/{total} queued ({int(sent / (time.perf_counter() - started)):,}/sec)')
+            broadcast = broadcasts.create(distributor, 'general', 'Bench', 'Bench announcement', queue=False)
+            summary = broadcasts.run(broadcast, progress=report)
+            click.echo(f'{"broadcast":<28}{summary["recipients"]:>8}{summary["seconds"]:>9.2f}s{summary["perSecond"]:>10,}/sec')
+        finally:
+            cleanup()
+    
+    @app.cli.command()
+    @click.option('--years', default=5, help='Years of daily history to seed')
+    @click.option('--runs', default=20, help='Timed requests per granularity')
+    @with_appcontext
+    def bench_timeseries(years, runs):
+        """Benchmark /api/analytics/timeseries over years of history, cold and cached"""
+        from flask_jwt_extended import create_access_token
+        from app.models import OrderDailyStat
+        from app.services import order_stats, order_timeseries
+        
+        distributor = User.query.filter_by(email='bench-timeseries@auromart.local').first()
+        if not distributor:
+            distributor = User(email='bench-timeseries@auromart.local', role='distributor',
+                               first_name='Bench', last_name='Distributor', password=str(uuid.uuid4()))
+            db.session.add(distributor)
+            db.session.commit()
+        
+        # Synthetic rollup rows: every day, five statuses
+        OrderDailyStat.query.filter_by(user_id=distributor.id).delete(synchronize_session=False)
+        db.session.execute(text("""
+            INSERT INTO order_daily_stats (user_id, role, day, status, order_count, revenue, item_count)
+            SELECT :user_id, 'distributor', day::date, status, 1 + (random() * 20)::int,
+                   round((random() * 50000)::numeric, 2), (random() * 400)::int
+            FROM generate_series(current_date - make_interval(years => :years), current_date, interval '1 day') AS day,
+                 unnest(ARRAY['pending', 'accepted', 'dispatched', 'delivered', 'rejected']) AS status
+        """), {'user_id': distributor.id, 'years': years})
+        order_stats.bump_version()
+        db.session.commit()
+        
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(distributor.id))}'}
+        start = (datetime.utcnow() - timedelta(days=365 * years)).date().isoformat()
+        
+        click.echo(f'{"granularity":<12}{"buckets":>8}{"cold":>10}{"p50":>10}{"p99":>10}')
+        try:
+            for granularity in order_timeseries.GRANULARITIES:
+                url = f'/api/analytics/timeseries?granularity={granularity}&from={start}'
+                samples = []
+                for run in range(runs + 1):
+                    if run == 0:
+                        order_timeseries.cache.clear()
+                    started = time.perf_counter()
+                    response = client.get(url, headers=headers)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        raise click.ClickException(f'Timeseries failed: {response.get_json()}')
+                cold = samples.pop(0)
+                samples.sort()
+                p50 = samples[len(samples) // 2]
+                p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+                buckets = len(response.get_json()['buckets'])
+                click.echo(f'{granularity:<12}{buckets:>8}{cold:>8.1f}ms{p50:>8.1f}ms{p99:>8.1f}ms')
+        finally:
+            OrderDailyStat.query.filter_by(user_id=distributor.id).delete(synchronize_session=False)
+            order_stats.bump_version()
+            db.session.commit()
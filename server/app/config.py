@@ -21,6 +21,94 @@ class Config:
     
     # Pagination
     ITEMS_PER_PAGE = 20
+    MAX_ITEMS_PER_PAGE = 100
+    
+    # Product typeahead index
+    SUGGEST_REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS', 30))
+    SUGGEST_REBUILD_SECONDS = int(os.environ.get('SUGGEST_REBUILD_SECONDS', 3600))
+    SUGGEST_SYNC_OVERLAP_SECONDS = int(os.environ.get('SUGGEST_SYNC_OVERLAP_SECONDS', 600))
+    SUGGEST_POPULAR_TERMS = 5000
+    
+    # Public catalog snapshot (pre-serialized responses per catalog version)
+    CATALOG_SNAPSHOT_MAX_ENTRIES = int(os.environ.get('CATALOG_SNAPSHOT_MAX_ENTRIES', 1000))
+    
+    # Bulk product import
+    IMPORT_BATCH_SIZE = 10000
+    IMPORT_MAX_ERRORS = 1000
+    
+    # Streaming exports (rows fetched per server-side cursor round trip)
+    EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', 2000))
+    
+    # Analytics time series (finished buckets are cached in memory; a bucket
+    # is only cached once the grace period after it ends has passed)
+    TIMESERIES_MAX_BUCKETS = 4000
+    TIMESERIES_CACHE_MAX_ENTRIES = int(os.environ.get('TIMESERIES_CACHE_MAX_ENTRIES', 200000))
+    TIMESERIES_CACHE_GRACE_SECONDS = int(os.environ.get('TIMESERIES_CACHE_GRACE_SECONDS', 3600))
+    
+    # Analytics leaderboards (orders in the excluded statuses do not count)
+    LEADERBOARD_SIZE = 20
+    LEADERBOARD_MAX_SIZE = 100
+    LEADERBOARD_EXCLUDED_STATUSES = ('rejected', 'cancelled')
+    LEADERBOARD_RECONCILE_SECONDS = int(os.environ.get('LEADERBOARD_RECONCILE_SECONDS', 3600))
+    LEADERBOARD_RECONCILE_BATCH_SIZE = 1000
+    
+    # Reorder suggestions (nightly batch: flask compute-reorder-suggestions)
+    SUGGESTION_LOOKBACK_DAYS = 365
+    SUGGESTION_WINDOW = 5  # most recent reorder intervals in the moving average
+    SUGGESTION_MIN_ORDERS = 3
+    SUGGESTION_MAX_PER_RETAILER = 100
+    SUGGESTION_BATCH_SIZE = 500  # retailers per worker task
+    SUGGESTION_WORKERS = int(os.environ.get('SUGGESTION_WORKERS', os.cpu_count() or 1))
+    
+    # Invoice PDF store (content-addressed by SHA-256). Set
+    # INVOICE_ACCEL_REDIRECT_PREFIX to an nginx `internal` location aliased to
+    # the same directory to hand downloads to nginx
+    INVOICE_STORAGE_DIR = os.environ.get('INVOICE_STORAGE_DIR', '/var/lib/auromart/invoices')
+    INVOICE_ACCEL_REDIRECT_PREFIX = os.environ.get('INVOICE_ACCEL_REDIRECT_PREFIX')
+    
+    # Batch invoice generation (flask generate-invoices, /api/invoices/batches)
+    INVOICE_WORKERS = int(os.environ.get('INVOICE_WORKERS', os.cpu_count() or 1))
+    INVOICE_CHUNK_SIZE = 25  # orders prefetched, rendered and committed together
+    INVOICE_POLL_SECONDS = float(os.environ.get('INVOICE_POLL_SECONDS', 2))
+    
+    # Single-invoice jobs (POST /api/invoices/generate/<order_id>)
+    INVOICE_JOB_BATCH_SIZE = 10  # jobs claimed and rendered per worker round
+    INVOICE_JOB_TIMEOUT_SECONDS = 300  # running jobs older than this are claimed again
+    INVOICE_BUNDLE_MAX_DAYS = 366  # longest range /api/invoices/bundle accepts
+    
+    # Notification outbox dispatcher
+    NOTIFICATION_PROVIDER = os.environ.get('NOTIFICATION_PROVIDER', 'stub')
+    NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 100))
+    NOTIFICATION_POLL_SECONDS = float(os.environ.get('NOTIFICATION_POLL_SECONDS', 2))
+    NOTIFICATION_MAX_ATTEMPTS = 5
+    NOTIFICATION_RETRY_SECONDS = 30
+    NOTIFICATION_LEASE_SECONDS = 60  # a claimed send is taken over by another worker after this
+    # Updates for the same order and recipient within this window go out as one message (0 disables)
+    NOTIFICATION_COALESCE_SECONDS = int(os.environ.get('NOTIFICATION_COALESCE_SECONDS', 120))
+    # When set, retailer order updates are held and sent as one digest per retailer this often
+    NOTIFICATION_DIGEST_SECONDS = int(os.environ.get('NOTIFICATION_DIGEST_SECONDS', 0))
+    NOTIFICATION_DIGEST_TYPES = ('status_update', 'delivery_update')
+    
+    # Distributor broadcasts: recipients written per transaction; a running
+    # broadcast with no chunk written for this long is taken over
+    BROADCAST_CHUNK_SIZE = int(os.environ.get('BROADCAST_CHUNK_SIZE', 1000))
+    BROADCAST_STALE_SECONDS = int(os.environ.get('BROADCAST_STALE_SECONDS', 300))
+    
+    # WhatsApp Cloud API (NOTIFICATION_PROVIDER=whatsapp_cloud)
+    WHATSAPP_API_URL = os.environ.get('WHATSAPP_API_URL', 'https://graph.facebook.com/v17.0')
+    WHATSAPP_PHONE_NUMBER_ID = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
+    WHATSAPP_ACCESS_TOKEN = os.environ.get('WHATSAPP_ACCESS_TOKEN')
+    
+    # Live updates over SSE: 'postgres' fans out with LISTEN/NOTIFY across
+    # processes, 'local' only within one process (single node)
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'postgres')
+    EVENTS_KEEPALIVE_SECONDS = 15
+    EVENTS_STREAM_SECONDS = int(os.environ.get('EVENTS_STREAM_SECONDS', 300))  # then the client reconnects
+    EVENTS_RETRY_MS = 3000
+    EVENTS_TICKET_SECONDS = 60  # stream tickets (?ticket=) only open a connection
+    EVENTS_REPLAY_LIMIT = 500
+    EVENTS_MAX_PENDING = 1000
+    EVENTS_RETENTION_HOURS = int(os.environ.get('EVENTS_RETENTION_HOURS', 24))
     
     # Rate limiting
     RATELIMIT_DEFAULT = "200 per day;50 per hour"
@@ -3,11 +3,23 @@ from .product import Product
 from .category import Category
 from .inventory import Inventory
 from .order import Order, OrderItem
+from .order_manufacturer import OrderManufacturer
+from .order_stats import OrderDailyStat, OrderStatTotal, OrderStatsVersion
+from .leaderboard import LeaderboardEntry
+from .reorder_suggestion import ReorderSuggestionList
 from .partnership import Partnership
 from .favorite import Favorite
 from .search_history import SearchHistory
 from .whatsapp import WhatsAppNotification
+from .notification_outbox import NotificationOutbox
+from .notification_counter import NotificationCounter
+from .user_event import UserEvent
 from .invoice import Invoice
+from .invoice_batch import InvoiceBatch
+from .invoice_job import InvoiceJob
+from .broadcast import Broadcast
+from .distributor_catalog import DistributorCatalogItem
+from .catalog_version import CatalogVersion
 
 __all__ = [
     'User',
@@ -16,9 +28,23 @@ __all__ = [
     'Inventory',
     'Order',
     'OrderItem',
+    'OrderManufacturer',
+    'OrderDailyStat',
+    'OrderStatTotal',
+    'OrderStatsVersion',
+    'LeaderboardEntry',
+    'ReorderSuggestionList',
     'Partnership',
     'Favorite',
     'SearchHistory',
     'WhatsAppNotification',
-    'Invoice'
+    'NotificationOutbox',
+    'NotificationCounter',
+    'UserEvent',
+    'Invoice',
+    'InvoiceBatch',
+    'InvoiceJob',
+    'Broadcast',
+    'DistributorCatalogItem',
+    'CatalogVersion'
 ] 
\ No newline at end of file
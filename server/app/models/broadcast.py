@@ -0,0 +1,56 @@
+from app import db
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+# A distributor's announcement to every partnered retailer, fanned out into
+# the notification outbox by the notification dispatcher in chunks. Each
+# chunk records how far it got, so a broadcast that fails or whose worker
+# dies resumes after the last recipient written instead of starting over.
+class Broadcast(db.Model):
+    __tablename__ = 'broadcasts'
+    __table_args__ = (
+        # Workers claim the oldest queued broadcast
+        db.Index(
+            'idx_broadcasts_queued',
+            'created_at',
+            postgresql_where=db.text("status = 'queued'")
+        ),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    distributor_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    message = db.Column(db.Text, nullable=False)  # rendered once, when queued
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    total = db.Column(db.Integer, nullable=True)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    last_recipient_id = db.Column(UUID(as_uuid=True), nullable=True)  # recipients go out in id order
+    per_second = db.Column(db.Float, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # last chunk written
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': str(self.id),
+            'distributorId': str(self.distributor_id),
+            'kind': self.kind,
+            'title': self.title,
+            'message': self.message,
+            'status': self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'recipientsPerSecond': self.per_second,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Broadcast {self.id} {self.status}>'
@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+    
+    # Single row (id = 1), bumped by every product or category write
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'version': self.version,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>' 
@@ -0,0 +1,56 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+
+# Read model: one denormalized inventory + product row per distributor item
+class DistributorCatalogItem(db.Model):
+    __tablename__ = 'distributor_catalog'
+    __table_args__ = (
+        # One page of a distributor's visible catalog is a single range scan
+        db.Index(
+            'idx_distributor_catalog_page',
+            'distributor_id', 'created_at', 'inventory_id',
+            postgresql_where=db.text('is_available AND product_is_active')
+        ),
+        db.Index('idx_distributor_catalog_product', 'product_id'),
+    )
+    
+    inventory_id = db.Column(UUID(as_uuid=True), db.ForeignKey('inventory.id', ondelete='CASCADE'), primary_key=True)
+    distributor_id = db.Column(UUID(as_uuid=True), nullable=False)
+    product_id = db.Column(UUID(as_uuid=True), nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    sku = db.Column(db.String(255), nullable=False)
+    category_id = db.Column(UUID(as_uuid=True), nullable=True)
+    manufacturer_id = db.Column(UUID(as_uuid=True), nullable=True)
+    image_url = db.Column(db.Text, nullable=True)
+    base_price = db.Column(db.Numeric(10, 2), nullable=True)
+    selling_price = db.Column(db.Numeric(10, 2), nullable=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    is_available = db.Column(db.Boolean, nullable=False, default=True)
+    product_is_active = db.Column(db.Boolean, nullable=False, default=True)
+    product_created_at = db.Column(db.DateTime, nullable=True)
+    product_updated_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to the product dictionary shape, plus inventory fields"""
+        return {
+            'id': str(self.product_id),
+            'name': self.name,
+            'description': self.description,
+            'sku': self.sku,
+            'categoryId': str(self.category_id) if self.category_id else None,
+            'manufacturerId': str(self.manufacturer_id) if self.manufacturer_id else None,
+            'imageUrl': self.image_url,
+            'basePrice': float(self.base_price) if self.base_price else None,
+            'isActive': self.product_is_active,
+            'createdAt': self.product_created_at.isoformat() if self.product_created_at else None,
+            'updatedAt': self.product_updated_at.isoformat() if self.product_updated_at else None,
+            'inventoryId': str(self.inventory_id),
+            'quantity': self.quantity,
+            'sellingPrice': float(self.selling_price) if self.selling_price else None
+        }
+    
+    def __repr__(self):
+        return f'<DistributorCatalogItem {self.distributor_id} - {self.sku}>' 
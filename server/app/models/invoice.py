@@ -8,8 +8,9 @@ class Invoice(db.Model):
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     invoice_number = db.Column(db.String(255), unique=True, nullable=False)
-    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=False)
+    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), unique=True, nullable=False)  # one invoice per order
     pdf_url = db.Column(db.Text, nullable=True)
+    pdf_sha256 = db.Column(db.String(64), nullable=True)  # key in the invoice store
     sent_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -23,6 +24,7 @@ class Invoice(db.Model):
             'invoiceNumber': self.invoice_number,
             'orderId': str(self.order_id),
             'pdfUrl': self.pdf_url,
+            'pdfHash': self.pdf_sha256,
             'sentAt': self.sent_at.isoformat() if self.sent_at else None,
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
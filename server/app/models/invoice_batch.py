@@ -0,0 +1,50 @@
+from app import db
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+# A distributor's request to invoice every uninvoiced order in a date range,
+# queued for the invoice worker (flask process-invoices)
+class InvoiceBatch(db.Model):
+    __tablename__ = 'invoice_batches'
+    __table_args__ = (
+        # Workers claim the oldest queued batch
+        db.Index(
+            'idx_invoice_batches_queued',
+            'created_at',
+            postgresql_where=db.text("status = 'queued'")
+        ),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    distributor_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    since = db.Column(db.Date, nullable=False)
+    until = db.Column(db.Date, nullable=False)  # inclusive
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    total = db.Column(db.Integer, nullable=True)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    per_second = db.Column(db.Float, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': str(self.id),
+            'distributorId': str(self.distributor_id),
+            'since': self.since.isoformat(),
+            'until': self.until.isoformat(),
+            'status': self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'invoicesPerSecond': self.per_second,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<InvoiceBatch {self.id} {self.status}>'
@@ -0,0 +1,47 @@
+from app import db
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+# A request to render one order's invoice, run by the invoice worker. One job
+# per order: concurrent requests for the same order share it
+class InvoiceJob(db.Model):
+    __tablename__ = 'invoice_jobs'
+    __table_args__ = (
+        # Workers claim the oldest queued jobs
+        db.Index(
+            'idx_invoice_jobs_queued',
+            'created_at',
+            postgresql_where=db.text("status = 'queued'")
+        ),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id', ondelete='CASCADE'), unique=True, nullable=False)
+    requested_by = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    invoice_id = db.Column(UUID(as_uuid=True), db.ForeignKey('invoices.id', ondelete='SET NULL'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    invoice = db.relationship('Invoice')
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': str(self.id),
+            'orderId': str(self.order_id),
+            'status': self.status,
+            'invoice': self.invoice.to_dict() if self.invoice else None,
+            'downloadUrl': self.invoice.pdf_url if self.invoice else None,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<InvoiceJob {self.order_id} {self.status}>'
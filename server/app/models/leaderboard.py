@@ -0,0 +1,27 @@
+from app import db
+from sqlalchemy.dialects.postgresql import UUID
+
+# Running totals behind the analytics leaderboards, one row per owner and
+# subject, kept up to date on every order write and reconciled periodically.
+# `board` is 'products' (subject: a product) or 'partners' (subject: the
+# user on the other side of the order); `role` is the owner's side as in
+# the order rollups.
+class LeaderboardEntry(db.Model):
+    __tablename__ = 'leaderboard_entries'
+    
+    owner_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    role = db.Column(db.String(20), primary_key=True)
+    board = db.Column(db.String(20), primary_key=True)
+    subject_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<LeaderboardEntry {self.owner_id} {self.role} {self.board} {self.subject_id}>'
+
+# Top-N reads walk one of these backwards and stop after N rows
+db.Index('idx_leaderboard_entries_units', LeaderboardEntry.owner_id, LeaderboardEntry.role,
+         LeaderboardEntry.board, LeaderboardEntry.item_count.desc())
+db.Index('idx_leaderboard_entries_revenue', LeaderboardEntry.owner_id, LeaderboardEntry.role,
+         LeaderboardEntry.board, LeaderboardEntry.revenue.desc())
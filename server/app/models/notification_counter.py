@@ -0,0 +1,15 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+
+# Unread inbox notifications per user, kept up to date on every write so the
+# badge is a primary key lookup instead of a COUNT
+class NotificationCounter(db.Model):
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<NotificationCounter {self.user_id} {self.unread_count}>'
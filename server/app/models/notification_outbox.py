@@ -0,0 +1,65 @@
+from app import db
+from datetime import datetime
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+# Transactional outbox: one row per notification still to be delivered,
+# written in the same transaction as the change that caused it
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        # Workers claim the oldest due pending rows and expired sends
+        db.Index(
+            'idx_notification_outbox_due',
+            'available_at',
+            postgresql_where=db.text("status IN ('pending', 'sending')")
+        ),
+        # Later updates look up an undelivered row to merge into
+        db.Index(
+            'idx_notification_outbox_coalesce',
+            'coalesce_key',
+            postgresql_where=db.text("status IN ('pending', 'held')")
+        ),
+        # Rows held back for the next digest
+        db.Index(
+            'idx_notification_outbox_held',
+            'created_at',
+            postgresql_where=db.text("status = 'held'")
+        ),
+    )
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    notification_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey('whatsapp_notifications.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, held, sending, sent, failed, digested
+    coalesce_key = db.Column(db.String(255), nullable=True)
+    coalesced_count = db.Column(db.Integer, nullable=False, default=0)  # later updates merged into this row
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relationships
+    notification = db.relationship('WhatsAppNotification')
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': str(self.id),
+            'notificationId': str(self.notification_id),
+            'status': self.status,
+            'coalesceKey': self.coalesce_key,
+            'coalescedCount': self.coalesced_count,
+            'attempts': self.attempts,
+            'availableAt': self.available_at.isoformat() if self.available_at else None,
+            'lastError': self.last_error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'processedAt': self.processed_at.isoformat() if self.processed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.notification_id} {self.status}>'
@@ -5,6 +5,11 @@ from sqlalchemy.dialects.postgresql import UUID
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Newest-first keyset pagination of each party's orders
+        db.Index('idx_orders_retailer_created_id', 'retailer_id', 'created_at', 'id'),
+        db.Index('idx_orders_distributor_created_id', 'distributor_id', 'created_at', 'id'),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     order_number = db.Column(db.String(255), unique=True, nullable=False)
@@ -22,8 +27,8 @@ class Order(db.Model):
     distributor = db.relationship('User', foreign_keys=[distributor_id], backref='distributor_orders')
     items = db.relationship('OrderItem', backref='order', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        """Convert to dictionary"""
+    def to_dict(self, items=None):
+        """Convert to dictionary; pass already serialized `items` to skip loading them"""
         return {
             'id': str(self.id),
             'orderNumber': self.order_number,
@@ -35,7 +40,7 @@ class Order(db.Model):
             'notes': self.notes,
             'createdAt': self.created_at.isoformat() if self.created_at else None,
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
-            'items': [item.to_dict() for item in self.items]
+            'items': items if items is not None else [item.to_dict() for item in self.items]
         }
     
     def __repr__(self):
@@ -43,6 +48,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        # Items are batch-loaded by order
+        db.Index('idx_order_items_order_id', 'order_id'),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id'), nullable=False)
@@ -0,0 +1,23 @@
+from app import db
+from sqlalchemy.dialects.postgresql import UUID
+
+# Read model: the manufacturers whose products appear in each order,
+# as they were when the order was placed
+class OrderManufacturer(db.Model):
+    __tablename__ = 'order_manufacturers'
+    
+    order_id = db.Column(UUID(as_uuid=True), db.ForeignKey('orders.id', ondelete='CASCADE'), primary_key=True)
+    manufacturer_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), primary_key=True)
+    distributor_id = db.Column(UUID(as_uuid=True), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<OrderManufacturer {self.order_id} - {self.manufacturer_id}>'
+
+# A manufacturer's orders, newest first, are a single index range scan
+db.Index(
+    'idx_order_manufacturers_manufacturer_created',
+    OrderManufacturer.manufacturer_id,
+    OrderManufacturer.created_at.desc(),
+    OrderManufacturer.order_id.desc()
+)
@@ -0,0 +1,47 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID
+
+# Rollups of orders per participant, kept up to date on every order write.
+# `role` is the side the user is on: retailer, distributor or manufacturer
+# (a manufacturer's figures only cover their own products' lines).
+
+class OrderDailyStat(db.Model):
+    """Orders, revenue and units per user, per day the order was placed, per status"""
+    __tablename__ = 'order_daily_stats'
+    
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    role = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<OrderDailyStat {self.user_id} {self.role} {self.day} {self.status}>'
+
+class OrderStatTotal(db.Model):
+    """All-time totals per user and status, so the dashboard reads a few rows"""
+    __tablename__ = 'order_stat_totals'
+    
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    role = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<OrderStatTotal {self.user_id} {self.role} {self.status}>'
+
+class OrderStatsVersion(db.Model):
+    """Single row (id = 1), bumped whenever the rollups are rewritten wholesale"""
+    __tablename__ = 'order_stats_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OrderStatsVersion {self.version}>'
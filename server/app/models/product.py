@@ -1,10 +1,31 @@
 from app import db
 from datetime import datetime
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+
+# Names and SKUs are weighted above descriptions when ranking search results
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id), optionally within a category
+        db.Index('idx_products_created_id', 'created_at', 'id'),
+        db.Index('idx_products_category_created_id', 'category_id', 'created_at', 'id'),
+        # Typeahead index syncs pick up products written since a timestamp
+        db.Index('idx_products_updated_at', 'updated_at'),
+        # Full-text and typo-tolerant (pg_trgm) product search
+        db.Index('idx_products_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('idx_products_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('idx_products_sku_trgm', 'sku', postgresql_using='gin',
+                 postgresql_ops={'sku': 'gin_trgm_ops'}),
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = db.Column(db.String(255), nullable=False)
@@ -17,6 +38,7 @@ class Product(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = db.deferred(db.Column(TSVECTOR, db.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
     
     # Relationships
     category = db.relationship('Category', backref='products')
@@ -40,4 +62,11 @@ class Product(db.Model):
         }
     
     def __repr__(self):
-        return f'<Product {self.name}>' 
\ No newline at end of file
+        return f'<Product {self.name}>' 
+
+# The trigram indexes need pg_trgm before the products table is created
+event.listen(
+    Product.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+)
@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+# Read model: each retailer's reorder suggestions, precomputed by the nightly
+# batch as one ready-to-serve list, so a request is a primary key lookup
+class ReorderSuggestionList(db.Model):
+    __tablename__ = 'reorder_suggestion_lists'
+    
+    retailer_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    suggestions = db.Column(JSONB, nullable=False)  # soonest predicted reorder first
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'suggestions': self.suggestions,
+            'computedAt': self.computed_at.isoformat() if self.computed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ReorderSuggestionList {self.retailer_id}>'
@@ -0,0 +1,30 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+# Append-only log of live updates per user. The id is the SSE event id, so a
+# reconnecting client resumes with everything after its Last-Event-ID.
+class UserEvent(db.Model):
+    __tablename__ = 'user_events'
+    __table_args__ = (
+        db.Index('idx_user_events_user_id', 'user_id', 'id'),
+    )
+    
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    type = db.Column(db.String(50), nullable=False)  # order.created, order.updated, notification
+    payload = db.Column(JSONB, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'userId': str(self.user_id),
+            'type': self.type,
+            'data': self.payload,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<UserEvent {self.id} {self.type} to {self.user_id}>'
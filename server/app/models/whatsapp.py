@@ -12,6 +12,7 @@ class WhatsAppNotification(db.Model):
     type = db.Column(db.String(50), nullable=False)  # order_update, invoice_sent, etc.
     sent_at = db.Column(db.DateTime, nullable=True)
     is_delivered = db.Column(db.Boolean, default=False)
+    read_at = db.Column(db.DateTime, nullable=True)  # read in the in-app inbox
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -26,8 +27,18 @@ class WhatsAppNotification(db.Model):
             'type': self.type,
             'sentAt': self.sent_at.isoformat() if self.sent_at else None,
             'isDelivered': self.is_delivered,
+            'isRead': self.read_at is not None,
+            'readAt': self.read_at.isoformat() if self.read_at else None,
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
     
     def __repr__(self):
-        return f'<WhatsAppNotification {self.type} to {self.user_id}>' 
\ No newline at end of file
+        return f'<WhatsAppNotification {self.type} to {self.user_id}>'
+
+# A user's inbox, newest first, is a single index range scan
+db.Index(
+    'idx_whatsapp_notifications_user_created_id',
+    WhatsAppNotification.user_id,
+    WhatsAppNotification.created_at.desc(),
+    WhatsAppNotification.id.desc()
+)
\ No newline at end of file
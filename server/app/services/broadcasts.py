@@ -0,0 +1,190 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.models import Broadcast
+from app.services import events, notification_inbox
+from app.services.notification_templates import templates, Announcement
+
+KINDS = ('general', 'price_change', 'stock')
+
+# Active retailers with an approved partnership with the distributor, whichever
+# side requested it, after `after` if given. Sorted so counter rows are always
+# locked in the same order, and so a resumed broadcast can pick up after the
+# last recipient it wrote.
+RECIPIENTS_SQL = """
+    SELECT u.id
+    FROM users u
+    WHERE u.role = 'retailer' AND u.is_active IS NOT FALSE
+      AND u.id > coalesce(CAST(:after AS uuid), '00000000-0000-0000-0000-000000000000')
+      AND u.id IN (
+          SELECT partner_id FROM partnerships
+          WHERE requester_id = :distributor_id AND status = 'approved'
+          UNION
+          SELECT requester_id FROM partnerships
+          WHERE partner_id = :distributor_id AND status = 'approved'
+      )
+    ORDER BY u.id
+"""
+
+# Queued broadcasts, and running ones whose worker stopped writing chunks
+# (it most likely died), oldest first
+CLAIM_SQL = """
+    SELECT id FROM broadcasts
+    WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < :stale_before)
+    ORDER BY created_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+
+# One statement per chunk: the notifications and their outbox rows, with the
+# message sent once rather than once per row
+INSERT_SQL = """
+    WITH n AS (
+        INSERT INTO whatsapp_notifications (id, user_id, message, type, is_delivered, created_at)
+        SELECT gen_random_uuid(), user_id, :message, 'announcement', false, :now
+        FROM unnest(CAST(:user_ids AS uuid[])) AS user_id
+        RETURNING id
+    )
+    INSERT INTO notification_outbox (id, notification_id, status, coalesced_count, attempts, available_at, created_at)
+    SELECT gen_random_uuid(), n.id, 'pending', 0, 0, :now, :now
+    FROM n
+"""
+
+def recipients(distributor_id, after=None):
+    """Ids of the distributor's partnered retailers, in one query"""
+    return db.session.execute(text(RECIPIENTS_SQL), {
+        'distributor_id': distributor_id,
+        'after': str(after) if after else None
+    }).scalars().all()
+
+def create(distributor, kind, title, body, queue=True):
+    """Queue an announcement to every partnered retailer of `distributor`.
+
+    The message is rendered here, once; the notification dispatcher writes
+    it out (see run). With queue=False the broadcast starts out running,
+    for a caller that runs it itself.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Kind must be one of {', '.join(KINDS)}")
+    if not title or not body:
+        raise ValueError('Title and body are required')
+
+    message = templates.render('announcement', Announcement(
+        distributor_name=distributor.business_name or f'{distributor.first_name} {distributor.last_name}',
+        kind=kind,
+        title=title,
+        body=body
+    ))
+    broadcast = Broadcast(
+        id=uuid.uuid4(),
+        distributor_id=distributor.id,
+        kind=kind,
+        title=title,
+        message=message,
+        status='queued' if queue else 'running',
+        completed=0
+    )
+    if not queue:
+        broadcast.started_at = broadcast.heartbeat_at = datetime.utcnow()
+    db.session.add(broadcast)
+    db.session.commit()
+    return broadcast
+
+def claim():
+    """Mark the oldest queued (or abandoned) broadcast running and return it, or None.
+
+    SKIP LOCKED lets several dispatchers poll the same queue.
+    """
+    now = datetime.utcnow()
+    broadcast_id = db.session.execute(text(CLAIM_SQL), {
+        'stale_before': now - timedelta(seconds=current_app.config['BROADCAST_STALE_SECONDS'])
+    }).scalar()
+    if broadcast_id is None:
+        db.session.rollback()
+        return None
+    broadcast = db.session.get(Broadcast, broadcast_id)
+    broadcast.status = 'running'
+    broadcast.started_at = broadcast.heartbeat_at = now
+    broadcast.error = None
+    db.session.commit()
+    return broadcast
+
+def run(broadcast, chunk_size=None, progress=None):
+    """Write a claimed broadcast's notifications, resuming where it left off.
+
+    Each chunk of recipients is one transaction: one set-based insert of
+    notifications and their outbox rows, one counter upsert, one event
+    statement and the broadcast's progress, so the dispatcher sends a chunk
+    as soon as it commits and a chunk is never written twice. If a chunk
+    fails, the broadcast is marked failed; queuing it again (retry) carries
+    on after the last chunk written. `progress(sent, total)` is called after
+    every chunk.
+
+    Returns a summary with the recipient count and throughput.
+    """
+    chunk_size = chunk_size or current_app.config['BROADCAST_CHUNK_SIZE']
+    broadcast_id = broadcast.id
+    started = time.perf_counter()
+
+    try:
+        user_ids = recipients(broadcast.distributor_id, after=broadcast.last_recipient_id)
+        broadcast.total = broadcast.completed + len(user_ids)
+        db.session.commit()
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            now = datetime.utcnow()
+
+            db.session.execute(text(INSERT_SQL), {
+                'user_ids': [str(user_id) for user_id in chunk],
+                'message': broadcast.message,
+                'now': now
+            })
+            notification_inbox.add_unread_many(chunk)
+            events.publish(chunk, 'notification', {
+                'type': 'announcement',
+                'message': broadcast.message,
+                'createdAt': now.isoformat()
+            })
+            elapsed = time.perf_counter() - started
+            broadcast.completed += len(chunk)
+            broadcast.last_recipient_id = chunk[-1]
+            broadcast.heartbeat_at = now
+            broadcast.per_second = round((start + len(chunk)) / elapsed) if elapsed else None
+            db.session.commit()
+
+            if progress:
+                progress(broadcast.completed, broadcast.total)
+    except Exception as e:
+        db.session.rollback()
+        broadcast = db.session.get(Broadcast, broadcast_id)
+        broadcast.status = 'failed'
+        broadcast.error = str(e)
+        broadcast.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+
+    elapsed = time.perf_counter() - started
+    broadcast.status = 'done'
+    broadcast.per_second = round(len(user_ids) / elapsed) if elapsed and user_ids else 0
+    broadcast.finished_at = datetime.utcnow()
+    db.session.commit()
+    return {
+        'recipients': broadcast.completed,
+        'message': broadcast.message,
+        'seconds': round(elapsed, 3),
+        'perSecond': broadcast.per_second
+    }
+
+def retry(broadcast):
+    """Queue a failed broadcast again; it resumes after the last chunk written"""
+    if broadcast.status != 'failed':
+        raise ValueError('Only failed broadcasts can be retried')
+    broadcast.status = 'queued'
+    broadcast.error = None
+    broadcast.finished_at = None
+    db.session.commit()
+    return broadcast
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from itertools import chain
+from flask import Response, current_app, request
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Product, Category
+
+BUMP_VERSION_SQL = """
+    INSERT INTO catalog_version (id, version, updated_at) VALUES (1, 1, now())
+    ON CONFLICT (id) DO UPDATE SET version = catalog_version.version + 1, updated_at = now()
+"""
+
+class CatalogSnapshot:
+    """Pre-serialized public catalog responses, keyed by catalog version.
+
+    Entries from older versions are dropped as soon as a newer version is
+    seen; the cache is bounded by CATALOG_SNAPSHOT_MAX_ENTRIES.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def respond(self, key, build):
+        """Serve `key` from cached bytes, with a strong ETag and 304 support.
+
+        `build` produces the JSON payload on a cache miss.
+        """
+        # Read the version before the data: a racing write can then only leave
+        # newer data under an older version, which the next bump replaces
+        version = current_version()
+        etag = make_etag(version, key)
+
+        if request.if_none_match.contains(etag):
+            return self._response(b'', etag, status=304)
+
+        body = self._get(version, key)
+        if body is None:
+            body = json.dumps(build(), separators=(',', ':')).encode()
+            self._put(version, key, body)
+
+        return self._response(body, etag)
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, version, key):
+        with self._lock:
+            if version != self._version:
+                return None
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def _put(self, version, key, body):
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            elif version < self._version:
+                return
+            self._entries[key] = body
+            while len(self._entries) > current_app.config['CATALOG_SNAPSHOT_MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _response(body, etag, status=200):
+        response = Response(body, status=status, mimetype='application/json')
+        response.set_etag(etag)
+        # Clients may keep the body but must revalidate it on every use
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+
+def current_version():
+    """Current catalog version, shared by every worker through the database"""
+    return db.session.execute(
+        text('SELECT version FROM catalog_version WHERE id = 1')
+    ).scalar() or 0
+
+def bump_version():
+    """Invalidate every catalog snapshot when the current transaction commits.
+
+    For writers that bypass the ORM; ORM writes to products and categories
+    are noticed on flush.
+    """
+    db.session.info['catalog_changed'] = True
+
+def make_etag(version, key):
+    """Strong ETag: the same version and key always serialize to the same bytes"""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'{version}-{digest}'
+
+def _writes_catalog(session):
+    changed = chain(session.new, session.dirty, session.deleted)
+    return any(isinstance(obj, (Product, Category)) for obj in changed)
+
+@event.listens_for(Session, 'after_flush')
+def _note_catalog_write(session, flush_context):
+    if _writes_catalog(session):
+        session.info['catalog_changed'] = True
+
+@event.listens_for(Session, 'before_commit')
+def _bump_on_catalog_write(session):
+    # Once per transaction and as late as possible: every catalog writer
+    # queues on the one version row until its transaction commits. The
+    # commit's own flush comes after this hook, so look at what it will write
+    if session.info.pop('catalog_changed', False) or _writes_catalog(session):
+        session.execute(text(BUMP_VERSION_SQL))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_catalog_write(session, previous_transaction):
+    session.info.pop('catalog_changed', None)
+
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,83 @@
+from app import db
+from app.models import Inventory, Product, DistributorCatalogItem
+from app.utils.pagination import keyset_paginate
+from sqlalchemy import event, text
+
+# Upserts catalog rows from inventory joined with products; {where} narrows the refresh
+REFRESH_SQL = """
+    INSERT INTO distributor_catalog (
+        inventory_id, distributor_id, product_id, name, description, sku,
+        category_id, manufacturer_id, image_url, base_price, selling_price,
+        quantity, is_available, product_is_active, product_created_at,
+        product_updated_at, created_at
+    )
+    SELECT i.id, i.distributor_id, p.id, p.name, p.description, p.sku,
+           p.category_id, p.manufacturer_id, p.image_url, p.base_price, i.selling_price,
+           i.quantity, coalesce(i.is_available, true), coalesce(p.is_active, true), p.created_at,
+           p.updated_at, coalesce(i.created_at, now())
+    FROM inventory i
+    JOIN products p ON p.id = i.product_id
+    {where}
+    ON CONFLICT (inventory_id) DO UPDATE SET
+        distributor_id = EXCLUDED.distributor_id,
+        product_id = EXCLUDED.product_id,
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        sku = EXCLUDED.sku,
+        category_id = EXCLUDED.category_id,
+        manufacturer_id = EXCLUDED.manufacturer_id,
+        image_url = EXCLUDED.image_url,
+        base_price = EXCLUDED.base_price,
+        selling_price = EXCLUDED.selling_price,
+        quantity = EXCLUDED.quantity,
+        is_available = EXCLUDED.is_available,
+        product_is_active = EXCLUDED.product_is_active,
+        product_created_at = EXCLUDED.product_created_at,
+        product_updated_at = EXCLUDED.product_updated_at
+"""
+
+def refresh_inventory_item(connection, inventory_id):
+    """Re-materialize the catalog row for one inventory item"""
+    connection.execute(
+        text(REFRESH_SQL.format(where='WHERE i.id = :inventory_id')),
+        {'inventory_id': str(inventory_id)}
+    )
+
+def refresh_product(connection, product_id):
+    """Re-materialize every distributor's catalog row for one product"""
+    connection.execute(
+        text(REFRESH_SQL.format(where='WHERE i.product_id = :product_id')),
+        {'product_id': str(product_id)}
+    )
+
+def rebuild():
+    """Rebuild the whole catalog from inventory and products"""
+    db.session.execute(text('TRUNCATE distributor_catalog'))
+    db.session.execute(text(REFRESH_SQL.format(where='')))
+    db.session.commit()
+
+def get_page(distributor_id, cursor=None, limit=None):
+    """One page of a distributor's orderable catalog, in a single indexed query"""
+    query = DistributorCatalogItem.query.filter_by(
+        distributor_id=distributor_id,
+        is_available=True,
+        product_is_active=True
+    )
+    return keyset_paginate(
+        query,
+        DistributorCatalogItem.created_at,
+        DistributorCatalogItem.inventory_id,
+        cursor=cursor,
+        limit=limit
+    )
+
+# Keep the catalog in step with every ORM write, inside the same transaction.
+# Deleted inventory rows are removed by the ON DELETE CASCADE foreign key.
+@event.listens_for(Inventory, 'after_insert')
+@event.listens_for(Inventory, 'after_update')
+def _inventory_written(mapper, connection, target):
+    refresh_inventory_item(connection, target.id)
+
+@event.listens_for(Product, 'after_update')
+def _product_written(mapper, connection, target):
+    refresh_product(connection, target.id)
@@ -0,0 +1,300 @@
+import collections
+import json
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from itsdangerous import BadData, URLSafeTimedSerializer
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models import UserEvent
+
+CHANNEL = 'user_events'
+
+# NOTIFY payloads are capped at 8000 bytes; bigger events are sent by id only
+# and the listener reads them back from user_events
+MAX_NOTIFY_DATA = 7000
+
+# Serializes the last moments of transactions that publish to the same user:
+# the lock is taken right before the events are inserted and held until
+# commit, so a user's event ids become visible in id order and a stream or
+# replay that has seen id N never misses a lower id committed later. Users
+# share LOCK_STRIPES locks, so a broadcast to thousands takes at most that
+# many; keys are sorted so transactions cannot deadlock on them.
+LOCK_RECIPIENTS_SQL = """
+    SELECT pg_advisory_xact_lock(:lock_class, key)
+    FROM (
+        SELECT DISTINCT hashtext(CAST(user_id AS text)) & (:stripes - 1) AS key
+        FROM unnest(CAST(:user_ids AS uuid[])) AS user_id
+        ORDER BY key
+        OFFSET 0
+    ) recipients
+"""
+
+# Advisory lock class (first key) and stripe count (a power of two) for
+# LOCK_RECIPIENTS_SQL
+LOCK_CLASS = 1001
+LOCK_STRIPES = 64
+
+# One row per recipient; with the postgres backend each row is also announced
+# with pg_notify, which PostgreSQL delivers on commit, in commit order
+PUBLISH_SQL = """
+    WITH e AS (
+        INSERT INTO user_events (user_id, type, payload, created_at)
+        SELECT user_id, :type, CAST(:payload AS jsonb), :now
+        FROM unnest(CAST(:user_ids AS uuid[])) AS user_id
+        RETURNING id, user_id
+    )
+    SELECT e.id, e.user_id, {notify}
+    FROM e
+"""
+
+NOTIFY_SQL = """pg_notify(:channel, json_build_object(
+        'id', e.id, 'userId', e.user_id, 'type', :type,
+        'data', CASE WHEN length(:payload) <= :max_data THEN CAST(:payload AS json) END
+    )::text)"""
+
+class Subscription:
+    """One open stream's buffer of events for a user"""
+
+    def __init__(self, user_id, max_pending):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.closed = False
+        self._events = collections.deque()
+        self._ready = threading.Event()
+
+    def put(self, item):
+        if len(self._events) >= self.max_pending:
+            # Too slow to keep up: end the stream, the client resumes from the log
+            self.close()
+            return
+        self._events.append(item)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    def get(self, timeout):
+        """Wait up to `timeout` seconds and return the buffered events"""
+        self._ready.wait(timeout)
+        self._ready.clear()
+        items = []
+        while self._events:
+            items.append(self._events.popleft())
+        return items
+
+class EventBroker:
+    """Fans published events out to the streams open in this process.
+
+    With EVENTS_BACKEND='postgres' a background thread LISTENs on one
+    dedicated connection, so every web process sees events published by any
+    other. With 'local' events are handed over in-process after commit, which
+    is enough for a single node.
+    """
+
+    def __init__(self):
+        self._subscriptions = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, user_id):
+        config = current_app.config
+        if config['EVENTS_BACKEND'] == 'postgres':
+            self._ensure_listener(current_app._get_current_object())
+        subscription = Subscription(user_id, config['EVENTS_MAX_PENDING'])
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def deliver(self, item):
+        """Hand one event ({'id', 'userId', 'type', 'data'}) to its user's streams"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(item['userId'], ()))
+        for subscription in subscriptions:
+            subscription.put(item)
+
+    def close_all(self):
+        """End every open stream; clients reconnect and replay what they missed"""
+        with self._lock:
+            subscriptions = [s for group in self._subscriptions.values() for s in group]
+        for subscription in subscriptions:
+            subscription.close()
+
+    def _ensure_listener(self, app):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, args=(app,), name='event-listener', daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self, app):
+        while True:
+            try:
+                with app.app_context():
+                    pooled = db.engine.raw_connection()
+                connection = pooled.driver_connection
+                # Keep this connection out of the pool for the life of the thread
+                pooled.detach()
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                self._receive(connection)
+            except Exception:
+                app.logger.exception('Event listener lost its connection; reconnecting')
+                # Events may have been missed: make streams resume from the log
+                self.close_all()
+                time.sleep(1)
+
+    def _receive(self, connection):
+        while True:
+            if select.select([connection], [], [], 30) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                item = json.loads(connection.notifies.pop(0).payload)
+                if item['data'] is None:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT payload FROM user_events WHERE id = %s', (item['id'],))
+                        row = cursor.fetchone()
+                    if row is None:
+                        continue
+                    item['data'] = row[0]
+                self.deliver(item)
+
+broker = EventBroker()
+
+def publish(user_ids, event_type, data):
+    """Record an event for each user in the caller's transaction.
+
+    The rows are written when the transaction commits, as its last step
+    (see _write_pending); streams see them only once it has committed, and a
+    rollback drops them.
+    """
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids if user_id))
+    if not user_ids:
+        return
+
+    db.session.info.setdefault('user_events_pending', []).append((
+        user_ids, event_type, data, current_app.config['EVENTS_BACKEND']
+    ))
+
+@event.listens_for(Session, 'before_commit')
+def _write_pending(session):
+    """Insert the transaction's events just before it commits.
+
+    Ids come from a sequence when the rows are inserted, so doing this last,
+    under the recipients' advisory locks, keeps the gap to the commit short
+    and makes each user's ids commit in order.
+    """
+    pending = session.info.pop('user_events_pending', None)
+    if not pending:
+        return
+
+    recipients = sorted({user_id for user_ids, _, _, _ in pending for user_id in user_ids})
+    session.execute(text(LOCK_RECIPIENTS_SQL), {
+        'lock_class': LOCK_CLASS,
+        'stripes': LOCK_STRIPES,
+        'user_ids': recipients
+    })
+
+    for user_ids, event_type, data, backend in pending:
+        payload = json.dumps(data, default=str)
+        notify = NOTIFY_SQL if backend == 'postgres' else 'NULL'
+        rows = session.execute(text(PUBLISH_SQL.format(notify=notify)), {
+            'user_ids': user_ids,
+            'type': event_type,
+            'payload': payload,
+            'now': datetime.utcnow(),
+            'channel': CHANNEL,
+            'max_data': MAX_NOTIFY_DATA
+        }).all()
+
+        if backend == 'local':
+            session.info.setdefault('user_events', []).extend(
+                {'id': event_id, 'userId': str(user_id), 'type': event_type, 'data': data}
+                for event_id, user_id, _ in rows
+            )
+
+@event.listens_for(Session, 'after_commit')
+def _deliver_local(session):
+    for item in session.info.pop('user_events', ()):
+        broker.deliver(json.loads(json.dumps(item, default=str)))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_local(session, previous_transaction):
+    session.info.pop('user_events_pending', None)
+    session.info.pop('user_events', None)
+
+def publish_order(order, event_type):
+    """Tell both parties to an order that it was created or changed"""
+    publish((order.retailer_id, order.distributor_id), event_type, {
+        'id': str(order.id),
+        'orderNumber': order.order_number,
+        'status': order.status,
+        'deliveryMode': order.delivery_mode,
+        'totalAmount': float(order.total_amount) if order.total_amount is not None else None,
+        'updatedAt': order.updated_at.isoformat() if order.updated_at else None
+    })
+
+def replay(user_id, after_id, limit):
+    """Logged events for `user_id` after `after_id`, oldest first.
+
+    Returns (events, complete); complete is False when more than `limit`
+    events were missed and the client should refetch instead.
+    """
+    rows = UserEvent.query.filter(
+        UserEvent.user_id == user_id,
+        UserEvent.id > after_id
+    ).order_by(UserEvent.id).limit(limit + 1).all()
+    events = [
+        {'id': row.id, 'userId': str(row.user_id), 'type': row.type, 'data': row.payload}
+        for row in rows[:limit]
+    ]
+    return events, len(rows) <= limit
+
+def latest_id(user_id):
+    """The id of the user's newest logged event, or 0"""
+    return db.session.query(db.func.max(UserEvent.id)).filter(UserEvent.user_id == user_id).scalar() or 0
+
+def prune(older_than_hours):
+    """Delete logged events older than the resume window"""
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    deleted = UserEvent.query.filter(UserEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+def issue_ticket(user_id):
+    """A short-lived token that opens `user_id`'s event stream and nothing else.
+
+    EventSource cannot send headers, so the stream is authenticated from the
+    URL, which ends up in access logs: the access token never goes there.
+    """
+    return _ticket_serializer().dumps(str(user_id))
+
+def read_ticket(ticket):
+    """The user id a stream ticket was issued to, or None if invalid or expired"""
+    try:
+        return _ticket_serializer().loads(ticket, max_age=current_app.config['EVENTS_TICKET_SECONDS'])
+    except BadData:
+        return None
+
+def _ticket_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='events-stream-ticket')
+
+def format_event(item):
+    """Encode one event in the text/event-stream format"""
+    data = json.dumps(item['data'], separators=(',', ':'), default=str)
+    return f"id: {item['id']}\nevent: {item['type']}\ndata: {data}\n\n"
@@ -0,0 +1,227 @@
+import csv
+import io
+import json
+import zlib
+from flask import current_app
+from sqlalchemy import Text, cast, select
+from app import db
+from app.models import Product, Order, OrderItem, OrderManufacturer, Inventory
+
+ENTITIES = ('products', 'orders', 'inventory')
+FORMATS = ('ndjson', 'csv')
+
+# Flush output once this many characters are buffered
+CHUNK_SIZE = 64 * 1024
+
+PRODUCT_FIELDS = [
+    'id', 'name', 'description', 'sku', 'categoryId', 'manufacturerId',
+    'imageUrl', 'basePrice', 'isActive', 'createdAt', 'updatedAt'
+]
+
+ORDER_FIELDS = [
+    'id', 'orderNumber', 'retailerId', 'distributorId', 'status', 'deliveryMode',
+    'totalAmount', 'notes', 'createdAt', 'updatedAt'
+]
+
+ORDER_ITEM_FIELDS = ['itemId', 'productId', 'quantity', 'unitPrice', 'totalPrice']
+
+INVENTORY_FIELDS = [
+    'id', 'distributorId', 'productId', 'quantity', 'sellingPrice',
+    'isAvailable', 'createdAt', 'updatedAt'
+]
+
+def _float(value):
+    return float(value) if value is not None else None
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _text(column):
+    # PostgreSQL renders the UUID, saving a uuid.UUID parse and str() per value
+    return cast(column, Text)
+
+def _stream(query):
+    """Iterate a query through a server-side cursor, EXPORT_FETCH_SIZE rows at a time"""
+    return query.yield_per(current_app.config['EXPORT_FETCH_SIZE'])
+
+def product_rows(user=None):
+    """Products in catalog order; manufacturers get their own, others the active catalog"""
+    query = db.session.query(
+        _text(Product.id), Product.name, Product.description, Product.sku,
+        _text(Product.category_id), _text(Product.manufacturer_id), Product.image_url,
+        Product.base_price, Product.is_active, Product.created_at, Product.updated_at
+    )
+
+    if user is not None:
+        if user.role == 'manufacturer':
+            query = query.filter(Product.manufacturer_id == user.id)
+        else:
+            query = query.filter(Product.is_active == True)
+
+    rows = _stream(query.order_by(Product.created_at, Product.id))
+    for (product_id, name, description, sku, category_id, manufacturer_id,
+         image_url, base_price, is_active, created_at, updated_at) in rows:
+        yield {
+            'id': product_id,
+            'name': name,
+            'description': description,
+            'sku': sku,
+            'categoryId': category_id,
+            'manufacturerId': manufacturer_id,
+            'imageUrl': image_url,
+            'basePrice': _float(base_price),
+            'isActive': is_active,
+            'createdAt': _iso(created_at),
+            'updatedAt': _iso(updated_at)
+        }
+
+def _order_item_pairs(user=None):
+    """(order, item) column rows, one per item, grouped by order"""
+    query = db.session.query(
+        _text(Order.id), Order.order_number, _text(Order.retailer_id), _text(Order.distributor_id),
+        Order.status, Order.delivery_mode, Order.total_amount, Order.notes, Order.created_at,
+        Order.updated_at, _text(OrderItem.id), _text(OrderItem.product_id), OrderItem.quantity,
+        OrderItem.unit_price, OrderItem.total_price
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id)
+
+    if user is not None:
+        if user.role == 'retailer':
+            query = query.filter(Order.retailer_id == user.id)
+        elif user.role == 'distributor':
+            query = query.filter(Order.distributor_id == user.id)
+        else:
+            query = query.filter(Order.id.in_(
+                select(OrderManufacturer.order_id).where(OrderManufacturer.manufacturer_id == user.id)
+            ))
+
+    rows = _stream(query.order_by(Order.created_at, Order.id))
+    for (order_id, order_number, retailer_id, distributor_id, status, delivery_mode,
+         total_amount, notes, created_at, updated_at, item_id, product_id, quantity,
+         unit_price, total_price) in rows:
+        order = {
+            'id': order_id,
+            'orderNumber': order_number,
+            'retailerId': retailer_id,
+            'distributorId': distributor_id,
+            'status': status,
+            'deliveryMode': delivery_mode,
+            'totalAmount': _float(total_amount),
+            'notes': notes,
+            'createdAt': _iso(created_at),
+            'updatedAt': _iso(updated_at)
+        }
+        item = None
+        if item_id is not None:
+            item = {
+                'itemId': item_id,
+                'productId': product_id,
+                'quantity': quantity,
+                'unitPrice': _float(unit_price),
+                'totalPrice': _float(total_price)
+            }
+        yield order, item
+
+def order_rows(user=None):
+    """Orders with their items nested, one order at a time"""
+    current = None
+    for order, item in _order_item_pairs(user):
+        if current is None or current['id'] != order['id']:
+            if current is not None:
+                yield current
+            current = dict(order, items=[])
+        if item is not None:
+            current['items'].append(item)
+    if current is not None:
+        yield current
+
+def order_item_rows(user=None):
+    """Flat order item rows (order columns repeated), for CSV"""
+    for order, item in _order_item_pairs(user):
+        yield dict(order, **(item or {}))
+
+def inventory_rows(user=None):
+    """Inventory rows; distributors get their own"""
+    query = db.session.query(
+        _text(Inventory.id), _text(Inventory.distributor_id), _text(Inventory.product_id),
+        Inventory.quantity, Inventory.selling_price, Inventory.is_available,
+        Inventory.created_at, Inventory.updated_at
+    )
+
+    if user is not None:
+        query = query.filter(Inventory.distributor_id == user.id)
+
+    rows = _stream(query.order_by(Inventory.created_at, Inventory.id))
+    for (inventory_id, distributor_id, product_id, quantity, selling_price,
+         is_available, created_at, updated_at) in rows:
+        yield {
+            'id': inventory_id,
+            'distributorId': distributor_id,
+            'productId': product_id,
+            'quantity': quantity,
+            'sellingPrice': _float(selling_price),
+            'isAvailable': is_available,
+            'createdAt': _iso(created_at),
+            'updatedAt': _iso(updated_at)
+        }
+
+def ndjson_chunks(rows):
+    """Encode rows as NDJSON, yielding roughly CHUNK_SIZE pieces"""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, separators=(',', ':'))
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            lines.append('')
+            yield '\n'.join(lines).encode()
+            lines = []
+            size = 0
+    if lines:
+        lines.append('')
+        yield '\n'.join(lines).encode()
+
+def csv_chunks(rows, fields):
+    """Encode rows as CSV with a header, yielding roughly CHUNK_SIZE pieces"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def gzip_chunks(chunks):
+    """Gzip a byte stream on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export(entity, fmt, compress=False, user=None):
+    """Stream one entity as NDJSON or CSV bytes, optionally gzipped.
+
+    Pass `user` to scope the rows to what that user may see; the CLI exports
+    everything.
+    """
+    if fmt == 'csv':
+        if entity == 'products':
+            chunks = csv_chunks(product_rows(user), PRODUCT_FIELDS)
+        elif entity == 'orders':
+            chunks = csv_chunks(order_item_rows(user), ORDER_FIELDS + ORDER_ITEM_FIELDS)
+        else:
+            chunks = csv_chunks(inventory_rows(user), INVENTORY_FIELDS)
+    else:
+        if entity == 'products':
+            chunks = ndjson_chunks(product_rows(user))
+        elif entity == 'orders':
+            chunks = ndjson_chunks(order_rows(user))
+        else:
+            chunks = ndjson_chunks(inventory_rows(user))
+
+    return gzip_chunks(chunks) if compress else chunks
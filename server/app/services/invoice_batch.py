@@ -0,0 +1,209 @@
+import multiprocessing
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import Invoice, InvoiceBatch, Order
+from app.services import invoice_documents, invoice_store, notifications
+from app.services.notification_templates import templates, InvoiceReady
+
+# Rejected and cancelled orders are never invoiced
+EXCLUDED_STATUSES = ('rejected', 'cancelled')
+
+# A distributor's orders placed from `since` up to (not including) `until`
+# that have no invoice yet and none requested as a job, oldest first
+PENDING_ORDERS_SQL = """
+    SELECT o.id
+    FROM orders o
+    WHERE o.distributor_id = :distributor_id
+      AND o.created_at >= :since AND o.created_at < :until
+      AND coalesce(o.status, 'pending') <> ALL(CAST(:excluded AS text[]))
+      AND NOT EXISTS (SELECT 1 FROM invoices i WHERE i.order_id = o.id)
+      AND NOT EXISTS (SELECT 1 FROM invoice_jobs j WHERE j.order_id = o.id)
+    ORDER BY o.created_at, o.id
+"""
+
+CLAIM_BATCH_SQL = """
+    SELECT id FROM invoice_batches
+    WHERE status = 'queued'
+    ORDER BY created_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+"""
+
+# Set in each pool process by _start_worker
+_storage_dir = None
+
+def _start_worker(storage_dir):
+    global _storage_dir
+    _storage_dir = storage_dir
+
+def render(documents, storage_dir=None):
+    """Render a chunk of InvoiceDocuments into the store.
+
+    Runs in a pool process (or inline); returns (order_id, digest) pairs.
+    """
+    root = storage_dir or _storage_dir
+    return [
+        (document.order_id, invoice_store.put(invoice_documents.render_pdf(document), root))
+        for document in documents
+    ]
+
+def record(orders, numbers, digests, sent_at):
+    """Insert the invoices of rendered orders and notify their retailers.
+
+    Orders that were invoiced in the meantime (invoices.order_id is unique)
+    are skipped. Only adds to the caller's transaction; returns {order_id:
+    invoice_id} for the invoices inserted.
+    """
+    rows = []
+    for order in orders:
+        invoice_id = uuid.uuid4()
+        rows.append({
+            'id': invoice_id,
+            'invoice_number': numbers[order.id],
+            'order_id': order.id,
+            'pdf_sha256': digests[order.id],
+            'pdf_url': f"/api/invoices/download/{invoice_id}",
+            'sent_at': sent_at,
+            'created_at': sent_at
+        })
+    if not rows:
+        return {}
+    inserted = dict(db.session.execute(
+        insert(Invoice).values(rows).on_conflict_do_nothing(index_elements=['order_id'])
+        .returning(Invoice.order_id, Invoice.id)
+    ).all())
+
+    for order in orders:
+        if order.id in inserted:
+            message = templates.render('invoice_sent', InvoiceReady(
+                order_number=order.order_number,
+                invoice_number=numbers[order.id],
+                total_amount=order.total_amount
+            ))
+            notifications.enqueue(order.retailer_id, message, 'invoice_sent')
+    return inserted
+
+def generate(distributor_id, since, until, workers=None, progress=None):
+    """Invoice every uninvoiced order a distributor received from `since` to `until`.
+
+    Dates are inclusive. Orders are taken in chunks of INVOICE_CHUNK_SIZE;
+    each chunk's items, products and users are prefetched in bulk here, the
+    PDFs are rendered by a pool of `workers` processes (0 renders in this
+    process) straight into the invoice store, and the chunk's invoices are
+    committed together. The next chunk is queued before the current one is
+    committed, so the pool keeps rendering while this process loads and
+    commits. `progress(done, total)`
+    is called with invoice counts before the first chunk and after each.
+
+    Returns a summary with the invoice count and throughput.
+    """
+    config = current_app.config
+    workers = config['INVOICE_WORKERS'] if workers is None else workers
+    chunk_size = config['INVOICE_CHUNK_SIZE']
+    storage_dir = config['INVOICE_STORAGE_DIR']
+
+    started = time.perf_counter()
+    order_ids = db.session.execute(text(PENDING_ORDERS_SQL), {
+        'distributor_id': distributor_id,
+        'since': since,
+        'until': until + timedelta(days=1),
+        'excluded': list(EXCLUDED_STATUSES)
+    }).scalars().all()
+    chunks = [order_ids[start:start + chunk_size] for start in range(0, len(order_ids), chunk_size)]
+
+    def prepared():
+        for chunk in chunks:
+            orders = Order.query.filter(Order.id.in_(chunk)).order_by(Order.created_at, Order.id).all()
+            numbers = {order.id: invoice_documents.new_invoice_number() for order in orders}
+            yield orders, numbers, invoice_documents.load(orders, numbers)
+
+    def rendered():
+        if workers == 0:
+            for orders, numbers, documents in prepared():
+                yield orders, numbers, render(documents, storage_dir)
+            return
+        # Fresh interpreters: no app, session or connection is inherited
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_start_worker,
+            initargs=(storage_dir,)
+        ) as pool:
+            pending = deque()
+            for orders, numbers, documents in prepared():
+                # One task per invoice, so a chunk spreads over every worker
+                futures = [pool.submit(render, [document]) for document in documents]
+                pending.append((orders, numbers, futures))
+                if len(pending) > 1:
+                    orders, numbers, futures = pending.popleft()
+                    yield orders, numbers, [pair for future in futures for pair in future.result()]
+            while pending:
+                orders, numbers, futures = pending.popleft()
+                yield orders, numbers, [pair for future in futures for pair in future.result()]
+
+    invoices = 0
+    sent_at = datetime.utcnow()
+    if progress:
+        progress(0, len(order_ids))
+    for orders, numbers, pairs in rendered():
+        invoices += len(record(orders, numbers, dict(pairs), sent_at))
+        db.session.commit()
+        if progress:
+            progress(invoices, len(order_ids))
+
+    elapsed = time.perf_counter() - started
+    return {
+        'invoices': invoices,
+        'seconds': round(elapsed, 3),
+        'perSecond': round(invoices / elapsed, 1) if elapsed and invoices else 0
+    }
+
+def claim():
+    """Mark the oldest queued batch running and return it, or None.
+
+    SKIP LOCKED lets several invoice workers poll the same queue.
+    """
+    batch_id = db.session.execute(text(CLAIM_BATCH_SQL)).scalar()
+    if batch_id is None:
+        db.session.rollback()
+        return None
+    batch = db.session.get(InvoiceBatch, batch_id)
+    batch.status = 'running'
+    batch.started_at = datetime.utcnow()
+    db.session.commit()
+    return batch
+
+def run(batch, workers=None):
+    """Generate a claimed batch, recording progress and the outcome on it"""
+    batch_id = batch.id
+
+    def progress(done, total):
+        InvoiceBatch.query.filter_by(id=batch_id).update({'completed': done, 'total': total})
+        db.session.commit()
+
+    try:
+        summary = generate(batch.distributor_id, batch.since, batch.until, workers, progress)
+    except Exception as e:
+        db.session.rollback()
+        batch = db.session.get(InvoiceBatch, batch_id)
+        batch.status = 'failed'
+        batch.error = str(e)
+        batch.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+
+    batch = db.session.get(InvoiceBatch, batch_id)
+    batch.status = 'done'
+    batch.total = summary['invoices']
+    batch.completed = summary['invoices']
+    batch.per_second = summary['perSecond']
+    batch.finished_at = datetime.utcnow()
+    db.session.commit()
+    return summary
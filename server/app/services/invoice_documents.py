@@ -0,0 +1,204 @@
+import dataclasses
+import io
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from app.models import User, OrderItem, Product
+
+GST_RATE = Decimal('0.18')
+
+# Plain, picklable invoice records: everything a PDF needs, loaded up front so
+# rendering never touches the database and can run in another process
+
+@dataclasses.dataclass(frozen=True)
+class InvoiceParty:
+    name: str
+    email: str
+    phone: str
+    business: str
+
+@dataclasses.dataclass(frozen=True)
+class InvoiceLine:
+    product_name: str
+    sku: str
+    quantity: int
+    unit_price: Decimal
+    total_price: Decimal
+
+@dataclasses.dataclass(frozen=True)
+class InvoiceDocument:
+    order_id: uuid.UUID
+    invoice_number: str
+    order_number: str
+    created_at: datetime
+    customer: InvoiceParty
+    distributor: InvoiceParty
+    lines: tuple
+    notes: str = None
+
+    @property
+    def subtotal(self):
+        return sum((line.total_price for line in self.lines), Decimal(0))
+
+    @property
+    def tax(self):
+        return self.subtotal * GST_RATE
+
+    @property
+    def total(self):
+        return self.subtotal + self.tax
+
+def new_invoice_number():
+    return f"INV-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+
+def _party(user):
+    return InvoiceParty(
+        name=f'{user.first_name or ""} {user.last_name or ""}'.strip() or 'N/A',
+        email=user.email or 'N/A',
+        phone=user.phone_number or 'N/A',
+        business=user.business_name or 'N/A'
+    )
+
+def load(orders, invoice_numbers):
+    """InvoiceDocuments for `orders`, with two queries however many there are.
+
+    `invoice_numbers` maps order id to the number to print.
+    """
+    order_ids = [order.id for order in orders]
+    lines = {order_id: [] for order_id in order_ids}
+    rows = OrderItem.query.join(Product, Product.id == OrderItem.product_id).with_entities(
+        OrderItem.order_id, Product.name, Product.sku,
+        OrderItem.quantity, OrderItem.unit_price, OrderItem.total_price
+    ).filter(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.order_id, Product.name, OrderItem.id)
+    for order_id, name, sku, quantity, unit_price, total_price in rows:
+        lines[order_id].append(InvoiceLine(name, sku, quantity, unit_price, total_price))
+
+    user_ids = {order.retailer_id for order in orders} | {order.distributor_id for order in orders}
+    parties = {user.id: _party(user) for user in User.query.filter(User.id.in_(user_ids))}
+
+    return [
+        InvoiceDocument(
+            order_id=order.id,
+            invoice_number=invoice_numbers[order.id],
+            order_number=order.order_number,
+            created_at=order.created_at,
+            customer=parties[order.retailer_id],
+            distributor=parties[order.distributor_id],
+            lines=tuple(lines[order.id]),
+            notes=order.notes
+        )
+        for order in orders
+    ]
+
+class InvoiceRenderer:
+    """Renders InvoiceDocuments to PDF bytes.
+
+    Paragraph and table styles, column widths and header rows are built once,
+    when the renderer is created, and shared by every render. Flowables keep
+    layout state while a document builds, so each render makes its own. Use
+    the module's `renderer`, one per process.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        )
+        self.normal_style = styles['Normal']
+        self.heading2_style = styles['Heading2']
+        self.heading3_style = styles['Heading3']
+
+        header = [
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ]
+        self.info_table_style = TableStyle(header)
+        self.items_table_style = TableStyle(header + [
+            ('ALIGN', (-2, -3), (-1, -1), 'RIGHT'),  # Align totals to right
+            ('FONTNAME', (-2, -3), (-1, -1), 'Helvetica-Bold'),
+        ])
+        self.info_col_widths = [2*inch, 2*inch, 2*inch, 2*inch]
+        self.items_col_widths = [2*inch, 1.5*inch, 1*inch, 1.5*inch, 1.5*inch]
+        self.info_header = ['Customer Information:', '', 'Distributor Information:', '']
+        self.items_header = ['Product', 'SKU', 'Quantity', 'Unit Price', 'Total']
+
+    def render(self, document):
+        """Render an InvoiceDocument to PDF bytes"""
+        buffer = io.BytesIO()
+        # Invariant output: the same invoice always renders to the same bytes,
+        # so re-rendering after a store miss lands on the same content address
+        doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=1)
+        story = [
+            Paragraph("AuroMart B2B Platform", self.title_style),
+            Paragraph("INVOICE", self.title_style),
+            Spacer(1, 20)
+        ]
+
+        # Invoice details
+        story.append(Paragraph(f"Invoice Number: {escape(document.invoice_number)}", self.normal_style))
+        story.append(Paragraph(f"Order Number: {escape(document.order_number)}", self.normal_style))
+        story.append(Paragraph(f"Date: {document.created_at.strftime('%B %d, %Y')}", self.normal_style))
+        story.append(Spacer(1, 20))
+
+        # Customer and distributor info, side by side
+        customer, distributor = document.customer, document.distributor
+        info_data = [
+            self.info_header,
+            ['Name:', customer.name, 'Name:', distributor.name],
+            ['Email:', customer.email, 'Email:', distributor.email],
+            ['Phone:', customer.phone, 'Phone:', distributor.phone],
+            ['Business:', customer.business, 'Business:', distributor.business]
+        ]
+        story.append(Table(info_data, colWidths=self.info_col_widths, style=self.info_table_style))
+        story.append(Spacer(1, 20))
+
+        # Items table; long invoices repeat the header row on every page
+        story.append(Paragraph("Order Items", self.heading2_style))
+        story.append(Spacer(1, 10))
+        items_data = [self.items_header]
+        items_data.extend(
+            [line.product_name, line.sku, str(line.quantity), f"₹{line.unit_price:.2f}", f"₹{line.total_price:.2f}"]
+            for line in document.lines
+        )
+        subtotal = document.subtotal
+        tax = subtotal * GST_RATE
+        items_data.extend([
+            ['', '', '', 'Subtotal:', f"₹{subtotal:.2f}"],
+            ['', '', '', 'GST (18%):', f"₹{tax:.2f}"],
+            ['', '', '', 'Total:', f"₹{subtotal + tax:.2f}"]
+        ])
+        story.append(Table(items_data, colWidths=self.items_col_widths, style=self.items_table_style, repeatRows=1))
+        story.append(Spacer(1, 20))
+
+        # Notes
+        if document.notes:
+            story.append(Paragraph("Notes:", self.heading3_style))
+            story.append(Paragraph(escape(document.notes), self.normal_style))
+            story.append(Spacer(1, 20))
+
+        # Footer
+        story.append(Paragraph("Thank you for your business!", self.normal_style))
+        story.append(Paragraph("Generated by AuroMart B2B Platform", self.normal_style))
+
+        doc.build(story)
+        return buffer.getvalue()
+
+renderer = InvoiceRenderer()
+
+def render_pdf(document):
+    """Render an InvoiceDocument to PDF bytes with the process's renderer"""
+    return renderer.render(document)
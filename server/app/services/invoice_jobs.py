@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import Invoice, InvoiceJob, Order
+from app.services import invoice_batch, invoice_documents
+
+# Queued jobs, and running ones whose worker has been at them too long
+# (it most likely died), oldest first
+CLAIM_JOBS_SQL = """
+    SELECT id FROM invoice_jobs
+    WHERE status = 'queued' OR (status = 'running' AND started_at < :stale_before)
+    ORDER BY created_at
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+"""
+
+def enqueue(order, user_id):
+    """The order's invoice job, queuing one unless it already exists.
+
+    Returns (job, created). The insert relies on the unique order_id, so
+    concurrent requests for the same order all get the one job and the
+    invoice is rendered once; a failed job is queued again.
+    """
+    statement = insert(InvoiceJob).values(
+        id=uuid.uuid4(),
+        order_id=order.id,
+        requested_by=user_id,
+        status='queued',
+        created_at=datetime.utcnow()
+    )
+    job_id = db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=['order_id'],
+            set_={
+                'status': 'queued',
+                'requested_by': statement.excluded.requested_by,
+                'error': None,
+                'created_at': statement.excluded.created_at,
+                'started_at': None,
+                'finished_at': None
+            },
+            where=InvoiceJob.status == 'failed'
+        ).returning(InvoiceJob.id)
+    ).scalar()
+    db.session.commit()
+
+    if job_id is not None:
+        return db.session.get(InvoiceJob, job_id), True
+    return InvoiceJob.query.filter_by(order_id=order.id).one(), False
+
+def claim(limit=None):
+    """Mark up to `limit` jobs running and return them.
+
+    SKIP LOCKED lets several invoice workers poll the same queue.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    job_ids = db.session.execute(text(CLAIM_JOBS_SQL), {
+        'stale_before': now - timedelta(seconds=config['INVOICE_JOB_TIMEOUT_SECONDS']),
+        'limit': limit or config['INVOICE_JOB_BATCH_SIZE']
+    }).scalars().all()
+    if not job_ids:
+        db.session.rollback()
+        return []
+    jobs = InvoiceJob.query.filter(InvoiceJob.id.in_(job_ids)).order_by(InvoiceJob.created_at).all()
+    for job in jobs:
+        job.status = 'running'
+        job.started_at = now
+    db.session.commit()
+    return jobs
+
+def run(jobs):
+    """Render claimed jobs into the invoice store and record their invoices.
+
+    Orders are prefetched in bulk and rendered in this process; a job whose
+    order was invoiced another way (a batch, say) just points at that
+    invoice. Returns (done, failed).
+    """
+    now = datetime.utcnow()
+    existing = {
+        invoice.order_id: invoice.id
+        for invoice in Invoice.query.filter(Invoice.order_id.in_([job.order_id for job in jobs]))
+    }
+    orders = Order.query.filter(
+        Order.id.in_([job.order_id for job in jobs if job.order_id not in existing])
+    ).all()
+    numbers = {order.id: invoice_documents.new_invoice_number() for order in orders}
+
+    digests = {}
+    errors = {}
+    storage_dir = current_app.config['INVOICE_STORAGE_DIR']
+    for document in invoice_documents.load(orders, numbers):
+        try:
+            digests.update(invoice_batch.render([document], storage_dir))
+        except Exception as e:
+            errors[document.order_id] = str(e)
+
+    rendered = [order for order in orders if order.id in digests]
+    existing.update(invoice_batch.record(rendered, numbers, digests, now))
+    if len(existing) < len(jobs):
+        # Lost a race with a batch: the invoice row is theirs
+        existing.update(
+            (invoice.order_id, invoice.id)
+            for invoice in Invoice.query.filter(Invoice.order_id.in_([order.id for order in rendered]))
+        )
+
+    done = failed = 0
+    for job in jobs:
+        job.finished_at = now
+        if job.order_id in existing:
+            job.status = 'done'
+            job.invoice_id = existing[job.order_id]
+            done += 1
+        else:
+            job.status = 'failed'
+            job.error = errors.get(job.order_id, 'Order not found')
+            failed += 1
+    db.session.commit()
+    return done, failed
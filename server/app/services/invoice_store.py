@@ -0,0 +1,119 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from flask import current_app, request, send_file
+
+# Bytes copied from a stored PDF into a ZIP bundle per read
+ZIP_READ_SIZE = 256 * 1024
+
+def _root(root=None):
+    return root or current_app.config['INVOICE_STORAGE_DIR']
+
+def relative_path(digest):
+    """Where a PDF lives under the store root: fanned out by the first byte"""
+    return f'{digest[:2]}/{digest}.pdf'
+
+def path_for(digest, root=None):
+    return os.path.join(_root(root), relative_path(digest))
+
+def exists(digest):
+    return bool(digest) and os.path.exists(path_for(digest))
+
+def put(data, root=None):
+    """Store a rendered PDF once and return its SHA-256 hex digest.
+
+    The file is written under a temporary name and renamed into place, so a
+    reader never sees a partial PDF and concurrent writers of the same bytes
+    just replace one another. Pass `root` where there is no app context.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = path_for(digest, root)
+    if os.path.exists(path):
+        return digest
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return digest
+
+def send(digest, download_name):
+    """Respond with a stored PDF, straight from disk.
+
+    The digest is a strong ETag, so revalidation answers 304 without touching
+    the file. With INVOICE_ACCEL_REDIRECT_PREFIX set, nginx serves the file
+    (sendfile, ranges) from its internal location; otherwise send_file streams
+    the path through the server's file wrapper and answers range requests.
+    """
+    if request.if_none_match.contains(digest):
+        response = current_app.response_class(status=304)
+        response.set_etag(digest)
+        return response
+
+    prefix = current_app.config['INVOICE_ACCEL_REDIRECT_PREFIX']
+    if prefix:
+        response = current_app.response_class(mimetype='application/pdf')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative_path(digest)
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        response.set_etag(digest)
+        return response
+
+    return send_file(
+        path_for(digest),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        etag=digest,
+        conditional=True
+    )
+
+class _ZipOutput:
+    """Write-only sink for ZipFile: keeps what was written until taken.
+
+    It cannot seek, so ZipFile writes each entry's sizes and CRC in a data
+    descriptor after its data instead of going back to patch the header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def zip_chunks(entries):
+    """Stream a ZIP archive of stored PDFs, entry by entry.
+
+    `entries` yields (name, digest, date_time) and is only advanced as the
+    archive is written, so it may render misses lazily. PDFs are already
+    compressed and are stored as they are; the archive is never held whole,
+    only up to ZIP_READ_SIZE bytes of it at a time.
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for name, digest, date_time in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time.timetuple()[:6])
+            with open(path_for(digest), 'rb') as source, archive.open(info, 'w') as entry:
+                for data in iter(lambda: source.read(ZIP_READ_SIZE), b''):
+                    entry.write(data)
+                    yield output.take()
+            # The entry's data descriptor
+            yield output.take()
+    # The central directory
+    yield output.take()
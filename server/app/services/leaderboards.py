@@ -0,0 +1,244 @@
+from collections import defaultdict
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import LeaderboardEntry, Product, User
+
+BOARDS = ('products', 'partners')
+
+# One order's lines per product, with the product's manufacturer
+ORDER_LINES_SQL = """
+    SELECT oi.product_id, p.manufacturer_id, sum(oi.quantity), sum(oi.total_price)
+    FROM order_items oi
+    LEFT JOIN products p ON p.id = oi.product_id
+    WHERE oi.order_id = :order_id
+    GROUP BY oi.product_id, p.manufacturer_id
+"""
+
+# Every entry recomputed from orders and order items, the same way the
+# incremental updates build them
+FRESH_SQL = """
+    WITH counted AS (
+        SELECT o.id, o.retailer_id, o.distributor_id, coalesce(o.total_amount, 0) AS total_amount,
+               coalesce((SELECT sum(quantity) FROM order_items WHERE order_id = o.id), 0) AS items
+        FROM orders o
+        WHERE coalesce(o.status, 'pending') <> ALL(CAST(:excluded AS text[]))
+    ),
+    lines AS (
+        SELECT o.id AS order_id, o.retailer_id, o.distributor_id, oi.product_id, p.manufacturer_id,
+               sum(oi.quantity) AS units, sum(oi.total_price) AS revenue
+        FROM counted o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN products p ON p.id = oi.product_id
+        GROUP BY o.id, o.retailer_id, o.distributor_id, oi.product_id, p.manufacturer_id
+    ),
+    entries AS (
+        SELECT retailer_id AS owner_id, 'retailer' AS role, 'products' AS board, product_id AS subject_id,
+               1 AS orders, units, revenue
+        FROM lines
+        UNION ALL
+        SELECT distributor_id, 'distributor', 'products', product_id, 1, units, revenue
+        FROM lines
+        UNION ALL
+        SELECT manufacturer_id, 'manufacturer', 'products', product_id, 1, units, revenue
+        FROM lines
+        WHERE manufacturer_id IS NOT NULL
+        UNION ALL
+        SELECT manufacturer_id, 'manufacturer', 'partners', retailer_id, 1, sum(units), sum(revenue)
+        FROM lines
+        WHERE manufacturer_id IS NOT NULL
+        GROUP BY order_id, manufacturer_id, retailer_id
+        UNION ALL
+        SELECT retailer_id, 'retailer', 'partners', distributor_id, 1, items, total_amount
+        FROM counted
+        UNION ALL
+        SELECT distributor_id, 'distributor', 'partners', retailer_id, 1, items, total_amount
+        FROM counted
+    )
+    SELECT owner_id, role, board, subject_id, sum(orders)::int AS order_count,
+           sum(revenue) AS revenue, sum(units)::int AS item_count
+    FROM entries
+    WHERE owner_id IS NOT NULL AND subject_id IS NOT NULL
+    GROUP BY owner_id, role, board, subject_id
+"""
+
+# What each drifted entry is missing, with the recount and the entries read
+# in one statement: order writes change both in one transaction, so within
+# a snapshot the difference is the drift alone
+DRIFT_SQL = f"""
+    WITH fresh AS ({FRESH_SQL})
+    SELECT owner_id, role, board, subject_id,
+           coalesce(f.order_count, 0) - coalesce(e.order_count, 0),
+           coalesce(f.revenue, 0) - coalesce(e.revenue, 0),
+           coalesce(f.item_count, 0) - coalesce(e.item_count, 0)
+    FROM fresh f
+    FULL JOIN leaderboard_entries e USING (owner_id, role, board, subject_id)
+    WHERE (coalesce(f.order_count, 0), coalesce(f.revenue, 0), coalesce(f.item_count, 0))
+          IS DISTINCT FROM (coalesce(e.order_count, 0), coalesce(e.revenue, 0), coalesce(e.item_count, 0))
+"""
+
+# Entries every order of which was cancelled or recounted away
+DELETE_EMPTY_SQL = """
+    DELETE FROM leaderboard_entries
+    WHERE order_count = 0 AND revenue = 0 AND item_count = 0
+"""
+
+def counts(status):
+    """Whether orders in `status` count towards the leaderboards"""
+    return (status or 'pending') not in current_app.config['LEADERBOARD_EXCLUDED_STATUSES']
+
+def _shares(order, lines):
+    """{(owner_id, role, board, subject_id): [revenue, units]} for one order.
+
+    `lines` are (product_id, manufacturer_id, quantity, total_price).
+    """
+    shares = defaultdict(lambda: [Decimal(0), 0])
+    units = 0
+    for product_id, manufacturer_id, quantity, total_price in lines:
+        units += quantity
+        keys = [
+            (order.retailer_id, 'retailer', 'products', product_id),
+            (order.distributor_id, 'distributor', 'products', product_id)
+        ]
+        if manufacturer_id is not None:
+            keys.append((manufacturer_id, 'manufacturer', 'products', product_id))
+            keys.append((manufacturer_id, 'manufacturer', 'partners', order.retailer_id))
+        for key in keys:
+            shares[key][0] += total_price
+            shares[key][1] += quantity
+
+    total = order.total_amount or Decimal(0)
+    shares[(order.retailer_id, 'retailer', 'partners', order.distributor_id)] = [total, units]
+    shares[(order.distributor_id, 'distributor', 'partners', order.retailer_id)] = [total, units]
+    return shares
+
+def _add(rows):
+    """Add each row's counts to its entry, creating missing ones, in one statement"""
+    # Stable order, so concurrent writers lock shared rows in the same order
+    rows = sorted(rows, key=lambda row: tuple(
+        str(row[column]) for column in ('owner_id', 'role', 'board', 'subject_id')
+    ))
+    statement = insert(LeaderboardEntry).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=['owner_id', 'role', 'board', 'subject_id'],
+        set_={
+            'order_count': LeaderboardEntry.order_count + statement.excluded.order_count,
+            'revenue': LeaderboardEntry.revenue + statement.excluded.revenue,
+            'item_count': LeaderboardEntry.item_count + statement.excluded.item_count
+        }
+    ))
+
+def _apply(shares, sign):
+    """Add (sign 1) or take out (sign -1) one order's shares"""
+    _add([
+        {
+            'owner_id': owner_id,
+            'role': role,
+            'board': board,
+            'subject_id': subject_id,
+            'order_count': sign,
+            'revenue': sign * revenue,
+            'item_count': sign * units
+        }
+        for (owner_id, role, board, subject_id), (revenue, units) in shares.items()
+    ])
+
+def order_created(order, lines):
+    """Count a new order, in the caller's transaction.
+
+    `lines` are (product_id, manufacturer_id, quantity, total_price) per item.
+    """
+    if counts(order.status):
+        _apply(_shares(order, lines), 1)
+
+def status_changed(order, old_status):
+    """Add or take out an order whose new status changes whether it counts"""
+    before, after = counts(old_status), counts(order.status)
+    if before == after:
+        return
+    lines = db.session.execute(text(ORDER_LINES_SQL), {'order_id': order.id}).all()
+    _apply(_shares(order, lines), 1 if after else -1)
+
+def top(owner_id, role, board, limit):
+    """The first `limit` entries of one board: products by units, partners by revenue"""
+    if board == 'products':
+        ranking = (LeaderboardEntry.item_count.desc(), LeaderboardEntry.revenue.desc())
+    else:
+        ranking = (LeaderboardEntry.revenue.desc(), LeaderboardEntry.item_count.desc())
+    entries = LeaderboardEntry.query.filter(
+        LeaderboardEntry.owner_id == owner_id,
+        LeaderboardEntry.role == role,
+        LeaderboardEntry.board == board,
+        LeaderboardEntry.order_count > 0
+    ).order_by(*ranking, LeaderboardEntry.subject_id).limit(limit).all()
+
+    subject_ids = [entry.subject_id for entry in entries]
+    if board == 'products':
+        products = {product.id: product for product in Product.query.filter(Product.id.in_(subject_ids))}
+        return [
+            {
+                'productId': str(entry.subject_id),
+                'name': products[entry.subject_id].name if entry.subject_id in products else None,
+                'sku': products[entry.subject_id].sku if entry.subject_id in products else None,
+                'units': entry.item_count,
+                'revenue': float(entry.revenue),
+                'orders': entry.order_count
+            }
+            for entry in entries
+        ]
+
+    names = {
+        user.id: user.business_name or f'{user.first_name} {user.last_name}'
+        for user in User.query.filter(User.id.in_(subject_ids))
+    }
+    return [
+        {
+            'userId': str(entry.subject_id),
+            'name': names.get(entry.subject_id),
+            'revenue': float(entry.revenue),
+            'units': entry.item_count,
+            'orders': entry.order_count
+        }
+        for entry in entries
+    ]
+
+def reconcile():
+    """Recompute every entry and correct the ones that drifted.
+
+    The recount takes no locks: it yields the difference each drifted entry
+    is missing, which is then added like any order's deltas, in batches of
+    LEADERBOARD_RECONCILE_BATCH_SIZE entries with a commit after each, so
+    order writes only ever wait on a batch's row locks. Returns the number
+    of entries and how many of them were corrected.
+    """
+    try:
+        drift = db.session.execute(text(DRIFT_SQL), {
+            'excluded': list(current_app.config['LEADERBOARD_EXCLUDED_STATUSES'])
+        }).all()
+        db.session.commit()
+
+        batch_size = current_app.config['LEADERBOARD_RECONCILE_BATCH_SIZE']
+        for start in range(0, len(drift), batch_size):
+            _add([
+                {
+                    'owner_id': owner_id,
+                    'role': role,
+                    'board': board,
+                    'subject_id': subject_id,
+                    'order_count': orders,
+                    'revenue': revenue,
+                    'item_count': units
+                }
+                for owner_id, role, board, subject_id, orders, revenue, units in drift[start:start + batch_size]
+            ])
+            db.session.commit()
+
+        db.session.execute(text(DELETE_EMPTY_SQL))
+        entries = db.session.execute(text('SELECT count(*) FROM leaderboard_entries')).scalar()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'entries': entries, 'corrected': len(drift)}
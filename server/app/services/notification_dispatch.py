@@ -0,0 +1,277 @@
+from datetime import datetime, timedelta
+import uuid
+import requests
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.models import WhatsAppNotification, NotificationOutbox
+from app.services.notification_templates import templates, Digest
+
+# Due rows: pending ones, and sends whose worker let the lease run out (it
+# most likely died mid-send). Concurrent workers skip rows being claimed
+CLAIM_SQL = """
+    SELECT o.id, o.attempts, n.id AS notification_id, n.message,
+           coalesce(u.whatsapp_number, u.phone_number) AS recipient
+    FROM notification_outbox o
+    JOIN whatsapp_notifications n ON n.id = o.notification_id
+    JOIN users u ON u.id = n.user_id
+    WHERE o.status IN ('pending', 'sending') AND o.available_at <= :now
+    ORDER BY o.available_at
+    LIMIT :limit
+    FOR UPDATE OF o SKIP LOCKED
+"""
+
+# Claimed rows are 'sending' until their lease (available_at) runs out;
+# the claim counts as an attempt, so a message that kills workers gives up
+MARK_SENDING_SQL = """
+    UPDATE notification_outbox
+    SET status = 'sending', attempts = attempts + 1, available_at = :lease_until
+    WHERE id = ANY(:ids)
+"""
+
+# Renew the lease just before the send; no row means another worker took
+# the message over after this worker's lease ran out
+RENEW_LEASE_SQL = """
+    UPDATE notification_outbox SET available_at = :lease_until
+    WHERE id = :id AND status = 'sending' AND available_at = :leased_until
+    RETURNING id
+"""
+
+MARK_SENT_SQL = """
+    UPDATE notification_outbox
+    SET status = 'sent', last_error = NULL, processed_at = :now
+    WHERE id = :id
+"""
+
+MARK_DELIVERED_SQL = """
+    UPDATE whatsapp_notifications SET is_delivered = true, sent_at = :now
+    WHERE id = ANY(:ids)
+"""
+
+MARK_FAILED_SQL = """
+    UPDATE notification_outbox
+    SET status = :status, last_error = :error,
+        available_at = :available_at, processed_at = :processed_at
+    WHERE id = :id
+"""
+
+# Held digest rows, oldest first per recipient; locked so each is digested once
+HELD_SQL = """
+    SELECT o.id, n.id AS notification_id, n.user_id, n.message
+    FROM notification_outbox o
+    JOIN whatsapp_notifications n ON n.id = o.notification_id
+    WHERE o.status = 'held'
+    ORDER BY n.user_id, o.created_at
+    LIMIT :limit
+    FOR UPDATE OF o SKIP LOCKED
+"""
+
+MARK_DIGESTED_SQL = """
+    UPDATE notification_outbox SET status = 'digested', processed_at = :now
+    WHERE id = ANY(:ids)
+"""
+
+STATS_SQL = """
+    SELECT
+        count(*) FILTER (WHERE o.status = 'pending') AS pending,
+        count(*) FILTER (WHERE o.status = 'sending') AS sending,
+        count(*) FILTER (WHERE o.status = 'held') AS held,
+        count(*) FILTER (WHERE o.status = 'sent') AS sent,
+        count(*) FILTER (WHERE o.status = 'failed') AS failed,
+        coalesce(sum(o.coalesced_count), 0) AS coalesced,
+        count(*) FILTER (WHERE o.status = 'digested') AS digested,
+        count(*) FILTER (WHERE n.type = 'digest') AS digests
+    FROM notification_outbox o
+    JOIN whatsapp_notifications n ON n.id = o.notification_id
+"""
+
+# WhatsApp caps a text body at 4096 characters
+DIGEST_MAX_LENGTH = 4000
+
+class DeliveryError(Exception):
+    """A provider could not deliver a message"""
+
+class StubProvider:
+    """Logs messages instead of sending them; for development and tests"""
+
+    def __init__(self, config=None):
+        self.sent = []
+
+    def send(self, recipient, message):
+        self.sent.append((recipient, message))
+        current_app.logger.info('WhatsApp to %s: %s', recipient, message)
+
+class WhatsAppCloudProvider:
+    """Sends text messages through the WhatsApp Business Cloud API"""
+
+    def __init__(self, config):
+        if not config['WHATSAPP_PHONE_NUMBER_ID'] or not config['WHATSAPP_ACCESS_TOKEN']:
+            raise RuntimeError('WHATSAPP_PHONE_NUMBER_ID and WHATSAPP_ACCESS_TOKEN must be set')
+        self.url = f"{config['WHATSAPP_API_URL']}/{config['WHATSAPP_PHONE_NUMBER_ID']}/messages"
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {config['WHATSAPP_ACCESS_TOKEN']}"
+
+    def send(self, recipient, message):
+        try:
+            response = self.session.post(self.url, json={
+                'messaging_product': 'whatsapp',
+                'to': recipient,
+                'type': 'text',
+                'text': {'body': message}
+            }, timeout=10)
+        except requests.RequestException as e:
+            raise DeliveryError(str(e))
+        if response.status_code >= 400:
+            raise DeliveryError(f'{response.status_code}: {response.text[:500]}')
+
+PROVIDERS = {
+    'stub': StubProvider,
+    'whatsapp_cloud': WhatsAppCloudProvider
+}
+
+def get_provider(name=None):
+    """Build the configured delivery provider (NOTIFICATION_PROVIDER)"""
+    config = current_app.config
+    name = name or config['NOTIFICATION_PROVIDER']
+    if name not in PROVIDERS:
+        raise ValueError(f'Unknown notification provider: {name}')
+    return PROVIDERS[name](config)
+
+def dispatch_batch(provider, batch_size=None):
+    """Claim and deliver one batch of pending notifications.
+
+    The batch is claimed in one short transaction, sent with no transaction
+    open, and each result is recorded in its own, so a slow provider holds
+    no locks and a worker that dies mid-batch re-sends at most the message
+    it was sending. Returns (delivered, failed). Failed sends are retried
+    with exponential backoff until NOTIFICATION_MAX_ATTEMPTS, then left as
+    'failed'.
+    """
+    config = current_app.config
+    lease = timedelta(seconds=config['NOTIFICATION_LEASE_SECONDS'])
+    now = datetime.utcnow()
+    leased_until = now + lease
+
+    try:
+        rows = db.session.execute(text(CLAIM_SQL), {
+            'now': now,
+            'limit': batch_size or config['NOTIFICATION_BATCH_SIZE']
+        }).all()
+        if rows:
+            db.session.execute(text(MARK_SENDING_SQL), {
+                'ids': [row[0] for row in rows],
+                'lease_until': leased_until
+            })
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    delivered = failed = 0
+    for outbox_id, attempts, notification_id, message, recipient in rows:
+        attempts += 1
+        renewed_until = datetime.utcnow() + lease
+        renewed = db.session.execute(text(RENEW_LEASE_SQL), {
+            'id': outbox_id,
+            'lease_until': renewed_until,
+            'leased_until': leased_until
+        }).scalar()
+        db.session.commit()
+        if renewed is None:
+            continue
+
+        try:
+            if not recipient:
+                raise DeliveryError('Recipient has no WhatsApp or phone number')
+            provider.send(recipient, message)
+        except Exception as e:
+            failed += 1
+            given_up = attempts >= config['NOTIFICATION_MAX_ATTEMPTS'] or not recipient
+            delay = config['NOTIFICATION_RETRY_SECONDS'] * 2 ** (attempts - 1)
+            finished = datetime.utcnow()
+            db.session.execute(text(MARK_FAILED_SQL), {
+                'id': outbox_id,
+                'status': 'failed' if given_up else 'pending',
+                'error': str(e)[:1000],
+                'available_at': finished + timedelta(seconds=delay),
+                'processed_at': finished if given_up else None
+            })
+        else:
+            delivered += 1
+            finished = datetime.utcnow()
+            db.session.execute(text(MARK_SENT_SQL), {'id': outbox_id, 'now': finished})
+            db.session.execute(text(MARK_DELIVERED_SQL), {'ids': [notification_id], 'now': finished})
+        db.session.commit()
+
+    return delivered, failed
+
+def _digest_parts(messages):
+    """Split messages into digest bodies that fit in one WhatsApp message"""
+    parts = [[]]
+    length = 0
+    for message in messages:
+        message = message[:DIGEST_MAX_LENGTH]
+        if parts[-1] and length + len(message) + 2 > DIGEST_MAX_LENGTH:
+            parts.append([])
+            length = 0
+        parts[-1].append(message)
+        length += len(message) + 2
+    return parts
+
+def build_digests(batch_size=None):
+    """Fold held notifications into one pending digest per recipient.
+
+    Returns (digests, digested): digest messages queued and held rows they
+    replaced. Each digest is an ordinary pending outbox row, so delivery and
+    retries go through dispatch_batch.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+
+    try:
+        rows = db.session.execute(text(HELD_SQL), {
+            'limit': (batch_size or config['NOTIFICATION_BATCH_SIZE']) * 10
+        }).all()
+
+        by_user = {}
+        for outbox_id, notification_id, user_id, message in rows:
+            by_user.setdefault(user_id, []).append(message)
+
+        digests = 0
+        for user_id, messages in by_user.items():
+            parts = _digest_parts(messages)
+            for number, part in enumerate(parts, 1):
+                header = templates.render('digest', Digest(
+                    update_count=len(messages),
+                    part=number,
+                    parts=len(parts)
+                ))
+                notification = WhatsAppNotification(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    message='\n\n'.join([header] + part),
+                    type='digest',
+                    is_delivered=False
+                )
+                db.session.add(notification)
+                db.session.add(NotificationOutbox(notification=notification))
+                digests += 1
+
+        if rows:
+            # The held messages reach the recipient through the digest
+            db.session.execute(text(MARK_DIGESTED_SQL), {'ids': [row[0] for row in rows], 'now': now})
+            db.session.execute(text(MARK_DELIVERED_SQL), {'ids': [row[1] for row in rows], 'now': now})
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return digests, len(rows)
+
+def outbox_stats():
+    """Outbox counters, including sends saved by coalescing and digests"""
+    row = db.session.execute(text(STATS_SQL)).mappings().one()
+    stats = {key: int(value) for key, value in row.items()}
+    stats['sendsSaved'] = stats['coalesced'] + stats['digested'] - stats['digests']
+    return stats
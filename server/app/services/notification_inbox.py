@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import text, update
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import WhatsAppNotification, NotificationCounter
+from app.utils.pagination import keyset_paginate
+
+REBUILD_SQL = """
+    INSERT INTO notification_counters (user_id, unread_count, updated_at)
+    SELECT user_id, count(*) FILTER (WHERE read_at IS NULL AND type <> 'digest'), now()
+    FROM whatsapp_notifications
+    GROUP BY user_id
+"""
+
+ADD_UNREAD_MANY_SQL = """
+    INSERT INTO notification_counters (user_id, unread_count, updated_at)
+    SELECT user_id, 1, :now FROM unnest(CAST(:user_ids AS uuid[])) AS user_id
+    ON CONFLICT (user_id) DO UPDATE
+    SET unread_count = notification_counters.unread_count + 1, updated_at = EXCLUDED.updated_at
+"""
+
+def get_page(user_id, cursor=None, limit=None):
+    """One page of a user's notifications, newest first.
+
+    Digest messages are left out: the updates they bundle are in the inbox
+    already.
+    """
+    query = WhatsAppNotification.query.filter(
+        WhatsAppNotification.user_id == user_id,
+        WhatsAppNotification.type != 'digest'
+    )
+    notifications, next_cursor = keyset_paginate(
+        query,
+        WhatsAppNotification.created_at,
+        WhatsAppNotification.id,
+        cursor=cursor,
+        limit=limit,
+        descending=True
+    )
+    return [notification.to_dict() for notification in notifications], next_cursor
+
+def unread_count(user_id):
+    """The user's unread count: one primary key lookup"""
+    counter = db.session.get(NotificationCounter, user_id)
+    return counter.unread_count if counter else 0
+
+def add_unread(user_id, count=1):
+    """Adjust the user's unread counter in the caller's transaction"""
+    statement = insert(NotificationCounter).values(
+        user_id=user_id,
+        unread_count=max(count, 0),
+        updated_at=datetime.utcnow()
+    )
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            'unread_count': db.func.greatest(NotificationCounter.unread_count + count, 0),
+            'updated_at': statement.excluded.updated_at
+        }
+    ))
+
+def add_unread_many(user_ids):
+    """Add one unread notification for each user, in one statement.
+
+    Pass ids in a stable order: concurrent callers then lock counter rows in
+    the same order and cannot deadlock.
+    """
+    db.session.execute(text(ADD_UNREAD_MANY_SQL), {
+        'user_ids': [str(user_id) for user_id in user_ids],
+        'now': datetime.utcnow()
+    })
+
+def mark_read(user_id, notification_ids=None):
+    """Mark some (or, without ids, all) of a user's notifications read.
+
+    The counter row is locked first, so a notification committed while this
+    runs is either marked read here or counted after. Returns the number of
+    notifications that changed.
+    """
+    db.session.execute(
+        db.select(NotificationCounter.user_id)
+        .where(NotificationCounter.user_id == user_id)
+        .with_for_update()
+    )
+
+    statement = update(WhatsAppNotification).where(
+        WhatsAppNotification.user_id == user_id,
+        WhatsAppNotification.read_at.is_(None),
+        WhatsAppNotification.type != 'digest'
+    )
+    if notification_ids is not None:
+        statement = statement.where(WhatsAppNotification.id.in_(notification_ids))
+
+    changed = db.session.execute(
+        statement.values(read_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if changed:
+        add_unread(user_id, -changed)
+    return changed
+
+def rebuild_counters():
+    """Recount every user's unread notifications from scratch"""
+    db.session.execute(text('TRUNCATE notification_counters'))
+    db.session.execute(text(REBUILD_SQL))
+    db.session.commit()
@@ -0,0 +1,206 @@
+import dataclasses
+from decimal import Decimal
+from string import Formatter
+
+class TemplateError(Exception):
+    """A template refers to a field its context does not have"""
+
+# Typed contexts: one frozen dataclass per template. Properties may derive
+# display values; templates can use fields and properties alike.
+
+@dataclasses.dataclass(frozen=True)
+class OrderAlert:
+    retailer_name: str
+    order_number: str
+    total_amount: Decimal
+    item_count: int
+    delivery_mode: str
+
+    @property
+    def delivery_mode_label(self):
+        return self.delivery_mode.title()
+
+@dataclasses.dataclass(frozen=True)
+class StatusUpdate:
+    order_number: str
+    status: str
+
+    @property
+    def status_label(self):
+        return self.status.title()
+
+@dataclasses.dataclass(frozen=True)
+class DeliveryUpdate:
+    order_number: str
+    delivery_mode: str
+
+    @property
+    def delivery_mode_label(self):
+        return self.delivery_mode.title()
+
+@dataclasses.dataclass(frozen=True)
+class InvoiceReady:
+    order_number: str
+    invoice_number: str
+    total_amount: Decimal
+
+@dataclasses.dataclass(frozen=True)
+class Announcement:
+    distributor_name: str
+    kind: str
+    title: str
+    body: str
+
+@dataclasses.dataclass(frozen=True)
+class Digest:
+    update_count: int
+    part: int
+    parts: int
+
+    @property
+    def part_label(self):
+        return f' {self.part}/{self.parts}' if self.parts > 1 else ''
+
+class CompiledTemplate:
+    """One template compiled into a render function per variant.
+
+    Variant fields (`{emoji}`, ...) are baked in at compile time and context
+    fields become attribute lookups, so each variant is a single f-string
+    evaluated against the context object.
+    """
+
+    def __init__(self, name, context_type, body, variants=None, variant_by=None):
+        self.name = name
+        self.context_type = context_type
+        self.variant_by = variant_by
+        attributes = {field.name for field in dataclasses.fields(context_type)}
+        attributes.update(
+            attr for attr, value in vars(context_type).items() if isinstance(value, property)
+        )
+
+        variants = variants or {}
+        self._default = self._compile(body, variants.get('default', {}), attributes)
+        self._variants = {
+            key: self._compile(body, values, attributes)
+            for key, values in variants.items()
+            if key != 'default'
+        }
+
+    def _compile(self, body, values, attributes):
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(body):
+            parts.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            if field in values:
+                parts.append(str(values[field]).replace('{', '{{').replace('}', '}}'))
+            elif field in attributes:
+                conversion = f'!{conversion}' if conversion else ''
+                spec = f':{spec}' if spec else ''
+                parts.append(f'{{context.{field}{conversion}{spec}}}')
+            else:
+                raise TemplateError(f'Template {self.name!r} uses unknown field {field!r}')
+        # Only field names checked against the context type reach the source
+        return eval(f"lambda context: f{''.join(parts)!r}")
+
+    def render(self, context):
+        """Render one message"""
+        if self.variant_by:
+            return self._variants.get(getattr(context, self.variant_by), self._default)(context)
+        return self._default(context)
+
+    def render_many(self, contexts):
+        """Render a batch of messages, e.g. for a broadcast"""
+        if not self.variant_by:
+            render_one = self._default
+            return [render_one(context) for context in contexts]
+        variants = self._variants
+        default = self._default
+        variant_by = self.variant_by
+        return [
+            variants.get(getattr(context, variant_by), default)(context)
+            for context in contexts
+        ]
+
+class TemplateRegistry:
+    """Notification templates by name, compiled once when registered"""
+
+    def __init__(self):
+        self._templates = {}
+
+    def register(self, name, context_type, body, variants=None, variant_by=None):
+        self._templates[name] = CompiledTemplate(name, context_type, body, variants, variant_by)
+
+    def get(self, name):
+        return self._templates[name]
+
+    def render(self, name, context):
+        """Render template `name` for one context of its context type"""
+        template = self._templates[name]
+        if not isinstance(context, template.context_type):
+            raise TypeError(f'{name} expects {template.context_type.__name__}')
+        return template.render(context)
+
+    def render_many(self, name, contexts):
+        """Render template `name` for every context in `contexts`"""
+        return self._templates[name].render_many(contexts)
+
+templates = TemplateRegistry()
+
+templates.register('order_alert', OrderAlert, (
+    "🛒 New order from {retailer_name}\n"
+    "Order: {order_number}\n"
+    "Amount: ₹{total_amount}\n"
+    "Items: {item_count} products\n"
+    "Delivery Mode: {delivery_mode_label}\n\n"
+    "Please acknowledge:\n"
+    "1️⃣ Accept\n"
+    "2️⃣ Reject"
+))
+
+templates.register('status_update', StatusUpdate, (
+    "{emoji} Order Status Update\n"
+    "Order: {order_number}\n"
+    "Status: {status_label}\n"
+    "{closing}"
+), variant_by='status', variants={
+    'default': {'emoji': '📋', 'closing': ''},
+    'accepted': {'emoji': '✅', 'closing': '\nYour order has been accepted! ✅'},
+    'packed': {'emoji': '📦', 'closing': '\nYour order is packed and ready! 📦'},
+    'dispatched': {'emoji': '🚚', 'closing': '\nYour order is on the way! 🚚'},
+    'delivered': {'emoji': '🎉', 'closing': '\nYour order has been delivered! 🎉'},
+    'rejected': {'emoji': '❌', 'closing': '\nYour order has been rejected. Please contact us.'},
+})
+
+templates.register('delivery_update', DeliveryUpdate, (
+    "{emoji} Delivery Mode Updated\n"
+    "Order: {order_number}\n"
+    "Mode: {delivery_mode_label}\n"
+    "{closing}"
+), variant_by='delivery_mode', variants={
+    'default': {'emoji': '📋', 'closing': ''},
+    'delivery': {'emoji': '🚚', 'closing': '\nWe will deliver your order to your address.'},
+    'pickup': {'emoji': '🏬', 'closing': '\nPlease pick up your order from our location.'},
+})
+
+templates.register('invoice_sent', InvoiceReady, (
+    "📄 Invoice Generated\n"
+    "Order: {order_number}\n"
+    "Invoice: {invoice_number}\n"
+    "Amount: ₹{total_amount}\n\n"
+    "Your invoice is ready for download!"
+))
+
+templates.register('digest', Digest, (
+    "📬 Order Updates ({update_count}){part_label}"
+))
+
+templates.register('announcement', Announcement, (
+    "{emoji} {heading} from {distributor_name}\n"
+    "{title}\n\n"
+    "{body}"
+), variant_by='kind', variants={
+    'default': {'emoji': '📢', 'heading': 'Announcement'},
+    'price_change': {'emoji': '💰', 'heading': 'Price Update'},
+    'stock': {'emoji': '📦', 'heading': 'Stock Update'},
+})
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import WhatsAppNotification, NotificationOutbox
+from app.services import events, notification_inbox
+
+def enqueue(user_id, message, notification_type, coalesce_key=None):
+    """Record a WhatsApp notification and queue it for delivery.
+
+    Only adds rows to the caller's session: they commit (or roll back) with
+    the business write, and the dispatcher delivers them afterwards. The
+    recipient's unread counter is bumped and their event streams are told in
+    the same transaction.
+
+    With a `coalesce_key` (e.g. one per order and notification type) the
+    message waits NOTIFICATION_COALESCE_SECONDS before it is sent, and later
+    updates for the same key and recipient replace its text instead of
+    queuing another send. In digest mode, NOTIFICATION_DIGEST_TYPES are held
+    for the recipient's next digest instead.
+    """
+    config = current_app.config
+    now = datetime.utcnow()
+    digest = (
+        config['NOTIFICATION_DIGEST_SECONDS'] > 0
+        and notification_type in config['NOTIFICATION_DIGEST_TYPES']
+    )
+
+    if coalesce_key and (digest or config['NOTIFICATION_COALESCE_SECONDS'] > 0):
+        pending = _pending_for(user_id, coalesce_key, now)
+        if pending is not None:
+            notification = pending.notification
+            notification.message = message
+            pending.coalesced_count += 1
+            if notification.read_at is not None:
+                # Read in the inbox before the update arrived: unread again
+                notification.read_at = None
+                notification_inbox.add_unread(user_id)
+            events.publish([user_id], 'notification', notification.to_dict())
+            return notification
+
+    notification = WhatsAppNotification(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        message=message,
+        type=notification_type,
+        is_delivered=False,
+        created_at=now
+    )
+    outbox = NotificationOutbox(notification=notification, coalesce_key=coalesce_key)
+    if digest:
+        outbox.status = 'held'
+    elif coalesce_key:
+        outbox.available_at = now + timedelta(seconds=config['NOTIFICATION_COALESCE_SECONDS'])
+
+    db.session.add(notification)
+    db.session.add(outbox)
+    notification_inbox.add_unread(user_id)
+    events.publish([user_id], 'notification', notification.to_dict())
+    return notification
+
+def _pending_for(user_id, coalesce_key, now):
+    """Lock an undelivered row for this key and recipient, if one can still change.
+
+    Rows a dispatcher has already claimed are locked and skipped, as are rows
+    past their window, so a merge never races a send.
+    """
+    return NotificationOutbox.query.join(
+        WhatsAppNotification, WhatsAppNotification.id == NotificationOutbox.notification_id
+    ).filter(
+        NotificationOutbox.coalesce_key == coalesce_key,
+        NotificationOutbox.attempts == 0,
+        WhatsAppNotification.user_id == user_id,
+        db.or_(
+            NotificationOutbox.status == 'held',
+            db.and_(NotificationOutbox.status == 'pending', NotificationOutbox.available_at > now)
+        )
+    ).with_for_update(of=NotificationOutbox, skip_locked=True).first()
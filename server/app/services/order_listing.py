@@ -0,0 +1,80 @@
+from collections import defaultdict
+from sqlalchemy.orm import selectinload
+from app.models import Order, OrderItem, OrderManufacturer
+from app.utils.pagination import keyset_paginate
+
+def serialize_orders(orders):
+    """Serialize orders with their items and products in two extra queries.
+
+    Replaces per-order item queries and per-item product loads with one IN
+    query for all items plus one for their distinct products.
+    """
+    if not orders:
+        return []
+
+    items_by_order = defaultdict(list)
+    items = OrderItem.query.options(
+        selectinload(OrderItem.product)
+    ).filter(
+        OrderItem.order_id.in_([order.id for order in orders])
+    )
+    for item in items:
+        items_by_order[item.order_id].append(item.to_dict())
+
+    return [order.to_dict(items=items_by_order[order.id]) for order in orders]
+
+def load_orders(order_ids):
+    """Load orders by id, keeping the given order"""
+    if not order_ids:
+        return []
+    orders = {order.id: order for order in Order.query.filter(Order.id.in_(order_ids))}
+    return [orders[order_id] for order_id in order_ids if order_id in orders]
+
+def manufacturer_orders(manufacturer_id, distributor_id=None, cursor=None, limit=None):
+    """A manufacturer's orders, newest first, read from the order_manufacturers index.
+
+    Pass `limit` for one page and its next cursor; without it every order is
+    returned and the cursor is None.
+    """
+    links = OrderManufacturer.query.filter_by(manufacturer_id=manufacturer_id)
+    if distributor_id is not None:
+        links = links.filter_by(distributor_id=distributor_id)
+
+    if limit is None:
+        links = links.order_by(
+            OrderManufacturer.created_at.desc(), OrderManufacturer.order_id.desc()
+        ).all()
+        next_cursor = None
+    else:
+        links, next_cursor = keyset_paginate(
+            links,
+            OrderManufacturer.created_at,
+            OrderManufacturer.order_id,
+            cursor=cursor,
+            limit=limit,
+            descending=True
+        )
+    return load_orders([link.order_id for link in links]), next_cursor
+
+def get_page(user, cursor=None, limit=None):
+    """One page of a user's orders, newest first, with items and products"""
+    if user.role == 'manufacturer':
+        orders, next_cursor = manufacturer_orders(user.id, cursor=cursor, limit=limit)
+        return serialize_orders(orders), next_cursor
+
+    if user.role == 'retailer':
+        query = Order.query.filter_by(retailer_id=user.id)
+    elif user.role == 'distributor':
+        query = Order.query.filter_by(distributor_id=user.id)
+    else:
+        raise ValueError('Invalid user role')
+
+    orders, next_cursor = keyset_paginate(
+        query,
+        Order.created_at,
+        Order.id,
+        cursor=cursor,
+        limit=limit,
+        descending=True
+    )
+    return serialize_orders(orders), next_cursor
@@ -0,0 +1,34 @@
+from sqlalchemy import insert, text
+from app import db
+from app.models import OrderManufacturer
+
+REBUILD_SQL = """
+    INSERT INTO order_manufacturers (order_id, manufacturer_id, distributor_id, created_at)
+    SELECT DISTINCT o.id, p.manufacturer_id, o.distributor_id, coalesce(o.created_at, now())
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    JOIN products p ON p.id = oi.product_id
+    WHERE p.manufacturer_id IS NOT NULL
+    ON CONFLICT (order_id, manufacturer_id) DO NOTHING
+"""
+
+def link(order, manufacturer_ids):
+    """Record the manufacturers of a new order, in the caller's transaction"""
+    rows = [
+        {
+            'order_id': order.id,
+            'manufacturer_id': manufacturer_id,
+            'distributor_id': order.distributor_id,
+            'created_at': order.created_at
+        }
+        for manufacturer_id in set(manufacturer_ids)
+        if manufacturer_id is not None
+    ]
+    if rows:
+        db.session.execute(insert(OrderManufacturer), rows)
+
+def rebuild():
+    """Rebuild the whole mapping from order items"""
+    db.session.execute(text('TRUNCATE order_manufacturers'))
+    db.session.execute(text(REBUILD_SQL))
+    db.session.commit()
@@ -0,0 +1,137 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert
+from app import db
+from app.models import User, Order, OrderItem, Product
+from app.services import events, leaderboards, notifications, order_manufacturers, order_stats
+from app.services.notification_templates import templates, OrderAlert
+
+class OrderRejected(Exception):
+    """Order input the caller has to fix, with the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def parse_items(items):
+    """Validate raw request items into (product_id, quantity, unit_price, total_price)"""
+    lines = []
+    for item_data in items:
+        if not isinstance(item_data, dict):
+            raise OrderRejected('Invalid item data')
+
+        quantity = item_data.get('quantity', 0)
+        try:
+            product_id = uuid.UUID(str(item_data.get('productId')))
+            unit_price = Decimal(str(item_data.get('unitPrice', 0)))
+        except (ValueError, InvalidOperation):
+            raise OrderRejected('Invalid item data')
+
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise OrderRejected('Invalid item data')
+        if not unit_price.is_finite() or unit_price <= 0:
+            raise OrderRejected('Invalid item data')
+
+        lines.append((product_id, quantity, unit_price, unit_price * quantity))
+    return lines
+
+def place_order(retailer, distributor_id, items, notes=None, delivery_mode='delivery'):
+    """Create an order, its items and the distributor alert in one transaction.
+
+    Products are validated with a single IN query and the items go in as one
+    multi-row insert. The alert is only queued in the outbox; the response is
+    serialized before commit, so nothing is read back afterwards. Both parties'
+    open event streams are told about the order on commit.
+    """
+    lines = parse_items(items)
+
+    try:
+        distributor = db.session.get(User, uuid.UUID(str(distributor_id)))
+    except ValueError:
+        distributor = None
+    if not distributor or distributor.role != 'distributor':
+        raise OrderRejected('Invalid distributor')
+
+    product_ids = {line[0] for line in lines}
+    products = {
+        product.id: product
+        for product in Product.query.filter(Product.id.in_(product_ids))
+    }
+    for product_id, _, _, _ in lines:
+        if product_id not in products:
+            raise OrderRejected(f'Product {product_id} not found', status=404)
+
+    order_number = f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+    total_amount = sum(line[3] for line in lines)
+    now = datetime.utcnow()
+
+    new_order = Order(
+        id=uuid.uuid4(),
+        order_number=order_number,
+        retailer_id=retailer.id,
+        distributor_id=distributor.id,
+        status='pending',
+        delivery_mode=delivery_mode,
+        total_amount=total_amount,
+        notes=notes,
+        created_at=now,
+        updated_at=now
+    )
+
+    message = templates.render('order_alert', OrderAlert(
+        retailer_name=f'{retailer.first_name} {retailer.last_name}',
+        order_number=order_number,
+        total_amount=total_amount,
+        item_count=len(lines),
+        delivery_mode=delivery_mode
+    ))
+
+    item_rows = [
+        {
+            'id': uuid.uuid4(),
+            'order_id': new_order.id,
+            'product_id': product_id,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': total_price
+        }
+        for product_id, quantity, unit_price, total_price in lines
+    ]
+
+    try:
+        db.session.add(new_order)
+        notifications.enqueue(distributor.id, message, 'order_alert')
+        db.session.flush()
+        db.session.execute(insert(OrderItem), item_rows)
+        order_manufacturers.link(new_order, (product.manufacturer_id for product in products.values()))
+        order_stats.order_created(new_order, [
+            (products[product_id].manufacturer_id, total_price, quantity)
+            for product_id, quantity, _, total_price in lines
+        ])
+        leaderboards.order_created(new_order, [
+            (product_id, products[product_id].manufacturer_id, quantity, total_price)
+            for product_id, quantity, _, total_price in lines
+        ])
+        events.publish_order(new_order, 'order.created')
+
+        order_data = new_order.to_dict(items=[
+            {
+                'id': str(row['id']),
+                'orderId': str(row['order_id']),
+                'productId': str(row['product_id']),
+                'quantity': row['quantity'],
+                'unitPrice': float(row['unit_price']),
+                'totalPrice': float(row['total_price']),
+                'product': products[row['product_id']].to_dict()
+            }
+            for row in item_rows
+        ])
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return order_data
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import OrderDailyStat, OrderStatTotal
+
+# A manufacturer's share of one order: their products' lines only
+MANUFACTURER_SHARES_SQL = """
+    SELECT p.manufacturer_id, sum(oi.total_price), sum(oi.quantity)
+    FROM order_items oi
+    JOIN products p ON p.id = oi.product_id
+    WHERE oi.order_id = :order_id AND p.manufacturer_id IS NOT NULL
+    GROUP BY p.manufacturer_id
+"""
+
+REBUILD_DAILY_SQL = """
+    WITH orders_with_items AS (
+        SELECT o.id, o.retailer_id, o.distributor_id, coalesce(o.status, 'pending') AS status,
+               coalesce(o.created_at, now())::date AS day,
+               coalesce(o.total_amount, 0) AS revenue,
+               coalesce((SELECT sum(quantity) FROM order_items WHERE order_id = o.id), 0) AS items
+        FROM orders o
+    ),
+    shares AS (
+        SELECT retailer_id AS user_id, 'retailer' AS role, day, status, 1 AS orders, revenue, items
+        FROM orders_with_items
+        UNION ALL
+        SELECT distributor_id, 'distributor', day, status, 1, revenue, items
+        FROM orders_with_items
+        UNION ALL
+        SELECT p.manufacturer_id, 'manufacturer', coalesce(o.created_at, now())::date,
+               coalesce(o.status, 'pending'),
+               1, sum(oi.total_price), sum(oi.quantity)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        JOIN products p ON p.id = oi.product_id
+        WHERE p.manufacturer_id IS NOT NULL
+        GROUP BY o.id, p.manufacturer_id
+    )
+    INSERT INTO order_daily_stats (user_id, role, day, status, order_count, revenue, item_count)
+    SELECT user_id, role, day, status, sum(orders), sum(revenue), sum(items)
+    FROM shares
+    GROUP BY user_id, role, day, status
+"""
+
+REBUILD_TOTALS_SQL = """
+    INSERT INTO order_stat_totals (user_id, role, status, order_count, revenue, item_count)
+    SELECT user_id, role, status, sum(order_count), sum(revenue), sum(item_count)
+    FROM order_daily_stats
+    GROUP BY user_id, role, status
+"""
+
+BUMP_VERSION_SQL = """
+    INSERT INTO order_stats_version (id, version, updated_at) VALUES (1, 1, now())
+    ON CONFLICT (id) DO UPDATE SET version = order_stats_version.version + 1, updated_at = now()
+"""
+
+def _upsert(model, rows, key):
+    """Add the deltas in `rows` to existing rollup rows, creating missing ones"""
+    # Stable order, so concurrent writers lock shared rows in the same order
+    rows = sorted(rows, key=lambda row: tuple(str(row[column]) for column in key))
+    statement = insert(model).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=key,
+        set_={
+            'order_count': model.order_count + statement.excluded.order_count,
+            'revenue': model.revenue + statement.excluded.revenue,
+            'item_count': model.item_count + statement.excluded.item_count
+        }
+    ))
+
+def _apply(order, shares, changes):
+    """Add an order's shares to the rollups, once per (status, sign) in `changes`.
+
+    sign is 1 to count the order under that status and -1 to take it out.
+    """
+    day = (order.created_at or datetime.utcnow()).date()
+    daily = []
+    totals = []
+    for status, sign in changes:
+        for (user_id, role), (revenue, items) in shares.items():
+            values = {
+                'user_id': user_id,
+                'role': role,
+                'status': status or 'pending',
+                'order_count': sign,
+                'revenue': sign * revenue,
+                'item_count': sign * items
+            }
+            totals.append(values)
+            daily.append(dict(values, day=day))
+    if daily:
+        _upsert(OrderDailyStat, daily, ['user_id', 'role', 'day', 'status'])
+        _upsert(OrderStatTotal, totals, ['user_id', 'role', 'status'])
+
+def shares_for_lines(order, lines):
+    """Each participant's (revenue, units) for a new order.
+
+    `lines` are (manufacturer_id, total_price, quantity) per order item.
+    """
+    units = sum(quantity for _, _, quantity in lines)
+    shares = {
+        (order.retailer_id, 'retailer'): (order.total_amount or Decimal(0), units),
+        (order.distributor_id, 'distributor'): (order.total_amount or Decimal(0), units)
+    }
+    by_manufacturer = defaultdict(lambda: [Decimal(0), 0])
+    for manufacturer_id, total_price, quantity in lines:
+        if manufacturer_id is not None:
+            by_manufacturer[manufacturer_id][0] += total_price
+            by_manufacturer[manufacturer_id][1] += quantity
+    for manufacturer_id, (revenue, quantity) in by_manufacturer.items():
+        shares[(manufacturer_id, 'manufacturer')] = (revenue, quantity)
+    return shares
+
+def _load_shares(order):
+    """Each participant's (revenue, units) for an existing order"""
+    rows = db.session.execute(text(MANUFACTURER_SHARES_SQL), {'order_id': order.id}).all()
+    units = db.session.execute(
+        text('SELECT coalesce(sum(quantity), 0) FROM order_items WHERE order_id = :order_id'),
+        {'order_id': order.id}
+    ).scalar()
+    shares = {
+        (order.retailer_id, 'retailer'): (order.total_amount or Decimal(0), units),
+        (order.distributor_id, 'distributor'): (order.total_amount or Decimal(0), units)
+    }
+    for manufacturer_id, revenue, quantity in rows:
+        shares[(manufacturer_id, 'manufacturer')] = (revenue, quantity)
+    return shares
+
+def order_created(order, lines):
+    """Count a new order, in the caller's transaction"""
+    _apply(order, shares_for_lines(order, lines), [(order.status, 1)])
+
+def status_changed(order, old_status):
+    """Move an order from its old status to its current one"""
+    if old_status == order.status:
+        return
+    _apply(order, _load_shares(order), [(old_status, -1), (order.status, 1)])
+
+def totals(user_id, role):
+    """All-time {status: (orders, revenue, units)} for one user: a PK range scan"""
+    rows = OrderStatTotal.query.filter_by(user_id=user_id, role=role)
+    return {
+        row.status: (row.order_count, row.revenue, row.item_count)
+        for row in rows
+        if row.order_count
+    }
+
+def current_version():
+    """Current rollup version, shared by every worker through the database"""
+    return db.session.execute(
+        text('SELECT version FROM order_stats_version WHERE id = 1')
+    ).scalar() or 0
+
+def bump_version():
+    """Invalidate every cached time series bucket, in the caller's transaction.
+
+    For writes that rewrite past days instead of adding today's orders.
+    """
+    db.session.execute(text(BUMP_VERSION_SQL))
+
+def rebuild():
+    """Recompute every rollup from orders and order items"""
+    db.session.execute(text('TRUNCATE order_daily_stats, order_stat_totals'))
+    db.session.execute(text(REBUILD_DAILY_SQL))
+    db.session.execute(text(REBUILD_TOTALS_SQL))
+    bump_version()
+    db.session.commit()
@@ -0,0 +1,164 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.services import order_stats
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Sums across statuses, so a status change never moves an order between
+# buckets: only the current day's bucket still changes
+BUCKETS_SQL = """
+    SELECT date_trunc(:granularity, day)::date AS bucket,
+           sum(order_count), sum(revenue), sum(item_count)
+    FROM order_daily_stats
+    WHERE user_id = :user_id AND role = :role AND day >= :start AND day < :stop
+    GROUP BY 1
+"""
+
+EMPTY = (0, Decimal(0), 0)
+
+def bucket_start(day, granularity):
+    """First day of the bucket containing `day` (weeks start on Monday)"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start, granularity):
+    """First day of the bucket after the one starting at `start`"""
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+class BucketCache:
+    """Finished buckets per user, role and granularity, keyed by rollup version.
+
+    A bucket that ended before today (plus TIMESERIES_CACHE_GRACE_SECONDS, for
+    orders that commit late) no longer changes unless the rollups are
+    rewritten, which bumps the version in the database: entries from an older
+    version are dropped as soon as a newer one is seen, in every worker. The
+    cache is bounded by TIMESERIES_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_many(self, version, keys):
+        found = {}
+        with self._lock:
+            if version != self._version:
+                return found
+            for key in keys:
+                values = self._entries.get(key)
+                if values is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = values
+        return found
+
+    def put_many(self, version, items):
+        limit = current_app.config['TIMESERIES_CACHE_MAX_ENTRIES']
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._entries.clear()
+                self._version = version
+            elif version < self._version:
+                return
+            self._entries.update(items)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+cache = BucketCache()
+
+def series(user_id, role, granularity, start, end):
+    """Orders, revenue and units per bucket from `start` to `end`, gaps filled.
+
+    The range is widened to whole buckets. Finished buckets come from the
+    cache; everything else is read in one grouped query over the daily rollup.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError('Granularity must be day, week or month')
+    if start > end:
+        raise ValueError('from must not be after to')
+
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+        if len(buckets) > current_app.config['TIMESERIES_MAX_BUCKETS']:
+            raise ValueError('Range is too long for this granularity')
+    stop = current
+
+    # Read the version before the rollups: a racing rebuild can then only
+    # leave newer figures under an older version, which the bump replaces
+    version = order_stats.current_version()
+    grace = timedelta(seconds=current_app.config['TIMESERIES_CACHE_GRACE_SECONDS'])
+    settled = (datetime.utcnow() - grace).date()
+    keys = [(user_id, role, granularity, bucket) for bucket in buckets]
+    values = {key[3]: value for key, value in cache.get_many(version, keys).items()}
+
+    missing = [bucket for bucket in buckets if bucket not in values]
+    if missing:
+        rows = db.session.execute(text(BUCKETS_SQL), {
+            'granularity': granularity,
+            'user_id': user_id,
+            'role': role,
+            'start': missing[0],
+            'stop': next_bucket(missing[-1], granularity)
+        })
+        fetched = {bucket: (orders, revenue, items) for bucket, orders, revenue, items in rows}
+
+        finished = {}
+        for bucket in missing:
+            values[bucket] = fetched.get(bucket, EMPTY)
+            if next_bucket(bucket, granularity) <= settled:
+                finished[(user_id, role, granularity, bucket)] = values[bucket]
+        if finished:
+            cache.put_many(version, finished)
+
+    return {
+        'granularity': granularity,
+        'from': buckets[0].isoformat(),
+        'to': (stop - timedelta(days=1)).isoformat(),
+        'buckets': [
+            {
+                'start': bucket.isoformat(),
+                'orders': int(values[bucket][0]),
+                'revenue': float(values[bucket][1]),
+                'items': int(values[bucket][2])
+            }
+            for bucket in buckets
+        ]
+    }
+
+def default_range(granularity, end=None):
+    """The last 30 days, 12 weeks or 12 months up to `end` (today by default)"""
+    end = end or datetime.utcnow().date()
+    if granularity == 'day':
+        return end - timedelta(days=29), end
+    if granularity == 'week':
+        return end - timedelta(weeks=11), end
+    start = end.replace(day=1)
+    for _ in range(11):
+        start = (start - timedelta(days=1)).replace(day=1)
+    return start, end
+
+def parse_date(value, name):
+    """Parse a YYYY-MM-DD query parameter"""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.services import distributor_catalog
+from app.services.catalog_snapshot import bump_version
+
+FORMATS = ('csv', 'ndjson')
+
+STAGING_COLUMNS = (
+    'line_no', 'name', 'description', 'sku', 'category_id', 'image_url', 'base_price'
+)
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE product_import_staging (
+        line_no INTEGER NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        sku VARCHAR(255) NOT NULL,
+        category_id UUID,
+        image_url TEXT,
+        base_price NUMERIC(10, 2)
+    ) ON COMMIT DROP
+"""
+
+# A later line for the same SKU wins; earlier ones are reported and dropped
+DUPLICATE_LINES_SQL = """
+    DELETE FROM product_import_staging s
+    USING product_import_staging later
+    WHERE later.sku = s.sku AND later.line_no > s.line_no
+    RETURNING s.line_no, s.sku
+"""
+
+UNKNOWN_CATEGORY_SQL = """
+    DELETE FROM product_import_staging s
+    WHERE s.category_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM categories c WHERE c.id = s.category_id)
+    RETURNING s.line_no, s.sku
+"""
+
+FOREIGN_SKU_SQL = """
+    DELETE FROM product_import_staging s
+    USING products p
+    WHERE p.sku = s.sku AND p.manufacturer_id IS DISTINCT FROM CAST(:manufacturer_id AS UUID)
+    RETURNING s.line_no, s.sku
+"""
+
+UPSERT_SQL = """
+    INSERT INTO products (
+        id, name, description, sku, category_id, manufacturer_id,
+        image_url, base_price, is_active, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), name, description, sku, category_id, CAST(:manufacturer_id AS UUID),
+           image_url, base_price, true, now(), now()
+    FROM product_import_staging
+    ON CONFLICT (sku) DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        category_id = EXCLUDED.category_id,
+        image_url = EXCLUDED.image_url,
+        base_price = EXCLUDED.base_price,
+        is_active = true,
+        updated_at = now()
+    RETURNING (xmax = 0) AS inserted
+"""
+
+class ImportReport:
+    """Counters and per-row errors for one import run"""
+
+    def __init__(self, max_errors):
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.elapsed = 0
+
+    def add_error(self, line_no, sku, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_no, 'sku': sku, 'error': message})
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'received': self.received,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errorsTruncated': self.failed > len(self.errors),
+            'elapsedSeconds': round(self.elapsed, 3),
+            'rowsPerSecond': int(self.received / self.elapsed) if self.elapsed else None
+        }
+
+def detect_format(filename=None, content_type=None):
+    """Guess the upload format from a file name or content type"""
+    if filename:
+        if filename.endswith('.csv'):
+            return 'csv'
+        if filename.endswith(('.ndjson', '.jsonl')):
+            return 'ndjson'
+    if content_type:
+        if 'csv' in content_type:
+            return 'csv'
+        if 'ndjson' in content_type or 'jsonl' in content_type:
+            return 'ndjson'
+    return None
+
+def iter_records(stream, fmt):
+    """Stream (line number, record) pairs from a binary CSV or NDJSON stream"""
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='' if fmt == 'csv' else None)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_no, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_no, record
+
+def validate_record(record):
+    """Normalize one record into staging column values, or raise ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError('Malformed record')
+
+    name = str(record.get('name') or '').strip()
+    sku = str(record.get('sku') or '').strip()
+    if not name:
+        raise ValueError('Missing required field: name')
+    if not sku:
+        raise ValueError('Missing required field: sku')
+    if len(name) > 255 or len(sku) > 255:
+        raise ValueError('name and sku must be at most 255 characters')
+
+    category_id = record.get('categoryId') or None
+    if category_id:
+        try:
+            category_id = str(uuid.UUID(str(category_id)))
+        except ValueError:
+            raise ValueError('Invalid categoryId')
+
+    base_price = record.get('basePrice')
+    if base_price in (None, ''):
+        base_price = None
+    else:
+        try:
+            base_price = Decimal(str(base_price)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError('Invalid basePrice')
+        if base_price < 0 or base_price >= Decimal('100000000'):
+            raise ValueError('basePrice out of range')
+
+    return (
+        name,
+        record.get('description') or None,
+        sku,
+        category_id,
+        record.get('imageUrl') or None,
+        base_price
+    )
+
+def _copy_batch(cursor, rows):
+    # COPY's CSV format reads unquoted empty fields as NULL, which is how
+    # csv.writer renders None; required text fields are never empty
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY product_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def import_products(stream, fmt, manufacturer_id=None):
+    """Stream-load products into a staging table, then upsert them on SKU.
+
+    Records are validated and COPYed in batches of IMPORT_BATCH_SIZE, so memory
+    stays flat; the final upsert is one set-based statement in one transaction.
+    """
+    config = current_app.config
+    batch_size = config['IMPORT_BATCH_SIZE']
+    report = ImportReport(config['IMPORT_MAX_ERRORS'])
+    params = {'manufacturer_id': str(manufacturer_id) if manufacturer_id else None}
+
+    try:
+        db.session.execute(text(CREATE_STAGING_SQL))
+        cursor = db.session.connection().connection.cursor()
+
+        batch = []
+        for line_no, record in iter_records(stream, fmt):
+            report.received += 1
+            try:
+                batch.append((line_no,) + validate_record(record))
+            except ValueError as e:
+                sku = record.get('sku') if isinstance(record, dict) else None
+                report.add_error(line_no, sku, str(e))
+                continue
+
+            if len(batch) >= batch_size:
+                _copy_batch(cursor, batch)
+                batch = []
+
+        if batch:
+            _copy_batch(cursor, batch)
+
+        for line_no, sku in db.session.execute(text(DUPLICATE_LINES_SQL)):
+            report.add_error(line_no, sku, 'Duplicate SKU in file; a later line replaces it')
+        for line_no, sku in db.session.execute(text(UNKNOWN_CATEGORY_SQL)):
+            report.add_error(line_no, sku, 'Unknown categoryId')
+        for line_no, sku in db.session.execute(text(FOREIGN_SKU_SQL), params):
+            report.add_error(line_no, sku, 'SKU belongs to another manufacturer')
+
+        for (inserted,) in db.session.execute(text(UPSERT_SQL), params):
+            if inserted:
+                report.inserted += 1
+            else:
+                report.updated += 1
+
+        # The upsert bypasses the ORM, so refresh the derived read models here
+        db.session.execute(text(distributor_catalog.REFRESH_SQL.format(
+            where='WHERE p.sku IN (SELECT sku FROM product_import_staging)'
+        )))
+        bump_version()
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        report.elapsed = time.perf_counter() - report.started
+
+    return report
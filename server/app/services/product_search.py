@@ -0,0 +1,81 @@
+from app import db
+from app.models import Product
+from app.models.product import SEARCH_VECTOR_EXPRESSION
+from app.utils.pagination import keyset_paginate, encode_rank_cursor, decode_rank_cursor
+from sqlalchemy import cast, func, or_, text, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+
+# Brings an existing products table up to the schema declared on the model
+SEARCH_DDL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector '
+    f'GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED',
+    'CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING gin (search_vector)',
+    'CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING gin (sku gin_trgm_ops)',
+]
+
+def install_search_schema():
+    """Add the search column and indexes to an existing database"""
+    for statement in SEARCH_DDL:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+def search(term, category_id=None, cursor=None, limit=20):
+    """Relevance-ranked search over active products.
+
+    Matches the full-text vector or a pg_trgm similarity hit on name/SKU, so
+    small typos still find products. Returns the page and the next cursor.
+    """
+    query = Product.query.filter_by(is_active=True)
+
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+
+    # Without a term there is nothing to rank, so fall back to catalog order
+    if not term:
+        return keyset_paginate(query, Product.created_at, Product.id, cursor=cursor, limit=limit)
+
+    ts_query = func.websearch_to_tsquery('english', term)
+    # Ranks are real (float4); widen them so cursors round-trip exactly
+    rank = cast(
+        func.ts_rank_cd(Product.search_vector, ts_query) +
+        func.greatest(func.similarity(Product.name, term), func.similarity(Product.sku, term)),
+        DOUBLE_PRECISION
+    )
+
+    query = query.filter(
+        or_(
+            Product.search_vector.op('@@')(ts_query),
+            Product.name.op('%')(term),
+            Product.sku.op('%')(term)
+        )
+    ).add_columns(rank.label('rank'))
+
+    if cursor:
+        query = query.filter(tuple_(rank, Product.id) < decode_rank_cursor(cursor))
+
+    rows = query.order_by(rank.desc(), Product.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_product, last_rank = rows[-1]
+        next_cursor = encode_rank_cursor(last_rank, last_product.id)
+
+    return [product for product, _ in rows], next_cursor
+
+def ilike_search(term, category_id=None, limit=20):
+    """The original unranked ILIKE scan, kept for benchmarking"""
+    query = Product.query.filter_by(is_active=True).filter(
+        or_(
+            Product.name.ilike(f'%{term}%'),
+            Product.description.ilike(f'%{term}%'),
+            Product.sku.ilike(f'%{term}%')
+        )
+    )
+
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+
+    return query.order_by(Product.created_at, Product.id).limit(limit).all()
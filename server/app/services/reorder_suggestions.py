@@ -0,0 +1,264 @@
+import itertools
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import ReorderSuggestionList, Product, User
+
+# Rejected and cancelled orders were never received, so they say nothing
+# about consumption
+EXCLUDED_STATUSES = ('rejected', 'cancelled')
+
+EPOCH = date(1970, 1, 1)
+
+RETAILERS_SQL = """
+    SELECT DISTINCT retailer_id
+    FROM orders
+    WHERE created_at >= :since AND coalesce(status, 'pending') <> ALL(CAST(:excluded AS text[]))
+    ORDER BY retailer_id
+"""
+
+# One row per (retailer, distributor, product) series: its order days (days
+# since 1970-01-01) and the units ordered on each, oldest first. Ids come back
+# as text and the days and units as arrays, so the driver parses one row per
+# series instead of three UUIDs per order line.
+HISTORY_SQL = """
+    SELECT retailer_id::text, distributor_id::text, product_id::text,
+           array_agg(day ORDER BY day), array_agg(units ORDER BY day)
+    FROM (
+        SELECT o.retailer_id, o.distributor_id, oi.product_id,
+               o.created_at::date - DATE '1970-01-01' AS day, sum(oi.quantity) AS units
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.retailer_id = ANY(CAST(:retailer_ids AS uuid[]))
+          AND o.created_at >= :since
+          AND coalesce(o.status, 'pending') <> ALL(CAST(:excluded AS text[]))
+        GROUP BY o.retailer_id, o.distributor_id, oi.product_id, day
+    ) daily
+    GROUP BY retailer_id, distributor_id, product_id
+    HAVING count(*) >= :min_orders
+"""
+
+class HistorySnapshot:
+    """One batch of order history as flat arrays, one element per order day.
+
+    `keys[g]` is the (retailer_id, distributor_id, product_id) of series g;
+    `group`, `day` (days since 1970-01-01) and `units` are sorted by series,
+    then day.
+    """
+
+    def __init__(self, rows):
+        self.keys = [row[:3] for row in rows]
+        lengths = np.fromiter((len(row[3]) for row in rows), dtype=np.int64, count=len(rows))
+        total = int(lengths.sum())
+        self.group = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+        self.day = np.fromiter(itertools.chain.from_iterable(row[3] for row in rows), dtype=np.int64, count=total)
+        self.units = np.fromiter(itertools.chain.from_iterable(row[4] for row in rows), dtype=np.float64, count=total)
+
+def load(connection, retailer_ids, since, min_orders):
+    """Snapshot the history of a batch of retailers with one query"""
+    rows = connection.execute(text(HISTORY_SQL), {
+        'retailer_ids': [str(retailer_id) for retailer_id in retailer_ids],
+        'since': since,
+        'excluded': list(EXCLUDED_STATUSES),
+        'min_orders': min_orders
+    }).all()
+    return HistorySnapshot(rows)
+
+def compute(group, day, units, window, min_orders):
+    """Consumption rates and predicted reorder days for every series at once.
+
+    Each order's units are taken to last until the next order, so over the
+    last `window` reorder intervals of a series the daily rate is the units
+    ordered at the start of those intervals divided by the days they span.
+    Windowed sums come from prefix sums, so there is no per-series loop.
+    Series with fewer than `min_orders` order days are skipped.
+
+    Returns arrays (group, rate, interval, last_day, next_day, quantity,
+    orders), one element per series.
+    """
+    if len(group) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty.astype(np.float64), empty.astype(np.float64), empty, empty, empty, empty
+
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    ends = np.r_[starts[1:], len(group)] - 1
+    orders = ends - starts + 1
+    keep = orders >= min_orders
+    starts, ends, orders = starts[keep], ends[keep], orders[keep]
+
+    # gaps[k] is the interval ending at order day k; within a series the
+    # window below never reaches a series' first element
+    gaps = np.diff(day, prepend=day[0]).astype(np.float64)
+    gap_sums = np.r_[0.0, np.cumsum(gaps)]
+    unit_sums = np.r_[0.0, np.cumsum(units)]
+
+    # Window of up to `window` intervals ending at the latest order day
+    first = np.maximum(starts + 1, ends - window + 1)
+    intervals = ends - first + 1
+    span = gap_sums[ends + 1] - gap_sums[first]
+    consumed = unit_sums[ends] - unit_sums[first - 1]
+
+    rate = consumed / span
+    last_day = day[ends]
+    next_day = last_day + np.ceil(units[ends] / rate).astype(np.int64)
+    quantity = np.ceil(consumed / intervals).astype(np.int64)
+    return group[ends], rate, span / intervals, last_day, next_day, quantity, orders
+
+# Set in each pool process by _start_worker
+_engine = None
+
+def _start_worker(database_uri):
+    global _engine
+    _engine = create_engine(database_uri, pool_size=1)
+
+def _load_and_compute(connection, retailer_ids, since, window, min_orders):
+    """One batch, from history query to (series keys, computed arrays)"""
+    snapshot = load(connection, retailer_ids, since, min_orders)
+    return snapshot.keys, compute(snapshot.group, snapshot.day, snapshot.units, window, min_orders)
+
+def _run_batch(retailer_ids, since, window, min_orders):
+    """A batch in a pool process, on its own connection, so the history
+    queries of several batches run in parallel on the database as well"""
+    with _engine.connect() as connection:
+        return _load_and_compute(connection, retailer_ids, since, window, min_orders)
+
+def _suggestions(keys, result):
+    """Per-retailer suggestion lists from one computed batch"""
+    groups, rates, intervals, last_days, next_days, quantities, orders = result
+    keys = [keys[group] for group in groups.tolist()]
+
+    product_ids = {product_id for _, _, product_id in keys}
+    distributor_ids = {distributor_id for _, distributor_id, _ in keys}
+    products = {
+        str(product.id): product
+        for product in Product.query.filter(Product.id.in_(product_ids))
+    } if product_ids else {}
+    distributors = {
+        str(user.id): user.business_name or f'{user.first_name} {user.last_name}'
+        for user in User.query.filter(User.id.in_(distributor_ids))
+    } if distributor_ids else {}
+
+    by_retailer = {}
+    for (retailer_id, distributor_id, product_id), rate, interval, last_day, next_day, quantity, count in zip(
+        keys, rates.tolist(), intervals.tolist(), last_days.tolist(),
+        next_days.tolist(), quantities.tolist(), orders.tolist()
+    ):
+        product = products.get(product_id)
+        by_retailer.setdefault(retailer_id, []).append({
+            'productId': product_id,
+            'productName': product.name if product else None,
+            'sku': product.sku if product else None,
+            'distributorId': distributor_id,
+            'distributorName': distributors.get(distributor_id),
+            'dailyRate': round(rate, 3),
+            'averageIntervalDays': round(interval, 1),
+            'lastOrderedOn': (EPOCH + timedelta(days=last_day)).isoformat(),
+            'nextOrderOn': (EPOCH + timedelta(days=next_day)).isoformat(),
+            'suggestedQuantity': quantity,
+            'orderCount': count
+        })
+
+    limit = current_app.config['SUGGESTION_MAX_PER_RETAILER']
+    for suggestions in by_retailer.values():
+        suggestions.sort(key=lambda suggestion: (suggestion['nextOrderOn'], suggestion['productId']))
+        del suggestions[limit:]
+    return by_retailer
+
+def _store(by_retailer, computed_at):
+    """Replace the stored lists of the retailers in one computed batch"""
+    if by_retailer:
+        statement = insert(ReorderSuggestionList).values([
+            {'retailer_id': uuid.UUID(retailer_id), 'suggestions': suggestions, 'computed_at': computed_at}
+            for retailer_id, suggestions in sorted(by_retailer.items())
+        ])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['retailer_id'],
+            set_={'suggestions': statement.excluded.suggestions, 'computed_at': statement.excluded.computed_at}
+        ))
+    db.session.commit()
+
+def compute_all(workers=None, progress=None):
+    """Recompute every retailer's suggestions; the nightly batch.
+
+    Retailers are split into batches of SUGGESTION_BATCH_SIZE. A pool of
+    `workers` processes loads and computes the batches (0 does it all in this
+    process); this process names the results and stores them, committing
+    each batch on its own. Lists of retailers that no longer have any
+    suggestion are dropped at the end. `progress(done, total)` is called
+    after every batch.
+
+    Returns a summary with the retailer and suggestion counts and throughput.
+    """
+    config = current_app.config
+    workers = config['SUGGESTION_WORKERS'] if workers is None else workers
+    batch_size = config['SUGGESTION_BATCH_SIZE']
+    window = config['SUGGESTION_WINDOW']
+    min_orders = config['SUGGESTION_MIN_ORDERS']
+
+    started = time.perf_counter()
+    computed_at = datetime.utcnow()
+    since = computed_at - timedelta(days=config['SUGGESTION_LOOKBACK_DAYS'])
+
+    retailer_ids = db.session.execute(text(RETAILERS_SQL), {
+        'since': since,
+        'excluded': list(EXCLUDED_STATUSES)
+    }).scalars().all()
+    batches = [retailer_ids[start:start + batch_size] for start in range(0, len(retailer_ids), batch_size)]
+
+    retailers = suggestions = 0
+    def results():
+        if workers == 0:
+            for batch in batches:
+                yield _load_and_compute(db.session, batch, since, window, min_orders)
+            return
+        # Fresh interpreters: no app, session or connection is inherited
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_start_worker,
+            initargs=(db.engine.url.render_as_string(hide_password=False),)
+        ) as pool:
+            futures = [pool.submit(_run_batch, batch, since, window, min_orders) for batch in batches]
+            for future in as_completed(futures):
+                yield future.result()
+
+    for done, (keys, result) in enumerate(results(), 1):
+        by_retailer = _suggestions(keys, result)
+        _store(by_retailer, computed_at)
+        retailers += len(by_retailer)
+        suggestions += sum(len(items) for items in by_retailer.values())
+        if progress:
+            progress(done, len(batches))
+
+    ReorderSuggestionList.query.filter(
+        ReorderSuggestionList.computed_at < computed_at
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'retailers': retailers,
+        'suggestions': suggestions,
+        'seconds': round(elapsed, 3),
+        'perSecond': round(len(retailer_ids) / elapsed) if elapsed and retailer_ids else 0
+    }
+
+def get_for_retailer(retailer_id, distributor_id=None):
+    """A retailer's stored suggestions: one primary key lookup"""
+    stored = db.session.get(ReorderSuggestionList, retailer_id)
+    if stored is None:
+        return {'suggestions': [], 'computedAt': None}
+    result = stored.to_dict()
+    if distributor_id:
+        result['suggestions'] = [
+            suggestion for suggestion in result['suggestions']
+            if suggestion['distributorId'] == str(distributor_id)
+        ]
+    return result
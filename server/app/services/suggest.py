@@ -0,0 +1,240 @@
+import bisect
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import Product, SearchHistory
+
+# Upper bound on candidates ranked per keystroke, so short prefixes stay cheap
+MAX_SCAN = 500
+
+# Memoized prefixes kept between index mutations
+MAX_CACHED_PREFIXES = 10000
+
+class SuggestIndex:
+    """In-process typeahead index over active product names and SKUs.
+
+    Keys live in one sorted list, so a prefix lookup is a bisect plus a short
+    scan. Products written since the last sync (new, renamed or deactivated)
+    are applied incrementally; popularity weights from SearchHistory are
+    refreshed on full rebuilds. Syncs and rebuilds run in a background
+    thread, one at a time, while the current index keeps serving.
+    """
+
+    def __init__(self):
+        self._entries = []      # sorted (key, product_id)
+        self._products = {}     # product_id -> (name, sku)
+        self._weights = {}      # product_id -> popularity
+        self._popular_terms = []
+        self._watermark = None
+        self._built_at = 0
+        self._synced_at = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refresher = None
+
+    def rebuild(self):
+        """Reload every active product and the popularity weights"""
+        rows = db.session.query(
+            Product.id, Product.name, Product.sku, Product.updated_at
+        ).filter(Product.is_active == True).yield_per(10000)
+
+        entries = []
+        products = {}
+        watermark = None
+        for product_id, name, sku, updated_at in rows:
+            product_id = str(product_id)
+            products[product_id] = (name, sku)
+            entries.append((name.lower(), product_id))
+            entries.append((sku.lower(), product_id))
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        entries.sort()
+
+        popular_terms = db.session.query(
+            func.lower(SearchHistory.search_term), func.count(SearchHistory.id)
+        ).filter(
+            SearchHistory.search_type == 'product'
+        ).group_by(
+            func.lower(SearchHistory.search_term)
+        ).order_by(
+            func.count(SearchHistory.id).desc()
+        ).limit(current_app.config['SUGGEST_POPULAR_TERMS']).all()
+
+        with self._lock:
+            self._entries = entries
+            self._products = products
+            self._popular_terms = popular_terms
+            self._weights = self._compute_weights(entries, popular_terms)
+            self._watermark = watermark or datetime.utcnow()
+            self._built_at = self._synced_at = time.monotonic()
+            self._cache = {}
+
+    def add(self, product):
+        """Fold one newly created product into the index"""
+        with self._lock:
+            self._insert(str(product.id), product.name, product.sku)
+            if product.updated_at and (self._watermark is None or product.updated_at > self._watermark):
+                self._watermark = product.updated_at
+            self._cache = {}
+
+    def sync(self):
+        """Apply products written by other workers since the last sync.
+
+        Timestamps are taken when a transaction writes, not when it commits,
+        so a long write (a bulk import, say) can commit rows stamped before
+        the watermark: every sync looks SUGGEST_SYNC_OVERLAP_SECONDS further
+        back. Rows already applied are skipped before taking the lock, so
+        re-reading a bulk import only holds it for what actually changed.
+        """
+        if self._watermark is None:
+            return self.rebuild()
+
+        since = self._watermark - timedelta(seconds=current_app.config['SUGGEST_SYNC_OVERLAP_SECONDS'])
+        rows = db.session.query(
+            Product.id, Product.name, Product.sku, Product.is_active, Product.updated_at
+        ).filter(Product.updated_at >= since).all()
+
+        watermark = max((row.updated_at for row in rows), default=self._watermark)
+        changed = [
+            (str(product_id), name, sku, is_active)
+            for product_id, name, sku, is_active, updated_at in rows
+            if self._products.get(str(product_id)) != ((name, sku) if is_active else None)
+        ]
+
+        with self._lock:
+            for product_id, name, sku, is_active in changed:
+                self._update(product_id, name, sku, is_active)
+            if changed:
+                self._cache = {}
+            if watermark > self._watermark:
+                self._watermark = watermark
+            self._synced_at = time.monotonic()
+
+    def suggest(self, prefix, limit=10):
+        """Return up to `limit` products whose name or SKU starts with `prefix`"""
+        self._refresh_if_stale()
+
+        prefix = prefix.lower()
+        cache_key = (prefix, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        entries = self._entries
+        start = bisect.bisect_left(entries, (prefix,))
+        candidates = {}
+        for key, product_id in entries[start:start + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            candidates.setdefault(product_id, key)
+
+        best = heapq.nsmallest(
+            limit,
+            candidates.items(),
+            key=lambda item: (-self._weights.get(item[0], 0), item[1])
+        )
+
+        results = []
+        for product_id, key in best:
+            name, sku = self._products[product_id]
+            results.append({
+                'productId': product_id,
+                'name': name,
+                'sku': sku,
+                'matched': 'sku' if key == sku.lower() else 'name'
+            })
+
+        if len(self._cache) >= MAX_CACHED_PREFIXES:
+            self._cache = {}
+        self._cache[cache_key] = results
+        return results
+
+    def _insert(self, product_id, name, sku):
+        if product_id in self._products:
+            return
+        self._products[product_id] = (name, sku)
+        for key in (name.lower(), sku.lower()):
+            bisect.insort(self._entries, (key, product_id))
+            weight = sum(count for term, count in self._popular_terms if key.startswith(term))
+            if weight:
+                self._weights[product_id] = self._weights.get(product_id, 0) + weight
+
+    def _remove(self, product_id):
+        name, sku = self._products.pop(product_id)
+        for key in (name.lower(), sku.lower()):
+            index = bisect.bisect_left(self._entries, (key, product_id))
+            if index < len(self._entries) and self._entries[index] == (key, product_id):
+                del self._entries[index]
+        self._weights.pop(product_id, None)
+
+    def _update(self, product_id, name, sku, is_active):
+        """Bring one product's keys up to date; returns whether anything changed"""
+        current = self._products.get(product_id)
+        if current == ((name, sku) if is_active else None):
+            return False
+        if current is not None:
+            self._remove(product_id)
+        if is_active:
+            self._insert(product_id, name, sku)
+        return True
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        config = current_app.config
+        if not self._built_at:
+            # Nothing to serve yet: build here, once, with other requests waiting
+            with self._build_lock:
+                if not self._built_at:
+                    self.rebuild()
+        elif now - self._built_at > config['SUGGEST_REBUILD_SECONDS']:
+            self._start_refresh(current_app._get_current_object(), rebuild=True)
+        elif now - self._synced_at > config['SUGGEST_REFRESH_SECONDS']:
+            self._start_refresh(current_app._get_current_object(), rebuild=False)
+
+    def _start_refresh(self, app, rebuild):
+        # One refresh at a time; requests keep serving what is indexed
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._refresh_in_background, args=(app, rebuild),
+                    name='suggest-rebuild' if rebuild else 'suggest-sync', daemon=True
+                )
+                self._refresher.start()
+
+    def _refresh_in_background(self, app, rebuild):
+        with app.app_context():
+            try:
+                if rebuild:
+                    with self._build_lock:
+                        self.rebuild()
+                else:
+                    self.sync()
+            except Exception:
+                app.logger.exception('Suggest index %s failed; serving the previous index',
+                                     'rebuild' if rebuild else 'sync')
+                # Wait out the interval before the next attempt; syncs keep
+                # the current index up to date until the next rebuild
+                with self._lock:
+                    if rebuild:
+                        self._built_at = time.monotonic()
+                    else:
+                        self._synced_at = time.monotonic()
+
+    @staticmethod
+    def _compute_weights(entries, popular_terms):
+        """Credit each product with the searches its name or SKU starts with"""
+        weights = {}
+        for term, count in popular_terms:
+            start = bisect.bisect_left(entries, (term,))
+            for key, product_id in entries[start:start + MAX_SCAN]:
+                if not key.startswith(term):
+                    break
+                weights[product_id] = weights.get(product_id, 0) + count
+        return weights
+
+suggest_index = SuggestIndex()
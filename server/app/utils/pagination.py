@@ -0,0 +1,74 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+def get_page_size():
+    """Read the requested page size, defaulting to ITEMS_PER_PAGE"""
+    default = current_app.config['ITEMS_PER_PAGE']
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, current_app.config['MAX_ITEMS_PER_PAGE']))
+
+def _pack(values):
+    """Serialize cursor values into an opaque URL-safe token"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def _unpack(cursor):
+    """Deserialize a cursor token back into its list of values"""
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+def encode_cursor(created_at, row_id):
+    """Encode a (created_at, id) position as an opaque cursor"""
+    return _pack([created_at.isoformat(), str(row_id)])
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (created_at, id) position"""
+    try:
+        created_at, row_id = _unpack(cursor)
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def encode_rank_cursor(rank, row_id):
+    """Encode a (relevance rank, id) position as an opaque cursor"""
+    return _pack([float(rank), str(row_id)])
+
+def decode_rank_cursor(cursor):
+    """Decode a cursor back into a (relevance rank, id) position"""
+    try:
+        rank, row_id = _unpack(cursor)
+        return float(rank), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def keyset_paginate(query, created_col, id_col, cursor=None, limit=None, descending=False):
+    """Fetch one page ordered by (created_at, id) with an index-backed seek.
+
+    Returns the page rows and the cursor for the next page (None on the last page).
+    """
+    limit = limit or current_app.config['ITEMS_PER_PAGE']
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if descending:
+            query = query.filter(tuple_(created_col, id_col) < position)
+        else:
+            query = query.filter(tuple_(created_col, id_col) > position)
+
+    if descending:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col, id_col)
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor